@@ -0,0 +1,53 @@
+"""
+test_outlier_plots.py
+Tests for the outlier plots of utils/stat_helpers.py: the binned KDE, the
+normality p-value from moments, and the headless PDF / PNG output.
+
+Run from Inferential_Statistics/ with ``python -m pytest -q tests``.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+stats = pytest.importorskip("scipy.stats")
+pytest.importorskip("matplotlib")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+from utils.stat_helpers import (  # noqa: E402
+    _normaltest_pvalue,
+    _outlier_panel,
+    _plot_outlier_columns,
+)
+
+
+@pytest.mark.parametrize("n", [20, 57, 5_000])
+def test_normaltest_pvalue_matches_scipy(n):
+    x = np.random.default_rng(n).gamma(2.0, size=n)
+    expected = stats.normaltest(x).pvalue
+    got = _normaltest_pvalue(n, stats.skew(x), stats.kurtosis(x, fisher=False))
+    assert got == pytest.approx(expected, rel=1e-10)
+
+
+def test_binned_kde_close_to_gaussian_kde():
+    rng = np.random.default_rng(0)
+    x = np.concatenate([rng.normal(size=20_000), rng.exponential(5, size=500) + 4])
+    panel = _outlier_panel(x, -3, 3, max_points=100)
+    reference = stats.gaussian_kde(x)(panel["grid"])
+    assert np.abs(panel["density"] - reference).max() < 1e-3 * reference.max()
+    assert panel["n_outliers"] == ((x < -3) | (x > 3)).sum()
+    assert len(panel["outliers"]) == 100
+    assert panel["outliers"].max() == x.max()
+
+
+@pytest.mark.parametrize("output", ["outliers.pdf", "png"])
+def test_plots_written_to_files(tmp_path, output):
+    titanic = pd.read_csv(COURSE_ROOT / "datasets" / "titanic_train.csv")
+    paths = _plot_outlier_columns(titanic, ["Fare", "SibSp"], output=tmp_path / output)
+    assert paths and all(path.stat().st_size > 0 for path in paths)
+    assert len(paths) == (1 if output.endswith(".pdf") else 2)
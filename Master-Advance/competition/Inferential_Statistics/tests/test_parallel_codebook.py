@@ -0,0 +1,43 @@
+"""
+test_parallel_codebook.py
+Tests for ``create_codebook(n_jobs=...)``: profiling columns in worker
+processes over shared memory must give the serial result.
+
+Run from Inferential_Statistics/ with ``python -m pytest -q tests``.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("scipy")
+pytest.importorskip("matplotlib")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+from utils.stat_helpers import create_codebook  # noqa: E402
+
+
+def _mixed_frame():
+    """Titanic plus a few dtypes that take other paths through the workers."""
+    df = pd.read_csv(COURSE_ROOT / "datasets" / "titanic_train.csv")
+    rng = np.random.default_rng(0)
+    df["Deck"] = df["Cabin"].str[0].astype("category")
+    df["Alone"] = (df["SibSp"] + df["Parch"]) == 0
+    df["Score"] = pd.array(rng.integers(0, 100, len(df)), dtype="Int64")
+    df.loc[::7, "Score"] = pd.NA
+    df["Skewed"] = rng.lognormal(0, 1.5, len(df)).astype("float32")
+    return df
+
+
+@pytest.mark.parametrize("n_jobs", [2, 3])
+def test_parallel_matches_serial(tmp_path, n_jobs):
+    df = _mixed_frame()
+    options = {"max_values": 10**9, "width_sample": 10**9}
+    serial = create_codebook(df, plot_output=tmp_path / "serial.pdf", **options)
+    parallel = create_codebook(df, n_jobs=n_jobs, plot_output=tmp_path / "parallel.pdf", **options)
+    pd.testing.assert_frame_equal(parallel, serial)
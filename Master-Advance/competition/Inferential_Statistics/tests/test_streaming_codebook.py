@@ -0,0 +1,72 @@
+"""
+test_streaming_codebook.py
+Tests for utils/streaming_codebook.py: the chunked codebook must match the
+in-memory ``create_codebook``, and merged profiles must match one pass.
+
+Run from Inferential_Statistics/ with ``python -m pytest -q tests``.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("scipy")
+pytest.importorskip("matplotlib")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+DATASETS_DIR = COURSE_ROOT / "datasets"
+sys.path.insert(0, str(COURSE_ROOT))
+
+from utils.stat_helpers import create_codebook  # noqa: E402
+from utils.streaming_codebook import StreamingProfile, iter_chunks, stream_codebook  # noqa: E402
+
+TITANIC = DATASETS_DIR / "titanic_train.csv"
+# list every value, so the streamed codebook is exact; create_codebook also
+# gets width_sample=10**9 to measure Width on every row, as the stream does
+EXACT = {"max_values": 10**9}
+
+
+@pytest.fixture(scope="module")
+def titanic():
+    return pd.read_csv(TITANIC)
+
+
+@pytest.fixture(scope="module")
+def in_memory(titanic, tmp_path_factory):
+    plots = tmp_path_factory.mktemp("plots") / "outliers.pdf"
+    return create_codebook(titanic, width_sample=10**9, plot_output=plots, **EXACT)
+
+
+def test_stream_matches_in_memory(in_memory):
+    streamed = stream_codebook(TITANIC, chunksize=100, **EXACT)
+    pd.testing.assert_frame_equal(streamed, in_memory)
+
+
+def test_merged_profiles_match_one_pass():
+    chunks = list(iter_chunks(TITANIC, chunksize=100))
+    one_pass = StreamingProfile()
+    for chunk in chunks:
+        one_pass.update(chunk)
+    head, tail = StreamingProfile(), StreamingProfile()
+    for chunk in chunks[:4]:
+        head.update(chunk)
+    for chunk in chunks[4:]:
+        tail.update(chunk)
+    pd.testing.assert_frame_equal(
+        head.merge(tail).to_codebook(**EXACT), one_pass.to_codebook(**EXACT)
+    )
+
+
+def test_stream_matches_in_memory_with_nullable_columns(tmp_path):
+    df = pd.DataFrame({
+        "name": ["a", None, "b", "a", np.nan, "c"] * 50,
+        "text": pd.array(["u", None, "v", "u", "u", "u"] * 50, dtype="string"),
+        "grade": pd.Categorical(["x", "y", None, "x", "x", "x"] * 50),
+        "count": pd.array([0, 1, None, 4, 2, 3] * 50, dtype="Int64"),
+        "share": pd.array([0.5, None, 1.5, 2.0, 3.0, 4.0] * 50, dtype="Float64"),
+    })
+    in_memory = create_codebook(df, width_sample=10**9, plot_output=tmp_path / "outliers.pdf", **EXACT)
+    pd.testing.assert_frame_equal(stream_codebook(df, chunksize=70, **EXACT), in_memory)
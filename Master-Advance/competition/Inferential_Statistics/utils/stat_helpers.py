@@ -3,17 +3,293 @@ stat_helpers.py
 Utility functions for inferential statistics course.
 """
 
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
-import seaborn as sns
 import matplotlib.pyplot as plt
-from scipy.stats import normaltest
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from scipy.stats import chi2
+
+
+CODEBOOK_COLUMNS = [
+    "Name", "Type", "Width", "Decimals", "Label", "Values", "Missing",
+    "MissingRate", "Align", "Measure", "Mean", "Min", "Max", "StdDev",
+    "Median", "Unit", "ImbalanceWarning", "OutlierWarning",
+]
+
+
+def _column_width(series, sample_size, rng):
+    """
+    Longest ``str()`` of the column's values, without stringifying all of it.
+
+    Integer columns are exact (the longest literal is the min or the max),
+    categoricals only look at their categories, and everything else is
+    measured on a random sample of ``sample_size`` rows (exact when the
+    column is not longer than that).
+    """
+    n = len(series)
+    if n == 0:
+        return 0
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        labels = [str(c) for c in dtype.categories]
+        if series.hasnans:
+            labels.append("nan")
+        return max(map(len, labels), default=0)
+    if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        return max(len(str(series.min())), len(str(series.max())))
+    if n > sample_size:
+        series = series.iloc[rng.integers(0, n, sample_size)]
+    return int(series.astype(str).str.len().max())
+
+
+def _numeric_summary(x):
+    """
+    Mean / min / max / std / median, IQR outlier bounds and outlier rate of
+    one numeric column.
+
+    Works on the column's own numpy array: NaNs are dropped once, and the
+    quartiles come from a single in-place partition of that copy.
+    """
+    n = len(x)
+    valid = x.astype("float64") if x.dtype == bool else x
+    if valid.dtype.kind == "f":
+        valid = valid[~np.isnan(valid)]
+    else:
+        valid = valid.copy()
+    if valid.size == 0:
+        return {"Mean": np.nan, "Min": np.nan, "Max": np.nan, "StdDev": np.nan,
+                "Median": np.nan, "OutlierRate": 0.0, "Missing": n,
+                "LowerBound": np.nan, "UpperBound": np.nan}
+    mean = valid.mean()
+    std = valid.std(ddof=1) if valid.size > 1 else np.nan
+    lo, hi = (x.min(), x.max()) if valid.size == n else (valid.min(), valid.max())
+    q1, median, q3 = np.quantile(valid, [0.25, 0.5, 0.75], overwrite_input=True)
+    iqr = q3 - q1
+    lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    outliers = np.count_nonzero((valid < lower) | (valid > upper))
+    return {
+        "Mean": round(mean, 2),
+        "Min": lo,
+        "Max": hi,
+        "StdDev": round(std, 2),
+        "Median": median,
+        "OutlierRate": outliers / n * 100,
+        "Missing": n - valid.size,
+        "LowerBound": lower,
+        "UpperBound": upper,
+    }
+
+
+def _factorize(values):
+    """
+    ``pd.factorize`` with missing values kept, in order of first appearance.
+
+    Like ``Series.unique``, the different missing values of an object column
+    (``None``, ``nan``, ``NaT``, ``pd.NA``) stay separate values.
+    """
+    if values.dtype != object:
+        return pd.factorize(values, use_na_sentinel=False)
+    codes, uniques = pd.factorize(values)
+    na_pos = np.flatnonzero(codes < 0)
+    if not len(na_pos):
+        return codes, uniques
+    # one extra value per kind of missing value, keyed by its type
+    na_values = np.asarray(values, dtype=object)[na_pos]
+    na_codes, _ = pd.factorize(np.frompyfunc(type, 1, 1)(na_values))
+    na_first = np.unique(na_codes, return_index=True)[1]
+    codes[na_pos] = len(uniques) + na_codes
+    uniques = np.concatenate([np.asarray(uniques, dtype=object), na_values[na_first]])
+    order = np.argsort(np.unique(codes, return_index=True)[1], kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[codes], uniques[order]
+
+
+def _value_counts(series):
+    """Distinct values (in order of appearance, missing values included) and their counts."""
+    codes, uniques = _factorize(series)
+    return uniques, np.bincount(codes, minlength=len(uniques))
+
+
+def _value_summary(uniques, counts, max_values):
+    """List the values of a nominal column, capped at ``max_values`` entries."""
+    if len(uniques) <= max_values:
+        return ", ".join(str(val) for val in uniques)
+    top = np.argsort(-counts, kind="stable")[:max_values]
+    return (
+        ", ".join(str(uniques[i]) for i in top)
+        + f", ... ({len(uniques):,} unique)"
+    )
+
+
+def _profile_column(series, max_values, width_sample, seed):
+    """
+    Everything ``create_codebook`` reports about one column except its
+    name, label, unit and missing rate.
+
+    Only depends on the column itself (``Width`` samples with its own
+    ``seed``), so columns can be profiled in any order or process.
+    """
+    scale = pd.api.types.is_numeric_dtype(series)
+    if scale:
+        if isinstance(series.dtype, np.dtype):
+            x = series.to_numpy()
+        else:  # nullable extension dtypes: pd.NA -> NaN
+            x = series.to_numpy("float64", na_value=np.nan)
+        stats = _numeric_summary(x)
+        if not isinstance(series.dtype, np.dtype) and stats["Missing"] < len(x):
+            # Min / Max keep the column's own type (Int64 -> int, not 0.0)
+            stats["Min"], stats["Max"] = (series.dtype.type(stats["Min"]),
+                                          series.dtype.type(stats["Max"]))
+        missing = stats.pop("Missing")
+        outlier_rate = stats.pop("OutlierRate")
+        values = "Scale data - None"
+        imbalance_warning = "N/A"
+        outlier_warning = "Yes" if outlier_rate > 5 else "No"
+    else:
+        stats = dict.fromkeys(["Mean", "Min", "Max", "StdDev", "Median"], "N/A")
+        uniques, counts = _value_counts(series)
+        values = _value_summary(uniques, counts, max_values)
+        is_na = pd.isna(uniques)
+        present = counts[~is_na]
+        missing = counts[is_na].sum()
+        imbalance_warning = (
+            "Yes"
+            if len(present) and present.max() / present.sum() > 0.8
+            else "No"
+        )
+        outlier_warning = "N/A"
+
+    return {
+        "Type": str(type(series.iloc[0])) if len(series) else str(series.dtype),
+        "Width": _column_width(series, width_sample, np.random.default_rng(seed)),
+        "Decimals": 2 if series.dtype == "float64" else 0,
+        "Values": values,
+        "Missing": int(missing),
+        "Align": "Right" if scale else "Left",
+        "Measure": "Scale" if scale else "Nominal",
+        **stats,
+        "ImbalanceWarning": imbalance_warning,
+        "OutlierWarning": outlier_warning,
+    }
+
+
+def _profile_task(shm_name, shared, max_values, width_sample):
+    """
+    Worker side of ``_profile_columns_parallel``: profile the columns listed
+    in ``shared`` as ``(position, name, offset, dtype, length)``, read-only
+    views of the shared-memory segment ``shm_name``.
+    """
+    profiles = {}
+    shm = SharedMemory(name=shm_name)
+    try:
+        for i, name, offset, dtype, length in shared:
+            x = np.ndarray(length, dtype, buffer=shm.buf, offset=offset)
+            x.flags.writeable = False
+            series = pd.Series(x, name=name, copy=False)
+            profiles[i] = _profile_column(series, max_values, width_sample, seed=i)
+            del x, series
+    finally:
+        shm.close()
+    return profiles
+
+
+def _share_columns(df, positions):
+    """Copy the columns at ``positions`` into a new shared-memory segment."""
+    n_rows = len(df)
+    shared = []
+    size = 0
+    for i in positions:
+        dtype = df.dtypes.iloc[i]
+        shared.append((i, df.columns[i], size, dtype.str, n_rows))
+        size += -(-n_rows * dtype.itemsize // 64) * 64  # 64-byte aligned
+    shm = SharedMemory(create=True, size=max(size, 1))
+    for i, _, offset, dtype, _ in shared:
+        view = np.ndarray(n_rows, dtype, buffer=shm.buf, offset=offset)
+        view[:] = df.iloc[:, i].to_numpy()
+        del view
+    return shm, shared
+
+
+def _unlink(shm):
+    shm.close()
+    shm.unlink()
+
+
+def _profile_columns_parallel(df, max_values, width_sample, n_jobs):
+    """
+    Profile the columns of ``df`` with a pool of ``n_jobs`` processes.
+
+    Columns with a plain numpy numeric dtype are split into contiguous
+    groups; each group is copied once into a shared-memory segment and a
+    worker profiles read-only views of it, so no numeric data is pickled.
+    At most ``n_jobs`` segments exist at a time. Object, categorical and
+    other columns hold Python objects, which cannot be shared that way and
+    cost more to pickle than to profile, so the calling process profiles
+    them itself while the workers are busy. Results are the same as the
+    serial path's, in column order.
+    """
+    n_cols = df.shape[1]
+    numeric, local = [], []
+    for i, dtype in enumerate(df.dtypes):
+        is_plain = isinstance(dtype, np.dtype) and dtype.kind in "biuf"
+        (numeric if is_plain else local).append(i)
+    groups = np.array_split(numeric, min(len(numeric), n_jobs * 4) or 1)
+    profiles = {}
+    running = {}
+
+    def profile_local():
+        i = local.pop(0)
+        profiles[i] = _profile_column(df.iloc[:, i], max_values, width_sample, seed=i)
+
+    def collect(futures):
+        for future in futures:
+            shm = running.pop(future)
+            try:
+                profiles.update(future.result())
+            finally:
+                _unlink(shm)
+
+    try:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            for group in groups:
+                if not len(group):
+                    continue
+                while len(running) >= n_jobs:
+                    if local:
+                        profile_local()
+                        collect([f for f in running if f.done()])
+                    else:
+                        collect(wait(running, return_when=FIRST_COMPLETED).done)
+                shm, shared = _share_columns(df, group)
+                future = pool.submit(_profile_task, shm.name, shared, max_values, width_sample)
+                running[future] = shm
+            while local:
+                profile_local()
+            collect(list(running))
+    finally:
+        for shm in running.values():
+            _unlink(shm)
+    return [profiles[i] for i in range(n_cols)]
 
 
-def create_codebook(df, units_dict=None, detailed_labels=None):
+def create_codebook(df, units_dict=None, detailed_labels=None,
+                    max_values=20, width_sample=2_000, n_jobs=1,
+                    plot_output=None, kde_grid=512, max_outlier_points=5_000):
     """
     Generate a codebook (data dictionary) for the given DataFrame.
 
+    Numeric columns are summarised straight from their numpy arrays (one
+    partition for the quartiles) and nominal columns are counted with a
+    single factorize, so no column is ever converted to strings in full.
+
     Parameters
     ----------
     df : pd.DataFrame
@@ -22,167 +298,347 @@ def create_codebook(df, units_dict=None, detailed_labels=None):
         Mapping of column names to unit strings.
     detailed_labels : dict, optional
         Mapping of column names to human-readable labels.
+    max_values : int, default 20
+        Nominal columns with more distinct values than this list only the
+        ``max_values`` most frequent ones, followed by the distinct count.
+    width_sample : int, default 2_000
+        Number of rows sampled to estimate ``Width`` of non-integer columns.
+    n_jobs : int, default 1
+        Number of processes to profile columns in (``-1`` for all cores).
+        Worth it for wide tables; the result is the same as with 1. Also
+        used for the outlier plots.
+    plot_output : str or Path, optional
+        Where the outlier plots go (see ``_plot_outlier_columns``): None
+        shows them, a ``.pdf`` path writes a multi-page PDF, any other path
+        is a directory for one PNG per column.
+    kde_grid : int, default 512
+        Grid points of the binned KDE in the outlier plots.
+    max_outlier_points : int, default 5_000
+        Most outliers drawn per plot; more are randomly downsampled.
 
     Returns
     -------
     pd.DataFrame
         A codebook with metadata for every column.
     """
-    rows = []
-    outlier_columns = []
-
-    for col in df.columns:
-        data_type = type(df[col].iloc[0])
+    n_rows = len(df)
+    columns = list(df.columns)
+    units_dict = units_dict or {}
+    detailed_labels = detailed_labels or {}
 
-        if pd.api.types.is_numeric_dtype(df[col]):
-            measure = "Scale"
-            decimals = 2 if df[col].dtype == "float64" else 0
-        elif isinstance(df[col].iloc[0], (str, list)):
-            measure = "Nominal"
-            decimals = 0
-        else:
-            measure = "Nominal"
-            decimals = 0
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs > 1 and len(columns) > 1 and n_rows:
+        profiles = _profile_columns_parallel(df, max_values, width_sample, n_jobs)
+    else:
+        profiles = [
+            _profile_column(df.iloc[:, i], max_values, width_sample, seed=i)
+            for i in range(len(columns))
+        ]
 
-        column_width = df[col].astype(str).str.len().max()
+    out = {name: [] for name in CODEBOOK_COLUMNS}
+    outlier_columns = {}
+    for col, profile in zip(columns, profiles):
+        if profile["OutlierWarning"] == "Yes":
+            outlier_columns[col] = profile
+        missing = profile["Missing"]
+        row = {
+            **profile,
+            "Name": col,
+            "Label": detailed_labels.get(col, col),
+            "MissingRate": f"{round(missing / n_rows * 100, 2) if n_rows else 0.0}%",
+            "Unit": units_dict.get(col, "N/A"),
+        }
+        for key in CODEBOOK_COLUMNS:
+            out[key].append(row[key])
 
-        missing_values = df[col].isnull().sum()
-        missing_rate = round(missing_values / len(df) * 100, 2)
+    codebook = pd.DataFrame(out, columns=CODEBOOK_COLUMNS)
 
-        label = (
-            detailed_labels[col]
-            if detailed_labels and col in detailed_labels
-            else col
+    if outlier_columns:
+        _plot_outlier_columns(
+            df, list(outlier_columns), outlier_columns, output=plot_output,
+            grid_size=kde_grid, max_points=max_outlier_points, n_jobs=n_jobs,
         )
 
-        if measure == "Nominal":
-            unique_vals = df[col].unique()
-            values = ", ".join([str(val) for val in unique_vals])
-            imbalance_warning = (
-                "Yes"
-                if df[col].value_counts(normalize=True).max() > 0.8
-                else "No"
-            )
-            outlier_warning = "N/A"
-        else:
-            values = "Scale data - None"
-            imbalance_warning = "N/A"
-
-            q1 = df[col].quantile(0.25)
-            q3 = df[col].quantile(0.75)
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-
-            outliers = ((df[col] < lower_bound) | (df[col] > upper_bound)).sum()
-            outlier_rate = outliers / len(df[col]) * 100
-            outlier_warning = "Yes" if outlier_rate > 5 else "No"
-
-            if outlier_warning == "Yes":
-                outlier_columns.append(col)
-
-        align = "Right" if pd.api.types.is_numeric_dtype(df[col]) else "Left"
-
-        if measure == "Scale":
-            mean_val = (
-                round(df[col].mean(), 2)
-                if pd.api.types.is_numeric_dtype(df[col])
-                else "N/A"
-            )
-            min_val = df[col].min()
-            max_val = df[col].max()
-            std_dev = round(df[col].std(), 2)
-            median_val = df[col].median()
-        else:
-            mean_val = min_val = max_val = std_dev = median_val = "N/A"
-
-        unit = units_dict[col] if units_dict and col in units_dict else "N/A"
-
-        rows.append(
-            {
-                "Name": col,
-                "Type": str(data_type),
-                "Width": column_width,
-                "Decimals": decimals,
-                "Label": label,
-                "Values": values,
-                "Missing": missing_values,
-                "MissingRate": f"{missing_rate}%",
-                "Align": align,
-                "Measure": measure,
-                "Mean": mean_val,
-                "Min": min_val,
-                "Max": max_val,
-                "StdDev": std_dev,
-                "Median": median_val,
-                "Unit": unit,
-                "ImbalanceWarning": imbalance_warning,
-                "OutlierWarning": outlier_warning,
-            }
-        )
+    return codebook
 
-    codebook = pd.concat(
-        [pd.DataFrame([row]) for row in rows], ignore_index=True
-    )
 
-    if outlier_columns:
-        _plot_outlier_columns(df, outlier_columns)
+def _normaltest_pvalue(n, skewness, kurt):
+    """
+    p-value of the D'Agostino-Pearson normality test from the sample
+    skewness and (Pearson) kurtosis -- the formulas of
+    ``scipy.stats.normaltest``, without another pass over the data.
+    """
+    if n < 8:
+        return np.nan
+    n = float(n)
+    # skewness test
+    y = skewness * np.sqrt((n + 1) * (n + 3) / (6.0 * (n - 2)))
+    beta2 = (3.0 * (n**2 + 27 * n - 70) * (n + 1) * (n + 3)
+             / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9)))
+    w2 = -1 + np.sqrt(2 * (beta2 - 1))
+    delta = 1 / np.sqrt(0.5 * np.log(w2))
+    alpha = np.sqrt(2.0 / (w2 - 1))
+    y = y if y != 0 else 1.0
+    z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+    # kurtosis test
+    e = 3.0 * (n - 1) / (n + 1)
+    var_b2 = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5))
+    x = (kurt - e) / np.sqrt(var_b2)
+    sqrt_beta1 = (6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9))
+                  * np.sqrt(6.0 * (n + 3) * (n + 5) / (n * (n - 2) * (n - 3))))
+    a = 6.0 + 8.0 / sqrt_beta1 * (2.0 / sqrt_beta1 + np.sqrt(1 + 4.0 / sqrt_beta1**2))
+    denom = 1 + x * np.sqrt(2 / (a - 4.0))
+    if denom == 0:
+        return np.nan
+    term2 = np.sign(denom) * ((1 - 2.0 / a) / abs(denom)) ** (1 / 3)
+    z_kurt = (1 - 2 / (9.0 * a) - term2) / np.sqrt(2 / (9.0 * a))
+    return chi2.sf(z_skew**2 + z_kurt**2, 2)
 
-    return codebook
 
+def _outlier_panel(x, lower, upper, grid_size=512, max_points=5_000, seed=0):
+    """
+    Everything drawn in one outlier plot, from one column's values.
+
+    The KDE is binned: values are linearly binned onto ``grid_size``
+    points and convolved with the Gaussian kernel by FFT, so the cost is
+    one pass over the data plus O(grid log grid) instead of n x grid
+    kernel evaluations. The bandwidth and the grid range follow seaborn's
+    ``kdeplot`` defaults (Scott's rule, 3 bandwidths past the data). At
+    most ``max_points`` outliers are kept (a random sample that always
+    includes the two most extreme ones).
+    """
+    x = x[~np.isnan(x)] if x.dtype.kind == "f" else x.astype("float64")
+    n = len(x)
+    panel = {"grid": np.empty(0), "density": np.empty(0), "outliers": np.empty(0),
+             "n_outliers": 0, "p_value": np.nan}
+    if n == 0:
+        return panel
 
-def _plot_outlier_columns(df, outlier_columns):
-    """Plot KDE with outlier markers for columns flagged by create_codebook."""
-    n_cols_per_row = 2
-    n_outliers = len(outlier_columns)
-    n_rows = (n_outliers + n_cols_per_row - 1) // n_cols_per_row
+    dev = x - x.mean()
+    sq = dev * dev
+    m2, m3, m4 = sq.sum() / n, np.dot(sq, dev) / n, np.dot(sq, sq) / n
+    del dev, sq
+    if m2 > 0:
+        panel["p_value"] = _normaltest_pvalue(n, m3 / m2**1.5, m4 / m2**2)
 
-    fig, axes = plt.subplots(
-        n_rows, n_cols_per_row, figsize=(12, 3 * n_rows)
-    )
-    if n_rows == 1 and n_cols_per_row == 1:
-        axes = [axes]
-    else:
-        axes = axes.flatten()
-
-    for i, col in enumerate(outlier_columns):
-        ax = axes[i]
-        sns.kdeplot(df[col], color="blue", label=f"{col} KDE", fill=True, ax=ax)
-
-        q1 = df[col].quantile(0.25)
-        q3 = df[col].quantile(0.75)
-        iqr = q3 - q1
-        lower_bound = q1 - 1.5 * iqr
-        upper_bound = q3 + 1.5 * iqr
-
-        stat, p_value = normaltest(df[col].dropna())
-        mean_val = round(df[col].mean(), 2)
-        std_dev = round(df[col].std(), 2)
-
-        ax.set_title(
-            f"KDE Plot of {col} with Outliers\n"
-            f"Mean: {mean_val}, StdDev: {std_dev}\n"
-            f"Normality Test p-value: {p_value:.4f}"
-        )
-        ax.axvline(
-            x=lower_bound, color="green", linestyle="--", label="Lower Bound"
+    bw = np.sqrt(m2 * n / (n - 1)) * n ** (-1 / 5) if n > 1 else 0.0
+    if not bw > 0:
+        bw = 1.0
+    lo, hi = x.min() - 3 * bw, x.max() + 3 * bw
+    dx = (hi - lo) / (grid_size - 1)
+    pos = x - lo
+    pos /= dx
+    left = pos.astype(np.intp)
+    np.minimum(left, grid_size - 2, out=left)
+    pos -= left  # now the share of each value that goes to the right neighbour
+    right = np.bincount(left, pos, grid_size)
+    counts = np.bincount(left, minlength=grid_size) - right
+    counts[1:] += right[:-1]
+    del pos, left
+    half = min(grid_size - 1, int(np.ceil(4 * bw / dx)))
+    kernel = np.exp(-0.5 * (np.arange(-half, half + 1) * dx / bw) ** 2)
+    kernel /= kernel.sum() * dx * n
+    nfft = 1 << int(np.ceil(np.log2(grid_size + 2 * half)))
+    density = np.fft.irfft(np.fft.rfft(counts, nfft) * np.fft.rfft(kernel, nfft), nfft)
+    panel["grid"] = np.linspace(lo, hi, grid_size)
+    panel["density"] = np.maximum(density[half:half + grid_size], 0)
+
+    outliers = x[(x < lower) | (x > upper)]
+    panel["n_outliers"] = len(outliers)
+    if len(outliers) > max_points:
+        keep = np.random.default_rng(seed).choice(
+            len(outliers), max(max_points - 2, 0), replace=False
         )
-        ax.axvline(
-            x=upper_bound, color="red", linestyle="--", label="Upper Bound"
+        outliers = np.concatenate(
+            [outliers[keep], [outliers.min(), outliers.max()]]
         )
+    panel["outliers"] = outliers
+    return panel
+
+
+def _outlier_panel_task(shm_name, shared, bounds, grid_size, max_points):
+    """Worker side of ``_outlier_panels``, over shared-memory columns."""
+    panels = {}
+    shm = SharedMemory(name=shm_name)
+    try:
+        for i, _, offset, dtype, length in shared:
+            x = np.ndarray(length, dtype, buffer=shm.buf, offset=offset)
+            x.flags.writeable = False
+            panels[i] = _outlier_panel(x, *bounds[i], grid_size, max_points, seed=i)
+            del x
+    finally:
+        shm.close()
+    return panels
+
+
+def _outlier_panels(df, positions, bounds, grid_size, max_points, n_jobs):
+    """
+    ``_outlier_panel`` of the columns at ``positions``, computed on
+    ``n_jobs`` processes over shared memory like ``create_codebook``'s
+    column profiles (nullable extension columns stay in this process).
+    """
+    def values(i):
+        series = df.iloc[:, i]
+        if isinstance(series.dtype, np.dtype):
+            return series.to_numpy()
+        return series.to_numpy("float64", na_value=np.nan)
 
-        outliers_df = df[(df[col] < lower_bound) | (df[col] > upper_bound)]
-        ax.scatter(
-            outliers_df[col],
-            np.zeros(len(outliers_df)),
-            color="red",
-            label="Outliers",
-            zorder=5,
+    def local(i):
+        return _outlier_panel(values(i), *bounds[i], grid_size, max_points, seed=i)
+
+    if n_jobs <= 1 or len(positions) < 2:
+        return {i: local(i) for i in positions}
+
+    shareable = [i for i in positions if isinstance(df.dtypes.iloc[i], np.dtype)]
+    panels = {i: None for i in positions}
+    running = {}
+    try:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            for group in np.array_split(shareable, min(len(shareable), n_jobs * 2) or 1):
+                if not len(group):
+                    continue
+                if len(running) >= n_jobs:
+                    done = wait(running, return_when=FIRST_COMPLETED).done
+                    for future in done:
+                        panels.update(future.result())
+                        _unlink(running.pop(future))
+                shm, shared = _share_columns(df, group)
+                running[pool.submit(_outlier_panel_task, shm.name, shared,
+                                    bounds, grid_size, max_points)] = shm
+            for i in positions:
+                if i not in shareable:
+                    panels[i] = local(i)
+            for future in list(running):
+                panels.update(future.result())
+                _unlink(running.pop(future))
+    finally:
+        for shm in running.values():
+            _unlink(shm)
+    return panels
+
+
+def _draw_outlier_panel(ax, col, panel, mean_val, std_dev, lower_bound, upper_bound):
+    """Draw one outlier plot (KDE, IQR bounds, outliers) on ``ax``."""
+    ax.fill_between(panel["grid"], panel["density"], color="blue", alpha=0.25)
+    ax.plot(panel["grid"], panel["density"], color="blue", label=f"{col} KDE")
+    ax.set_xlabel(str(col))
+    ax.set_ylabel("Density")
+    ax.set_title(
+        f"KDE Plot of {col} with Outliers\n"
+        f"Mean: {mean_val}, StdDev: {std_dev}\n"
+        f"Normality Test p-value: {panel['p_value']:.4f}"
+    )
+    ax.axvline(
+        x=lower_bound, color="green", linestyle="--", label="Lower Bound"
+    )
+    ax.axvline(
+        x=upper_bound, color="red", linestyle="--", label="Upper Bound"
+    )
+    shown = panel["outliers"]
+    label = "Outliers"
+    if len(shown) < panel["n_outliers"]:
+        label = f"Outliers ({len(shown):,} of {panel['n_outliers']:,})"
+    ax.scatter(shown, np.zeros(len(shown)), color="red", label=label, zorder=5)
+    ax.legend()
+
+
+def _save_panel(path, col, panel, *stats):
+    """Write one outlier plot to ``path`` without going through pyplot."""
+    fig = Figure(figsize=(6, 3.5))
+    _draw_outlier_panel(fig.subplots(), col, panel, *stats)
+    fig.tight_layout()
+    fig.savefig(path)
+    return path
+
+
+def _plot_outlier_columns(df, outlier_columns, profiles=None, output=None,
+                          grid_size=512, max_points=5_000, n_jobs=1):
+    """
+    Plot KDE with outlier markers for columns flagged by create_codebook.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The data the codebook was built from.
+    outlier_columns : list
+        Columns to plot.
+    profiles : dict, optional
+        Column name -> ``create_codebook`` profile; its Mean, StdDev and
+        IQR bounds are reused. Computed here for columns not in it.
+    output : str or Path, optional
+        None draws all plots in one figure and calls ``plt.show()``. A
+        ``.pdf`` path writes one plot per page of a single PDF; any other
+        path is a directory that gets one PNG per column, rendered by the
+        worker processes. Both file modes bypass pyplot, so they work
+        headless and never block.
+    grid_size : int, default 512
+        Grid points of the binned KDE.
+    max_points : int, default 5_000
+        Most outliers drawn per plot.
+    n_jobs : int, default 1
+        Processes that compute the plots (and render the PNGs).
+
+    Returns
+    -------
+    list of Path or None
+        The files written, or None when the plots were shown.
+    """
+    profiles = profiles or {}
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    position = {col: i for i, col in enumerate(df.columns)}
+    positions = [position[col] for col in outlier_columns]
+    stats = {}
+    for col, i in zip(outlier_columns, positions):
+        profile = profiles.get(col)
+        if profile is None:
+            series = df.iloc[:, i]
+            x = (series.to_numpy() if isinstance(series.dtype, np.dtype)
+                 else series.to_numpy("float64", na_value=np.nan))
+            profile = _numeric_summary(x)
+        stats[i] = (profile["Mean"], profile["StdDev"],
+                    profile["LowerBound"], profile["UpperBound"])
+    bounds = {i: stat[2:] for i, stat in stats.items()}
+    panels = _outlier_panels(df, positions, bounds, grid_size, max_points, n_jobs)
+
+    if output is None:
+        n_cols_per_row = 2
+        n_outliers = len(outlier_columns)
+        n_rows = (n_outliers + n_cols_per_row - 1) // n_cols_per_row
+
+        fig, axes = plt.subplots(
+            n_rows, n_cols_per_row, figsize=(12, 3 * n_rows)
         )
-        ax.legend()
+        axes = np.ravel(axes)
+        for ax, col, i in zip(axes, outlier_columns, positions):
+            _draw_outlier_panel(ax, col, panels[i], *stats[i])
+        for ax in axes[n_outliers:]:
+            fig.delaxes(ax)
+
+        plt.tight_layout()
+        plt.show()
+        return None
 
-    for j in range(i + 1, len(axes)):
-        fig.delaxes(axes[j])
+    output = Path(output)
+    if output.suffix.lower() == ".pdf":
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with PdfPages(output) as pdf:
+            for col, i in zip(outlier_columns, positions):
+                fig = Figure(figsize=(8, 4.5))
+                _draw_outlier_panel(fig.subplots(), col, panels[i], *stats[i])
+                fig.tight_layout()
+                pdf.savefig(fig)
+        return [output]
 
-    plt.tight_layout()
-    plt.show()
+    output.mkdir(parents=True, exist_ok=True)
+    paths = [
+        output / f"{k:02d}_{re.sub(r'[^0-9A-Za-z_.-]+', '_', str(col))}.png"
+        for k, col in enumerate(outlier_columns, 1)
+    ]
+    jobs = [(path, col, panels[i], *stats[i])
+            for path, col, i in zip(paths, outlier_columns, positions)]
+    if n_jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            return list(pool.map(_save_panel, *zip(*jobs)))
+    return [_save_panel(*job) for job in jobs]
@@ -0,0 +1,557 @@
+"""
+streaming_codebook.py
+Out-of-core version of ``stat_helpers.create_codebook``.
+
+``create_codebook`` needs the whole DataFrame in memory. ``stream_codebook``
+reads a CSV / Parquet file (or any iterable of DataFrames) chunk by chunk and
+keeps a small, mergeable state per column, then builds the same codebook
+columns from it. Profiles of different files or of different parts of one
+file can be combined with ``StreamingProfile.merge``.
+
+Accuracy compared with ``create_codebook`` on the same data
+------------------------------------------------------------
+Exact
+    Missing, MissingRate, Mean, StdDev (Chan / Welford merge of per-chunk
+    moments, up to float rounding), Min, Max, Measure, Align.
+Median, OutlierWarning
+    Read off a KLL-style quantile sketch (``sketch_size`` values per level).
+    Exact while a column has at most ``sketch_size`` non-missing values.
+    Beyond that every compaction at level ``h`` shifts a rank by at most
+    ``2**h``, which bounds the rank error by ``n * log2(n / k) / k`` in the
+    worst case; the compactions use random offsets, so in practice the error
+    is far smaller (0.01 - 0.03 % of ``n`` at 2M rows with ``k = 4096``).
+    The outlier rate is counted outside the sketch's quartile bounds, so the
+    5 % threshold is checked to within about twice that error.
+Values, ImbalanceWarning
+    Exact while a column has at most ``top_k`` distinct values. Above that
+    the counts come from a Misra-Gries summary and are underestimated by at
+    most ``n / (top_k + 1)``; the listing then shows the ``max_values`` most
+    frequent values and ``~N unique`` from a HyperLogLog counter (standard
+    error ``1.04 / sqrt(2**hll_precision)``, about 0.8 % at the default 14).
+Width
+    Longest string of a random sample of ``width_sample`` rows per chunk,
+    in that chunk's dtype (exact for integer and categorical columns).
+Type, Decimals
+    From the first row; numeric columns take the widest dtype seen across
+    chunks (an integer column that gains NaNs in a later chunk is float64).
+
+No plots are drawn; the outlier KDE panels need the data in memory.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .stat_helpers import CODEBOOK_COLUMNS, _column_width, _factorize, _value_summary
+except ImportError:  # utils/ itself on sys.path, as in case/*.ipynb
+    from stat_helpers import CODEBOOK_COLUMNS, _column_width, _factorize, _value_summary
+
+
+def _bit_length(x):
+    """Vectorised ``int.bit_length`` for an array of uint64."""
+    n = np.zeros(x.shape, dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= np.uint64(1 << shift)
+        x = np.where(big, x >> np.uint64(shift), x)
+        n += big * shift
+    return n + (x > 0)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch (a KLL-style stack of compactors).
+
+    Level ``h`` holds at most ``k`` values, each standing for ``2**h`` input
+    values. When a level overflows it is sorted and every other value (from
+    a random offset) moves up one level, so memory stays
+    ``O(k * log2(n / k))``. Until the first compaction the sketch is exact.
+    """
+
+    def __init__(self, k=4096, seed=0):
+        self.k = k
+        self.levels = []
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def exact(self):
+        return len(self.levels) <= 1
+
+    def update(self, values):
+        self._add(0, np.asarray(values, dtype="float64"))
+
+    def merge(self, other):
+        for h, values in enumerate(other.levels):
+            self._add(h, values)
+        return self
+
+    def _add(self, h, values):
+        while len(values):
+            if h == len(self.levels):
+                self.levels.append(values[:0])
+            buf = np.concatenate([self.levels[h], values])
+            if len(buf) <= self.k:
+                self.levels[h] = buf
+                return
+            buf.sort(kind="stable")
+            odd = len(buf) % 2  # the odd one out stays at this level
+            self.levels[h] = buf[len(buf) - odd:]
+            values = buf[self._rng.integers(2):len(buf) - odd:2]
+            h += 1
+
+    def _weighted(self):
+        """All retained values, sorted, with their cumulative weights."""
+        values = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)]
+        )
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs):
+        """Quantiles ``qs``; linear interpolation (as pandas) while exact."""
+        if not self.levels or not any(len(level) for level in self.levels):
+            return np.full(len(qs), np.nan)
+        if self.exact:
+            return np.quantile(self.levels[0], qs)
+        values, cum = self._weighted()
+        ranks = np.asarray(qs) * (cum[-1] - 1)
+        idx = np.searchsorted(cum, ranks, side="right")
+        return values[np.minimum(idx, len(values) - 1)]
+
+    def count_outside(self, lower, upper):
+        """(Estimated) number of values below ``lower`` or above ``upper``."""
+        if not self.levels:
+            return 0
+        if self.exact:
+            x = self.levels[0]
+            return int(np.count_nonzero((x < lower) | (x > upper)))
+        values, cum = self._weighted()
+        below = np.searchsorted(values, lower, side="left")
+        above = np.searchsorted(values, upper, side="right")
+        n_below = cum[below - 1] if below else 0.0
+        n_above = cum[-1] - (cum[above - 1] if above else 0.0)
+        return int(round(n_below + n_above))
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit hashes (``2**p`` registers)."""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, hashes):
+        p = self.p
+        idx = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        # a guard bit below the remaining 64 - p bits caps the run length
+        rest = (hashes << np.uint64(p)) | np.uint64(1 << (p - 1))
+        rho = (65 - _bit_length(rest)).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rho)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype("float64")))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)  # linear counting for small sets
+        return raw
+
+
+class FrequentItems:
+    """
+    Misra-Gries summary of value counts.
+
+    Keeps at most ``capacity`` values (in order of first appearance, each
+    kind of missing value included). Every surviving count is underestimated by at most
+    ``error``, which stays 0 -- exact counts -- until the number of distinct
+    values exceeds ``capacity``.
+    """
+
+    def __init__(self, capacity=10_000):
+        self.capacity = capacity
+        self.values = np.empty(0, dtype=object)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.error = 0
+
+    @property
+    def exact(self):
+        return self.error == 0
+
+    def update(self, uniques, counts):
+        self._add(np.asarray(uniques, dtype=object), np.asarray(counts, dtype=np.int64))
+
+    def merge(self, other):
+        self.error += other.error
+        self._add(other.values, other.counts)
+        return self
+
+    def _add(self, values, counts):
+        if len(self.values):
+            codes, values = _factorize(np.concatenate([self.values, values]))
+            counts = np.bincount(
+                codes, weights=np.concatenate([self.counts, counts]),
+                minlength=len(values),
+            ).astype(np.int64)
+        if len(values) > self.capacity:
+            cut = np.partition(counts, -(self.capacity + 1))[-(self.capacity + 1)]
+            keep = counts > cut
+            values, counts = values[keep], counts[keep] - cut
+            self.error += int(cut)
+        self.values, self.counts = values, counts
+
+
+class ColumnProfile:
+    """Mergeable summary of one column, fed one chunk at a time."""
+
+    def __init__(self, name, sketch_size=4096, hll_precision=14, top_k=10_000):
+        self.name = name
+        self.rows = 0
+        self.missing = 0
+        self.scale = None      # decided by the first chunk with values
+        self.dtype = None      # widest numeric dtype seen (scale columns)
+        self.ext_dtype = None  # nullable extension dtype (Int64, Float64, ...), if any
+        self.first = None      # first row's value, for the Type column
+        self.width = 0
+        # scale columns
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.sketch = QuantileSketch(sketch_size)
+        # nominal columns
+        self.distinct = HyperLogLog(hll_precision)
+        self.top = FrequentItems(top_k)
+
+    def update(self, series, width_sample=2_000, rng=None):
+        """Add one chunk of the column."""
+        rng = rng if rng is not None else np.random.default_rng(0)
+        if not len(series):
+            return self
+        if self.rows == 0:
+            self.first = series.iloc[0]
+        numeric = pd.api.types.is_numeric_dtype(series)
+        if self.scale is None:
+            self.scale = numeric
+        elif self.scale and not numeric:
+            if self.missing == self.rows:
+                # only NaNs so far (read as float64): it is a nominal column
+                self.scale, self.dtype = False, None
+                self.first = float(self.first)
+                self.top.update([np.nan], [self.missing])
+            else:
+                try:
+                    series = series.astype("float64")
+                except (TypeError, ValueError):
+                    raise ValueError(
+                        f"column {self.name!r} turned non-numeric after "
+                        f"{self.rows:,} rows; read it with dtype={{{self.name!r}: str}}"
+                    ) from None
+
+        if self.scale:
+            self._update_scale(series)
+        else:
+            self._update_nominal(series)
+        self.rows += len(series)
+        self.width = max(self.width, _column_width(series, width_sample, rng))
+        return self
+
+    def _update_scale(self, series):
+        if isinstance(series.dtype, np.dtype):
+            x = series.to_numpy()
+        else:  # nullable extension dtypes: pd.NA -> NaN
+            x = series.to_numpy("float64", na_value=np.nan)
+            self.ext_dtype = series.dtype
+        self.dtype = x.dtype if self.dtype is None else np.result_type(self.dtype, x.dtype)
+        valid = x[~np.isnan(x)] if x.dtype.kind == "f" else x
+        self.missing += len(x) - len(valid)
+        if not len(valid):
+            return
+        lo, hi = valid.min(), valid.max()
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+        values = valid.astype("float64", copy=False)
+        mean = values.mean()
+        self._merge_moments(len(values), mean, np.square(values - mean).sum())
+        self.sketch.update(values)
+
+    def _merge_moments(self, n, mean, m2):
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    def _update_nominal(self, series):
+        if pd.api.types.is_numeric_dtype(series):
+            # a nominal column whose chunk parsed as numbers: keep them as text
+            series = series.astype(str).where(series.notna())
+        codes, uniques = _factorize(series)
+        counts = np.bincount(codes, minlength=len(uniques))
+        is_na = np.asarray(pd.isna(uniques))
+        self.missing += int(counts[is_na].sum())
+        self.top.update(uniques, counts)
+        present = np.asarray(uniques, dtype=object)[~is_na]
+        if len(present):
+            self.distinct.update(pd.util.hash_array(present, categorize=False))
+
+    def merge(self, other):
+        """Fold in the profile of another part of the same column."""
+        if other.rows == 0:
+            return self
+        if self.rows == 0:
+            self.first, self.scale = other.first, other.scale
+        elif self.scale != other.scale:
+            raise ValueError(
+                f"column {self.name!r} is numeric in one profile and not in the other"
+            )
+        self.rows += other.rows
+        self.missing += other.missing
+        self.width = max(self.width, other.width)
+        self.ext_dtype = self.ext_dtype or other.ext_dtype
+        if other.dtype is not None:
+            self.dtype = (
+                other.dtype if self.dtype is None
+                else np.result_type(self.dtype, other.dtype)
+            )
+        if other.n:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+            self._merge_moments(other.n, other.mean, other.m2)
+        self.sketch.merge(other.sketch)
+        self.distinct.merge(other.distinct)
+        self.top.merge(other.top)
+        return self
+
+
+class StreamingProfile:
+    """
+    Per-column profiles of a table that arrives in chunks.
+
+    Parameters
+    ----------
+    sketch_size : int, default 4096
+        Values kept per level of each column's quantile sketch.
+    hll_precision : int, default 14
+        HyperLogLog registers per nominal column are ``2**hll_precision``.
+    top_k : int, default 10_000
+        Distinct values tracked per nominal column.
+    width_sample : int, default 2_000
+        Rows sampled per chunk to estimate ``Width``.
+    seed : int, default 0
+        Seed for the width samples.
+    """
+
+    def __init__(self, sketch_size=4096, hll_precision=14, top_k=10_000,
+                 width_sample=2_000, seed=0):
+        self.options = {
+            "sketch_size": sketch_size,
+            "hll_precision": hll_precision,
+            "top_k": top_k,
+        }
+        self.width_sample = width_sample
+        self.rng = np.random.default_rng(seed)
+        self.columns = {}
+        self.n_rows = 0
+
+    def _column(self, name):
+        if name not in self.columns:
+            self.columns[name] = ColumnProfile(name, **self.options)
+        return self.columns[name]
+
+    def update(self, chunk):
+        """Add one DataFrame chunk (same columns as the previous ones)."""
+        for col in chunk.columns:
+            self._column(col).update(chunk[col], self.width_sample, self.rng)
+        self.n_rows += len(chunk)
+        return self
+
+    def merge(self, other):
+        """Fold in the profile of other rows of the same table."""
+        for name, profile in other.columns.items():
+            self._column(name).merge(profile)
+        self.n_rows += other.n_rows
+        return self
+
+    def to_codebook(self, units_dict=None, detailed_labels=None, max_values=20):
+        """
+        Build the codebook from the profiles.
+
+        Parameters
+        ----------
+        units_dict : dict, optional
+            Mapping of column names to unit strings.
+        detailed_labels : dict, optional
+            Mapping of column names to human-readable labels.
+        max_values : int, default 20
+            Nominal columns with more distinct values than this list only
+            the ``max_values`` most frequent ones.
+
+        Returns
+        -------
+        pd.DataFrame
+            Same columns as ``create_codebook``.
+        """
+        units_dict = units_dict or {}
+        detailed_labels = detailed_labels or {}
+        n_rows = self.n_rows
+        rows = []
+        for col, prof in self.columns.items():
+            if prof.scale:
+                stats = _scale_stats(prof, n_rows)
+                values = "Scale data - None"
+                imbalance_warning = "N/A"
+                outlier_warning = "Yes" if stats.pop("OutlierRate") > 5 else "No"
+                if prof.ext_dtype is not None:
+                    # as in create_codebook: the first value as the column holds it
+                    type_ = type(prof.first)
+                    decimals = 2 if prof.ext_dtype == "float64" else 0
+                else:
+                    type_ = type(np.array([prof.first]).astype(prof.dtype)[0])
+                    decimals = 2 if prof.dtype == "float64" else 0
+            else:
+                stats = dict.fromkeys(["Mean", "Min", "Max", "StdDev", "Median"], "N/A")
+                uniques, counts = prof.top.values, prof.top.counts
+                if prof.top.exact:
+                    values = _value_summary(uniques, counts, max_values)
+                else:
+                    n_unique = round(prof.distinct.estimate()) + (prof.missing > 0)
+                    top = np.argsort(-counts, kind="stable")[:max_values]
+                    values = (
+                        ", ".join(str(uniques[i]) for i in top)
+                        + f", ... (~{n_unique:,} unique)"
+                    )
+                present = counts[~np.asarray(pd.isna(uniques))]
+                n_present = prof.rows - prof.missing
+                imbalance_warning = (
+                    "Yes" if len(present) and present.max() / n_present > 0.8 else "No"
+                )
+                outlier_warning = "N/A"
+                type_ = type(prof.first)
+                decimals = 0
+
+            rows.append({
+                "Name": col,
+                "Type": str(type_) if prof.rows else str(prof.dtype),
+                "Width": prof.width,
+                "Decimals": decimals,
+                "Label": detailed_labels.get(col, col),
+                "Values": values,
+                "Missing": prof.missing,
+                "MissingRate": (
+                    f"{round(prof.missing / n_rows * 100, 2) if n_rows else 0.0}%"
+                ),
+                "Align": "Right" if prof.scale else "Left",
+                "Measure": "Scale" if prof.scale else "Nominal",
+                **stats,
+                "Unit": units_dict.get(col, "N/A"),
+                "ImbalanceWarning": imbalance_warning,
+                "OutlierWarning": outlier_warning,
+            })
+        return pd.DataFrame(rows, columns=CODEBOOK_COLUMNS)
+
+
+def _scale_stats(prof, n_rows):
+    """Codebook statistics of a numeric column profile."""
+    if not prof.n:
+        return {"Mean": np.nan, "Min": np.nan, "Max": np.nan, "StdDev": np.nan,
+                "Median": np.nan, "OutlierRate": 0.0}
+    q1, median, q3 = prof.sketch.quantiles([0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    outliers = prof.sketch.count_outside(q1 - 1.5 * iqr, q3 + 1.5 * iqr)
+    std = np.sqrt(prof.m2 / (prof.n - 1)) if prof.n > 1 else np.nan
+    # Min / Max keep the column's own type (Int64 -> int, not 0.0)
+    scalar = (prof.ext_dtype or prof.dtype).type
+    return {
+        "Mean": round(np.float64(prof.mean), 2),
+        "Min": scalar(prof.min),
+        "Max": scalar(prof.max),
+        "StdDev": round(np.float64(std), 2),
+        "Median": median,
+        "OutlierRate": outliers / n_rows * 100,
+    }
+
+
+def iter_chunks(source, chunksize=100_000, columns=None, read_kwargs=None):
+    """
+    Yield DataFrame chunks of a CSV / Parquet file or an in-memory table.
+
+    Parameters
+    ----------
+    source : str, Path, file-like, pd.DataFrame or iterable of pd.DataFrame
+        ``.parquet`` / ``.pq`` files are read by record batch (needs
+        pyarrow), any other path or open file with
+        ``pd.read_csv(chunksize=...)``.
+    chunksize : int, default 100_000
+        Rows per chunk.
+    columns : list, optional
+        Only read these columns.
+    read_kwargs : dict, optional
+        Extra keyword arguments for ``pd.read_csv``.
+    """
+    if isinstance(source, pd.DataFrame):
+        frame = source if columns is None else source[list(columns)]
+        for start in range(0, len(frame), chunksize):
+            yield frame.iloc[start:start + chunksize]
+    elif isinstance(source, (str, Path)) or hasattr(source, "read"):
+        if not hasattr(source, "read") and Path(source).suffix.lower() in (".parquet", ".pq"):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError as exc:
+                raise ImportError("reading Parquet needs pyarrow") from exc
+            batches = pq.ParquetFile(source).iter_batches(
+                batch_size=chunksize, columns=columns
+            )
+            for batch in batches:
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(
+                source, chunksize=chunksize, usecols=columns, **(read_kwargs or {})
+            )
+    else:
+        for chunk in source:
+            yield chunk if columns is None else chunk[list(columns)]
+
+
+def stream_codebook(source, units_dict=None, detailed_labels=None, max_values=20,
+                    chunksize=100_000, columns=None, read_kwargs=None,
+                    sketch_size=4096, top_k=10_000):
+    """
+    Generate a codebook for a table too large to load at once.
+
+    Parameters
+    ----------
+    source : str, Path, file-like, pd.DataFrame or iterable of pd.DataFrame
+        CSV or Parquet file, or chunks (see ``iter_chunks``).
+    units_dict : dict, optional
+        Mapping of column names to unit strings.
+    detailed_labels : dict, optional
+        Mapping of column names to human-readable labels.
+    max_values : int, default 20
+        Nominal columns with more distinct values than this list only the
+        ``max_values`` most frequent ones.
+    chunksize : int, default 100_000
+        Rows read per chunk; memory use is about one chunk plus the sketches.
+    columns : list, optional
+        Only profile these columns.
+    read_kwargs : dict, optional
+        Extra keyword arguments for ``pd.read_csv`` (e.g. ``dtype``).
+    sketch_size, top_k : int
+        Accuracy knobs, see ``StreamingProfile`` and the module docstring.
+
+    Returns
+    -------
+    pd.DataFrame
+        A codebook with the same columns as ``create_codebook``.
+    """
+    profile = StreamingProfile(sketch_size=sketch_size, top_k=top_k)
+    for chunk in iter_chunks(source, chunksize, columns, read_kwargs):
+        profile.update(chunk)
+    return profile.to_codebook(units_dict, detailed_labels, max_values)
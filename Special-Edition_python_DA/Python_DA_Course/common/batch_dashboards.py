@@ -0,0 +1,235 @@
+"""M5 類別儀表板批次輸出。
+
+M5 ``red_category_dashboard(category=...)`` 一次只畫一個類別，每次都重讀 CSV、
+重新篩選、用 pyplot 的全域狀態建圖。週報要輸出每個類別（或每個 地區 × 類別）
+的儀表板時，幾百張圖會排隊在單一核心上跑。本模組的做法：
+
+- 先在主行程把資料一次分組，每張儀表板只需要的小摘要（月營收、地區營收、
+  Top 5 商品、金額陣列）預先算好，送給 worker 的資料量很小
+- worker 只用物件導向的 ``matplotlib.figure.Figure``（Agg / SVG 後端），
+  不碰 pyplot，也不會有圖沒 close 造成的記憶體累積
+- 用 ``ProcessPoolExecutor`` 平行輸出 PNG / SVG，主行程的字型設定
+  （例如 ``setup_chinese_font()``）會帶進每個 worker
+
+版面與 M5 解答相同（2×2：月營收趨勢 / 地區營收 / Top 5 商品 / 金額分佈）。
+
+使用方式：
+    from common.batch_dashboards import render_dashboards
+    paths = render_dashboards(df, "reports/weekly", by=["region", "category"],
+                              formats=("png", "svg"))
+
+    python common/batch_dashboards.py datasets/ecommerce/orders_enriched.csv reports/weekly --by category
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+DASHBOARD_CONFIG = {
+    "figsize": (14, 10),
+    "dpi": 100,
+    "hist_bins": 15,
+    "top_n": 5,
+    # 傳給 worker 的 rcParams（字型等），讓平行輸出與主行程畫出來的圖一致
+    "rc_keys": ("font.family", "font.sans-serif", "axes.unicode_minus"),
+}
+
+
+# ============================================================
+# 預先分組
+# ============================================================
+
+def prepare_groups(df: pd.DataFrame, by: Sequence[str] = ("category",)) -> list[tuple[tuple, dict]]:
+    """依 by 欄位把訂單分組，算好每張儀表板需要的摘要。
+
+    每組的摘要與 M5 解答的寫法相同：
+    ``resample('ME')`` 月營收（組內首月到末月，空月補 0）、
+    ``groupby('region')`` 營收、``groupby('product_name')`` 的前 top_n 名、訂單金額陣列。
+
+    Returns:
+        [(分組值 tuple, 摘要 dict), ...]，依分組值排序。
+    """
+    by = list(by)
+    df = df.dropna(subset=by)
+    amount = df["amount"].to_numpy(dtype=np.float64)
+    months = pd.to_datetime(df["order_date"]).to_numpy(dtype="datetime64[ns]").astype("datetime64[M]")
+    month_codes = months.view(np.int64)
+
+    group_codes, group_keys = _factorize_rows(df, by)
+    order = np.argsort(group_codes, kind="stable")
+    bounds = np.searchsorted(group_codes[order], np.arange(len(group_keys) + 1))
+
+    region = df["region"].to_numpy(dtype=object)
+    product_codes, product_names = pd.factorize(df["product_name"])
+    top_n = DASHBOARD_CONFIG["top_n"]
+
+    groups = []
+    for g, key in enumerate(group_keys):
+        rows = order[bounds[g]:bounds[g + 1]]
+        amt = amount[rows]
+        valid = ~np.isnat(months[rows])
+        m = month_codes[rows][valid]
+        if len(m):
+            lo = m.min()
+            sums = np.bincount(m - lo, weights=np.nan_to_num(amt[valid]))
+            month_index = np.arange(lo, lo + len(sums)).astype("datetime64[M]")
+            month_end = (month_index + 1).astype("datetime64[D]") - 1
+        else:
+            sums, month_end = np.empty(0), np.empty(0, dtype="datetime64[D]")
+
+        by_region = pd.Series(amt).groupby(region[rows]).sum()
+        products = product_codes[rows]
+        ok = products >= 0
+        product_sum = np.bincount(products[ok], weights=np.nan_to_num(amt[ok]), minlength=len(product_names))
+        seen = np.bincount(products[ok], minlength=len(product_names)) > 0
+        top = pd.Series(product_sum[seen], index=product_names[seen]).nlargest(top_n)
+
+        groups.append((key, {
+            "monthly": (month_end, sums),
+            "region": (by_region.index.to_numpy(), by_region.to_numpy()),
+            "top_products": (top.index.to_numpy(), top.to_numpy()),
+            "amount": amt[~np.isnan(amt)],
+        }))
+    return groups
+
+
+def _factorize_rows(df: pd.DataFrame, by: list[str]) -> tuple[np.ndarray, list[tuple]]:
+    """多欄分組 → (每列的組代碼, 依值排序的組鍵)。"""
+    codes = np.zeros(len(df), dtype=np.int64)
+    levels = []
+    for col in by:
+        c, uniques = pd.factorize(df[col], sort=True)
+        codes = codes * len(uniques) + c
+        levels.append(uniques)
+    used, codes = np.unique(codes, return_inverse=True)
+    keys = []
+    for flat in used:
+        key = []
+        for uniques in reversed(levels):
+            flat, i = divmod(int(flat), len(uniques))
+            key.append(uniques[i])
+        keys.append(tuple(reversed(key)))
+    return codes.reshape(-1), keys
+
+
+# ============================================================
+# 繪圖（物件導向 API，不經過 pyplot）
+# ============================================================
+
+def draw_dashboard(summary: dict, label: str):
+    """依 :func:`prepare_groups` 的摘要畫 2×2 儀表板，回傳 ``matplotlib.figure.Figure``。"""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=DASHBOARD_CONFIG["figsize"], dpi=DASHBOARD_CONFIG["dpi"])
+    axes = fig.subplots(2, 2)
+
+    month_end, sums = summary["monthly"]
+    axes[0, 0].plot(month_end.astype("datetime64[ns]"), sums)
+    axes[0, 0].set_title(f"{label} 月營收趨勢")
+
+    regions, region_sum = summary["region"]
+    axes[0, 1].bar(np.arange(len(regions)), region_sum)
+    axes[0, 1].set_xticks(np.arange(len(regions)), [str(r) for r in regions], rotation=90)
+    axes[0, 1].set_title(f"{label} 地區營收")
+
+    names, top_sum = summary["top_products"]
+    axes[1, 0].barh(np.arange(len(names)), top_sum)
+    axes[1, 0].set_yticks(np.arange(len(names)), [str(n) for n in names])
+    axes[1, 0].set_title(f"{label} Top {DASHBOARD_CONFIG['top_n']} 商品")
+
+    axes[1, 1].hist(summary["amount"], bins=DASHBOARD_CONFIG["hist_bins"])
+    axes[1, 1].set_title(f"{label} 金額分佈")
+
+    fig.tight_layout()
+    return fig
+
+
+def _slug(key: tuple) -> str:
+    """分組值 → 檔名（保留中文，去掉路徑不允許的字元）。"""
+    return "__".join(re.sub(r"[^\w.-]+", "_", str(k)).strip("_") or "_" for k in key)
+
+
+def _init_worker(rc: dict) -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    matplotlib.rcParams.update(rc)
+
+
+def _render_one(task: tuple) -> list[str]:
+    import matplotlib
+
+    key, summary, out_dir, formats = task
+    fig = draw_dashboard(summary, " / ".join(str(k) for k in key))
+    paths = []
+    for fmt in formats:
+        path = Path(out_dir) / f"{_slug(key)}.{fmt}"
+        # SVG 預設會寫入產生日期、用隨機 id；固定之後同樣的資料輸出的檔案逐位元相同
+        metadata = {"Date": None} if fmt == "svg" else None
+        with matplotlib.rc_context({"svg.hashsalt": _slug(key)}):
+            fig.savefig(path, format=fmt, metadata=metadata)
+        paths.append(str(path))
+    return paths
+
+
+def render_dashboards(df: pd.DataFrame, out_dir: str | Path, by: Sequence[str] = ("category",),
+                      formats: Sequence[str] = ("png",), jobs: Optional[int] = None) -> dict:
+    """替每個分組輸出一張儀表板。
+
+    Args:
+        df: orders_enriched 格式的訂單。
+        out_dir: 輸出目錄（不存在會建立），檔名為分組值，例如 ``North__Books.png``。
+        by: 分組欄位，例如 ``["category"]`` 或 ``["region", "category"]``。
+        formats: 輸出格式（``png`` / ``svg`` / ``pdf``）。
+        jobs: worker 數，預設為 CPU 核心數；1 表示在主行程依序輸出。
+
+    Returns:
+        {分組值 tuple: [輸出檔路徑, ...]}
+    """
+    import matplotlib
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    groups = prepare_groups(df, by)
+    tasks = [(key, summary, str(out_dir), tuple(formats)) for key, summary in groups]
+    rc = {k: matplotlib.rcParams[k] for k in DASHBOARD_CONFIG["rc_keys"]}
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(tasks) <= 1:
+        # 主行程直接用 Figure 物件畫，不切換使用者（例如 notebook）的後端
+        results = [_render_one(t) for t in tasks]
+    else:
+        # 每個 worker 一次拿幾張，減少行程間往返
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(rc,)) as pool:
+            results = list(pool.map(_render_one, tasks, chunksize=chunksize))
+    return {key: paths for (key, _), paths in zip(groups, results)}
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="批次輸出 M5 類別儀表板")
+    parser.add_argument("src", help="orders_enriched 格式的 CSV")
+    parser.add_argument("out_dir", help="輸出目錄")
+    parser.add_argument("--by", nargs="+", default=["category"], help="分組欄位（預設 category）")
+    parser.add_argument("--format", nargs="+", default=["png"], dest="formats", help="png / svg / pdf")
+    parser.add_argument("--jobs", type=int, default=None, help="worker 數（預設 CPU 核心數）")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    df = pd.read_csv(args.src, parse_dates=["order_date"])
+    paths = render_dashboards(df, args.out_dir, by=args.by, formats=args.formats, jobs=args.jobs)
+    n_files = sum(len(p) for p in paths.values())
+    print(f"[batch_dashboards] {len(paths)} 張儀表板、{n_files} 個檔案 → {args.out_dir}"
+          f"（{time.perf_counter() - t0:.1f}s）")
+
+
+if __name__ == "__main__":
+    main()
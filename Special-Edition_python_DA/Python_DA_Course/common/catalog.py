@@ -0,0 +1,317 @@
+"""記憶體映射（memory-mapped）商品目錄。
+
+S1 / M1 的 ``yellow_expensive_count``、``yellow_top3_stock_indices``、``yellow_restock_cost``
+都是先 ``np.genfromtxt`` 把整份 products.csv 讀進記憶體再運算；商品到上億筆時，
+光讀檔就要好幾分鐘，而且可能根本放不進 RAM。本模組把目錄轉成欄式檔案：
+
+    <store>/
+      meta.json                   列數、各欄型別、來源 CSV 的大小 / 修改時間
+      product_id.npy              數值欄：每欄一個 .npy（np.load(mmap_mode='r') 開啟）
+      category.codes.npy          字串欄：int32 字典代碼
+      category.offsets.npy        字串表：第 i 個字串為 data[offsets[i]:offsets[i+1]]（UTF-8）
+      category.data.bin
+
+- 開啟只讀 meta.json，欄位用到才 memmap，小目錄也是瞬間開好
+- 查詢逐區塊進行（``chunk_size`` 列一塊），常駐記憶體與目錄大小無關：
+  Top-k（每塊用 ``np.partition`` 找門檻、只留 k 個候選）、條件計數、條件加總
+- 字串條件（``category == 'Books'``）先查字典換成代碼，比對的是整數
+
+使用方式：
+    from common.catalog import Catalog, build_catalog
+    catalog = build_catalog("datasets/ecommerce/products.csv", "datasets/ecommerce/products_store")
+    catalog.top_k("stock_qty", 3)                        # = yellow_top3_stock_indices
+    catalog.count("unit_price", ">", 1000)               # = yellow_expensive_count
+    catalog.sum("unit_price", where=("unit_price", "<", 500)) * 50   # = yellow_restock_cost
+"""
+from __future__ import annotations
+
+import json
+import operator
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# products.csv 的欄位型別；"str" 以字典編碼儲存
+PRODUCT_SCHEMA = {
+    "product_id": "int64",
+    "product_name": "str",
+    "category": "str",
+    "unit_price": "float64",
+    "stock_qty": "int64",
+}
+
+CHUNK_SIZE = 1 << 22
+
+_OPS = {
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+    "==": operator.eq, "!=": operator.ne,
+}
+
+
+def _count_rows(path: Path) -> int:
+    """以二進位區塊計算換行數，得到資料列數（不含表頭）。"""
+    n = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(1 << 24)
+            if not block:
+                break
+            n += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        n += 1  # 最後一列沒有換行
+    return max(n - 1, 0)
+
+
+class _StringTable:
+    """建檔時累積字串字典（值 → 代碼）。"""
+
+    def __init__(self):
+        self.codes: dict = {}
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        local, uniques = pd.factorize(values)
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            mapping[i] = self.codes.setdefault(value, len(self.codes))
+        codes = np.full(len(local), -1, dtype=np.int32)  # 缺值代碼 -1
+        ok = local >= 0
+        codes[ok] = mapping[local[ok]]
+        return codes
+
+    def save(self, prefix: Path) -> None:
+        encoded = [str(s).encode("utf-8") for s in self.codes]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        np.save(prefix.with_name(prefix.name + ".offsets.npy"), offsets)
+        prefix.with_name(prefix.name + ".data.bin").write_bytes(b"".join(encoded))
+
+
+def build_catalog(csv_path: str | Path, store_dir: str | Path, schema: Optional[dict] = None,
+                  chunksize: int = 1_000_000, force: bool = False) -> "Catalog":
+    """把 CSV 轉成 memmap 欄式目錄；來源檔沒變（大小、修改時間相同）就直接開啟既有的目錄。
+
+    Args:
+        csv_path: products.csv 格式的 CSV。
+        store_dir: 輸出目錄。
+        schema: 欄名 → 型別（``"int64"`` / ``"float64"`` / ``"str"``），預設 PRODUCT_SCHEMA。
+        chunksize: 每次讀入的列數。
+        force: 無論如何都重建。
+    """
+    csv_path = Path(csv_path)
+    store_dir = Path(store_dir)
+    schema = dict(schema or PRODUCT_SCHEMA)
+    stat = csv_path.stat()
+    source = {"path": str(csv_path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    meta_file = store_dir / "meta.json"
+    if not force and meta_file.exists():
+        meta = json.loads(meta_file.read_text(encoding="utf-8"))
+        if meta.get("source") == source and meta.get("columns") == schema:
+            return Catalog(store_dir)
+
+    store_dir.mkdir(parents=True, exist_ok=True)
+    n = _count_rows(csv_path)
+    arrays, tables = {}, {}
+    for col, dtype in schema.items():
+        if dtype == "str":
+            arrays[col] = np.lib.format.open_memmap(store_dir / f"{col}.codes.npy", mode="w+",
+                                                    dtype=np.int32, shape=(n,))
+            tables[col] = _StringTable()
+        else:
+            arrays[col] = np.lib.format.open_memmap(store_dir / f"{col}.npy", mode="w+",
+                                                    dtype=np.dtype(dtype), shape=(n,))
+
+    read_dtypes = {c: (object if d == "str" else ("float64" if d.startswith("int") else d))
+                   for c, d in schema.items()}
+    start = 0
+    for chunk in pd.read_csv(csv_path, usecols=list(schema), dtype=read_dtypes, chunksize=chunksize):
+        stop = start + len(chunk)
+        for col, dtype in schema.items():
+            if dtype == "str":
+                arrays[col][start:stop] = tables[col].encode(chunk[col])
+            else:
+                values = chunk[col].to_numpy(dtype=np.float64)
+                if dtype.startswith("int") and np.isnan(values).any():
+                    raise ValueError(f"整數欄 {col} 有缺值，請在 schema 改用 float64")
+                arrays[col][start:stop] = values
+        start = stop
+    if start != n:
+        raise ValueError(f"CSV 列數與換行數不符（{start} ≠ {n}），欄位內可能含換行")
+
+    for col, array in arrays.items():
+        array.flush()
+    for col, table in tables.items():
+        table.save(store_dir / col)
+    meta = {"version": 1, "rows": n, "columns": schema, "source": source}
+    meta_file.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    return Catalog(store_dir)
+
+
+class Catalog:
+    """開啟 :func:`build_catalog` 產生的目錄（只讀 meta.json，欄位用到才 memmap）。
+
+    Args:
+        store_dir: 目錄路徑。
+        chunk_size: 查詢時每塊的列數。
+    """
+
+    def __init__(self, store_dir: str | Path, chunk_size: int = CHUNK_SIZE):
+        self.path = Path(store_dir)
+        meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        self.rows: int = meta["rows"]
+        self.schema: dict = meta["columns"]
+        self.chunk_size = chunk_size
+        self._arrays: dict = {}
+        self._strings: dict = {}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __repr__(self) -> str:
+        return f"Catalog({self.path}, {self.rows:,} rows, columns={list(self.schema)})"
+
+    # ---------- 欄位存取 ----------
+
+    def column(self, name: str) -> np.ndarray:
+        """欄位的 memmap（字串欄回傳代碼）。"""
+        if name not in self.schema:
+            raise KeyError(f"沒有欄位 {name!r}，可用欄位：{list(self.schema)}")
+        if name not in self._arrays:
+            file = f"{name}.codes.npy" if self.schema[name] == "str" else f"{name}.npy"
+            # 0 列的 .npy 無法 memmap，直接讀入
+            self._arrays[name] = np.load(self.path / file, mmap_mode="r" if self.rows else None)
+        return self._arrays[name]
+
+    def strings(self, name: str) -> np.ndarray:
+        """字串欄的字典（代碼 → 字串），只在需要時解碼。"""
+        if name not in self._strings:
+            offsets = np.load(self.path / f"{name}.offsets.npy")
+            data = (self.path / f"{name}.data.bin").read_bytes()
+            self._strings[name] = np.array(
+                [data[a:b].decode("utf-8") for a, b in zip(offsets[:-1], offsets[1:])], dtype=object)
+        return self._strings[name]
+
+    def _chunks(self):
+        for start in range(0, self.rows, self.chunk_size):
+            yield start, min(start + self.chunk_size, self.rows)
+
+    # ---------- 條件 ----------
+
+    def _conditions(self, where) -> list[tuple]:
+        """where → [(欄名, 比較函式, 比較值)]；字串欄的值先換成字典代碼。"""
+        if where is None:
+            return []
+        if isinstance(where, tuple):
+            where = [where]
+        out = []
+        for col, op, value in where:
+            if op not in _OPS:
+                raise ValueError(f"不支援的比較 {op!r}，可用：{list(_OPS)}")
+            if self.schema[col] == "str":
+                if op not in ("==", "!="):
+                    raise ValueError(f"字串欄 {col} 只支援 == / !=")
+                hits = np.flatnonzero(self.strings(col) == value)
+                value = int(hits[0]) if len(hits) else -2  # -2：不存在的代碼
+            out.append((col, _OPS[op], value))
+        return out
+
+    def _mask(self, conditions: list[tuple], start: int, stop: int) -> Optional[np.ndarray]:
+        mask = None
+        for col, op, value in conditions:
+            m = op(self.column(col)[start:stop], value)
+            mask = m if mask is None else (mask & m)
+        return mask
+
+    # ---------- 查詢 ----------
+
+    def count(self, column: str, op: str, value, where=None) -> int:
+        """符合 ``column op value``（以及 where）的列數。"""
+        conditions = self._conditions([(column, op, value)] + self._as_list(where))
+        return int(sum(np.count_nonzero(self._mask(conditions, a, b)) for a, b in self._chunks()))
+
+    def sum(self, column: str, where=None) -> float:
+        """column 的加總，可加條件，例如 ``where=("unit_price", "<", 500)``。"""
+        conditions = self._conditions(where)
+        total = 0.0
+        for a, b in self._chunks():
+            values = self.column(column)[a:b]
+            mask = self._mask(conditions, a, b)
+            total += float(values.sum() if mask is None else values[mask].sum())
+        return total
+
+    def where(self, where) -> np.ndarray:
+        """符合條件的列號；``where=None`` 回傳所有列號。"""
+        conditions = self._conditions(where)
+        if not conditions:
+            return np.arange(self.rows, dtype=np.int64)
+        return np.concatenate([np.flatnonzero(self._mask(conditions, a, b)) + a for a, b in self._chunks()]
+                              or [np.empty(0, dtype=np.int64)])
+
+    def top_k(self, column: str, k: int, largest: bool = True, where=None) -> np.ndarray:
+        """前 k 名的列號（由大到小；largest=False 則由小到大）。
+
+        同值時的順序同 ``np.argsort(x, kind='stable')[-k:][::-1]``（列號大的在前），
+        與 M1 ``yellow_top3_stock_indices`` 的解答一致。每塊用 ``np.partition`` 找出門檻、只留 k 個候選，
+        最後只排序各塊候選（k × 塊數）。浮點欄的 NaN 不參與排名；k <= 0 回傳空陣列。
+        """
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        conditions = self._conditions(where)
+        cand_values, cand_index = [], []
+        for a, b in self._chunks():
+            values = np.asarray(self.column(column)[a:b])
+            index = np.arange(a, b)
+            mask = self._mask(conditions, a, b)
+            if values.dtype.kind == "f":
+                valid = ~np.isnan(values)
+                mask = valid if mask is None else (mask & valid)
+            if mask is not None:
+                values, index = values[mask], index[mask]
+            if not largest:
+                # 由小到大時，同值列號小的在前：取負號與反轉列號後沿用「大的優先」
+                values, index = -values, -index
+            keep = _select_k(values, index, k)
+            cand_values.append(values[keep])
+            cand_index.append(index[keep])
+        if not cand_values:
+            return np.empty(0, dtype=np.int64)
+        values = np.concatenate(cand_values)
+        index = np.concatenate(cand_index)
+        order = np.lexsort((index, values))[::-1][:k]
+        result = index[order]
+        return result if largest else -result
+
+    def take(self, index, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """取出指定列（字串欄解碼），index 保留原列號。"""
+        index = np.asarray(index, dtype=np.int64)
+        data = {}
+        for col in columns or self.schema:
+            values = np.asarray(self.column(col)[index])
+            if self.schema[col] == "str":
+                table = np.append(self.strings(col), None)  # -1 → None
+                values = table[values]
+            data[col] = values
+        return pd.DataFrame(data, index=index)
+
+    @staticmethod
+    def _as_list(where) -> list:
+        if where is None:
+            return []
+        return [where] if isinstance(where, tuple) else list(where)
+
+
+def _select_k(values: np.ndarray, index: np.ndarray, k: int) -> np.ndarray:
+    """一塊裡的前 k 名（值大者優先，同值列號大者優先）的位置，不排序。"""
+    n = len(values)
+    if n <= k:
+        return np.arange(n)
+    kth = np.partition(values, n - k)[n - k]
+    above = np.flatnonzero(values > kth)
+    ties = np.flatnonzero(values == kth)
+    need = k - len(above)
+    # 同值的候選取列號最大的 need 個（index 在塊內遞增或遞減，依 index 排序取）
+    ties = ties[np.argsort(index[ties], kind="stable")[-need:]]
+    return np.concatenate([above, ties])
@@ -1,7 +1,26 @@
-"""大地遊戲 — 答對就告訴你解答在哪。"""
+"""大地遊戲 — 答對就告訴你解答在哪。
+
+答案只存「加鹽雜湊」，不存原始答案。除了純量 / 字串，也支援陣列與表格答案：
+
+- ``array``：NumPy 陣列（或 list），雜湊「種類 + shape + 連續記憶體 buffer」，
+  數值一律轉 float64 並四捨五入到小數 ``_FLOAT_DECIMALS`` 位，int / float 算出來的答案視為相同；
+  字串 / object 陣列另外雜湊缺值遮罩，``None`` 與字串 ``"None"`` 不同
+- ``frame``：DataFrame / Series，欄名 + 每欄 ``pd.util.hash_pandas_object`` 的結果；
+  非預設的 index（例如 groupby 的鍵）也算在答案裡（內容是 0..n-1 的 index 都算預設）。
+  數值欄同樣先四捨五入到 ``_FLOAT_DECIMALS`` 位，字串 / 類別 / 日期欄原樣雜湊
+  （object 與 category 存同樣的字串視為相同）
+
+注意：浮點數是「四捨五入後完全相等」才算對，不是 ±0.005 的容許誤差。
+剛好落在進位邊界上的值（例如 0.125 ± 1e-9）會分別變成 0.13 與 0.12，視為不同答案；
+出題時請避開這種答案，或先在題目裡要求學生自己 ``round``。
+
+不經過 ``str()``，百萬筆的答案也只要一次 buffer 雜湊。新增關卡時用 :func:`make_entry` 產生 ``_ANSWERS`` 的一列。
+"""
 from __future__ import annotations
 
 import hashlib
+import secrets
+from typing import Optional
 
 # (salt, sha256_hash, answer_type)
 # 原始答案：S1=27153.1, S2=188, S3=Books, S4=186506, S5=North
@@ -14,10 +33,63 @@ _ANSWERS: dict[str, tuple[str, str, str]] = {
 }
 
 
+# 陣列 / 表格答案的浮點數比對精度（小數位數）
+_FLOAT_DECIMALS = 2
+
+
 def _hash(value: str, salt: str) -> str:
     return hashlib.sha256(f"{salt}:{value}".encode()).hexdigest()
 
 
+def _canon_array(answer) -> str:
+    """陣列 → 「種類|shape|buffer 雜湊」。"""
+    import numpy as np
+
+    arr = np.asarray(answer)
+    missing = b""  # 只有字串 / object 陣列有缺值遮罩
+    if arr.dtype.kind == "b":
+        kind, data = "b", arr.astype(np.bool_)
+    elif arr.dtype.kind in "iuf":
+        # +0.0 把 -0.0 統一成 0.0；NaN 的位元樣式不只一種，統一成 np.nan
+        data = np.round(arr.astype(np.float64), _FLOAT_DECIMALS) + 0.0
+        data[np.isnan(data)] = np.nan
+        kind = "f"
+    else:
+        kind = "U"
+        flat = arr.ravel()
+        data = np.frombuffer("\x1f".join(map(str, flat)).encode(), dtype=np.uint8)
+        # 缺值另外記一份遮罩，None / NaN 才不會和字串 "None" / "nan" 算成同一個答案
+        is_missing = np.zeros(len(flat), dtype=bool)
+        if arr.dtype == object:
+            is_missing = np.frompyfunc(lambda x: x is None or (isinstance(x, float) and x != x), 1, 1)(flat)
+        missing = np.packbits(is_missing.astype(bool)).tobytes()
+    digest = hashlib.sha256(np.ascontiguousarray(data).tobytes() + b"\x00" + missing).hexdigest()
+    return f"{kind}|{arr.shape}|{digest}"
+
+
+def _canon_frame(answer) -> str:
+    """DataFrame / Series → 欄名與每欄 hash_pandas_object 結果的雜湊。"""
+    import numpy as np
+    import pandas as pd
+
+    # Series 的名稱不算答案（value_counts / groupby 取出來的名稱常常不同）
+    frame = answer.to_frame("__value__") if isinstance(answer, pd.Series) else pd.DataFrame(answer)
+    # Index([0, 1, ..., n-1]) 與 RangeIndex 視為相同（都是預設 index）
+    if not frame.index.equals(pd.RangeIndex(len(frame))):
+        frame = frame.reset_index()  # index 各層變成前面的欄位
+
+    h = hashlib.sha256(f"{frame.shape}".encode())
+    for i, name in enumerate(frame.columns):
+        col = frame.iloc[:, i]
+        name = str(name)
+        if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+            # 只有數值欄要正規化；字串 / 類別 / 日期欄直接交給 hash_pandas_object
+            col = pd.Series(col.to_numpy(dtype=np.float64, na_value=np.nan)).round(_FLOAT_DECIMALS) + 0.0
+        h.update(name.encode() + b"\x00")
+        h.update(pd.util.hash_pandas_object(col.reset_index(drop=True), index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
 def _canon(answer, atype: str) -> str:
     if atype == "scalar_float":
         return f"{float(answer):.1f}"
@@ -27,22 +99,60 @@ def _canon(answer, atype: str) -> str:
         if hasattr(answer, "__iter__") and not isinstance(answer, str):
             return str(tuple(int(x) for x in answer))
         return str(answer).strip()
+    if atype == "array":
+        return _canon_array(answer)
+    if atype == "frame":
+        return _canon_frame(answer)
     return str(answer).strip()
 
 
+def make_entry(answer, atype: str, salt: Optional[str] = None) -> tuple[str, str, str]:
+    """產生 ``_ANSWERS`` 的一列 (salt, hash, answer_type)，新增關卡時用。
+
+    ``array`` / ``frame`` 答案的數值會先四捨五入到小數 ``_FLOAT_DECIMALS`` 位再雜湊，
+    學生的答案四捨五入後要完全相同才算對（進位邊界附近的值見模組說明）。
+    """
+    salt = salt or secrets.token_hex(8)
+    return salt, _hash(_canon(answer, atype), salt), atype
+
+
+def _verify(session: str, answer) -> Optional[bool]:
+    """對答案；未知的關卡回傳 None。"""
+    entry = _ANSWERS.get(session.upper())
+    if entry is None:
+        return None
+    salt, expected, atype = entry
+    try:
+        canonical = _canon(answer, atype)
+    except (TypeError, ValueError):
+        return False  # 型態不對（例如 scalar 關卡交了字串），當作答錯
+    return _hash(canonical, salt) == expected
+
+
 def check(session: str, answer) -> None:
     """答對就告訴你解答放在哪。"""
     session = session.upper()
-    if session not in _ANSWERS:
+    ok = _verify(session, answer)
+    if ok is None:
         print(f"❓ 未知的關卡: {session}")
-        return
-
-    salt, expected, atype = _ANSWERS[session]
-    canonical = _canon(answer, atype)
-
-    if _hash(canonical, salt) == expected:
+    elif ok:
         n = session.replace("S", "")
         path = f"docs/_archive/S{n}_ref.ipynb"
         print(f"🎉 答對了！解答在這裡 → 📂 {path}")
     else:
         print("❌ 再想想，答案不對喔！")
+
+
+def check_many(answers: dict) -> dict[str, Optional[bool]]:
+    """一次對整張關卡表，例如 ``check_many({"S1": total, "S3": top_category})``。
+
+    Returns:
+        {關卡: True / False / None（未知的關卡）}
+    """
+    results = {session.upper(): _verify(session, answer) for session, answer in answers.items()}
+    for session, ok in results.items():
+        mark = "❓ 未知的關卡" if ok is None else ("🎉 答對" if ok else "❌ 答錯")
+        print(f"{session}: {mark}")
+    correct = sum(ok is True for ok in results.values())
+    print(f"共 {len(results)} 關，答對 {correct} 關")
+    return results
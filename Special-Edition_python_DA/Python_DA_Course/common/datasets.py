@@ -0,0 +1,236 @@
+"""課程資料集載入器（CSV + Feather 欄式鏡像）。
+
+notebook、作業與測試都用 ``pd.read_csv`` 讀同一批 CSV，每次都重新解析文字、
+重新 ``parse_dates=['order_date']``。本模組以「名稱」登記每份資料集的路徑與讀取選項，
+第一次載入時照常讀 CSV，同時在旁邊的 ``.mirror/`` 留一份 Feather（Arrow IPC）鏡像：
+
+    datasets/ecommerce/
+      orders_enriched.csv
+      .mirror/orders_enriched.feather     型別、日期都已解析好的欄式檔
+      .mirror/orders_enriched.json        來源 CSV 的 sha256 / 大小 / 修改時間、讀取選項
+
+- 之後的載入直接讀鏡像；CSV 的大小或修改時間變了才重算 sha256，內容真的變了才重建
+- 登記的讀取選項（``parse_dates`` 等）改了也會重建
+- 沒裝 pyarrow、或資料夾不可寫入時退回 ``pd.read_csv``，得到的 DataFrame 完全相同
+
+使用方式：
+    from common.datasets import load_dataset
+    df = load_dataset("ecommerce/orders_enriched")      # = pd.read_csv(..., parse_dates=[...])
+    titanic = load_dataset("titanic", columns=["Survived", "Sex", "Age"])
+
+    python common/datasets.py                 # 列出資料集並預先建好所有鏡像
+    python common/datasets.py --refresh titanic
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # 沒有 pyarrow：一律讀 CSV
+    feather = None
+
+_COURSE_ROOT = Path(__file__).resolve().parent.parent
+_REPO_ROOT = _COURSE_ROOT.parent.parent
+
+_ECOMMERCE = _COURSE_ROOT / "datasets" / "ecommerce"
+_PANDAS_DATA = _REPO_ROOT / "Classic-Edition_python_DA" / "pandas" / "data"
+_CAR_DATA = _REPO_ROOT / "Classic-Edition_python_DA" / "data_vis" / "project" / "car_data"
+_INFERENTIAL = _REPO_ROOT / "Master-Advance" / "competition" / "Inferential_Statistics" / "datasets"
+
+_CAR_FILES = ("audi", "bmw", "cclass", "focus", "ford", "hyundi", "merc", "skoda", "toyota",
+              "vauxhall", "vw", "unclean cclass", "unclean focus")
+
+# 名稱 → CSV 路徑與 pd.read_csv 選項（選項是鏡像鍵的一部分，改了就重建）
+DATASETS: dict[str, dict] = {
+    # orders_raw 是 S2 清理練習的髒資料：刻意原樣讀入，不轉型別
+    "ecommerce/orders_raw": {"path": _ECOMMERCE / "orders_raw.csv", "read": {}},
+    "ecommerce/orders_clean": {"path": _ECOMMERCE / "orders_clean.csv",
+                               "read": {"parse_dates": ["order_date"]}},
+    "ecommerce/orders_enriched": {"path": _ECOMMERCE / "orders_enriched.csv",
+                                  "read": {"parse_dates": ["order_date", "signup_date"]}},
+    "ecommerce/customers": {"path": _ECOMMERCE / "customers.csv", "read": {"parse_dates": ["signup_date"]}},
+    "ecommerce/products": {"path": _ECOMMERCE / "products.csv", "read": {}},
+    "ecommerce/monthly_revenue": {"path": _ECOMMERCE / "monthly_revenue.csv", "read": {}},
+    "titanic": {"path": _PANDAS_DATA / "titanic.csv", "read": {}},
+    "air_quality": {"path": _PANDAS_DATA / "air-quality.csv", "read": {"parse_dates": ["Date"]}},
+    "pima_diabetes": {"path": _PANDAS_DATA / "pima-indians-diabetes.csv", "read": {}},
+    "inferential/ecommerce_orders": {"path": _INFERENTIAL / "ecommerce_orders.csv", "read": {}},
+    "inferential/titanic_train": {"path": _INFERENTIAL / "titanic_train.csv", "read": {}},
+}
+DATASETS.update({f"car_data/{name}": {"path": _CAR_DATA / f"{name}.csv", "read": {}} for name in _CAR_FILES})
+
+MIRROR_DIR = ".mirror"
+_MIRROR_VERSION = 1
+_HASH_BLOCK = 1 << 24
+
+
+def list_datasets() -> list[str]:
+    """已登記的資料集名稱（依名稱排序）。"""
+    return sorted(DATASETS)
+
+
+def dataset_path(name: str) -> Path:
+    """資料集 CSV 的路徑。
+
+    Raises:
+        KeyError: 沒有這個名稱。
+    """
+    return Path(_spec(name)["path"])
+
+
+def _spec(name: str) -> dict:
+    try:
+        return DATASETS[name]
+    except KeyError:
+        raise KeyError(f"沒有資料集 {name!r}，可用：{', '.join(list_datasets())}") from None
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(_HASH_BLOCK)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _mirror_files(csv_path: Path) -> tuple[Path, Path]:
+    """CSV 對應的鏡像檔與 metadata 檔。"""
+    mirror = csv_path.parent / MIRROR_DIR
+    return mirror / f"{csv_path.stem}.feather", mirror / f"{csv_path.stem}.json"
+
+
+def _read_meta(meta_file: Path) -> dict:
+    try:
+        meta = json.loads(meta_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return meta if isinstance(meta, dict) and meta.get("version") == _MIRROR_VERSION else {}
+
+
+def _write_atomic(path: Path, write) -> None:
+    """先寫暫存檔再 ``os.replace``，讀的一方不會看到寫到一半的檔案。"""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _select(df: pd.DataFrame, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    return df if columns is None else df[list(columns)]
+
+
+def _read_mirror(data_file: Path, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    df = pd.read_feather(data_file, columns=None if columns is None else list(columns))
+    for col in df.columns[df.dtypes == object]:
+        if df[col].hasnans:  # Arrow 的字串缺值讀回來是 None，換回 read_csv 的 NaN
+            df[col] = df[col].fillna(np.nan)
+    return _select(df, columns)
+
+
+def mirror_status(name: str) -> str:
+    """鏡像狀態：``"fresh"``（可直接讀）、``"stale"``（CSV 或讀取選項變了）、``"missing"``、``"unavailable"``（沒有 pyarrow）。
+
+    只比對大小與修改時間，不重算雜湊；``load_dataset`` 遇到 stale 時才會用 sha256 確認內容是否真的變了。
+    """
+    if feather is None:
+        return "unavailable"
+    spec = _spec(name)
+    data_file, meta_file = _mirror_files(Path(spec["path"]))
+    meta = _read_meta(meta_file)
+    if not meta or not data_file.exists():
+        return "missing"
+    stat = Path(spec["path"]).stat()
+    source = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    fresh = meta.get("read") == spec["read"] and {k: meta.get(k) for k in source} == source
+    return "fresh" if fresh else "stale"
+
+
+def load_dataset(name: str, columns: Optional[Sequence[str]] = None, mirror: bool = True,
+                 refresh: bool = False) -> pd.DataFrame:
+    """依名稱載入資料集，結果等同以登記的選項 ``pd.read_csv``。
+
+    Args:
+        name: 資料集名稱，例如 ``"ecommerce/orders_enriched"``（見 :func:`list_datasets`）。
+        columns: 只取這些欄（依給定順序）；鏡像只讀需要的欄。
+        mirror: False 時一律讀 CSV，不讀也不寫鏡像。
+        refresh: 無論鏡像是否有效都重讀 CSV 並重建鏡像。
+
+    Returns:
+        DataFrame（預設 RangeIndex）。
+    """
+    spec = _spec(name)
+    csv_path = Path(spec["path"])
+    options = spec["read"]
+    if not mirror or feather is None:
+        if columns is not None:
+            keep = set(columns)
+            options = {**options, "usecols": list(columns),
+                       "parse_dates": [c for c in options.get("parse_dates", []) if c in keep]}
+        return _select(pd.read_csv(csv_path, **options), columns)
+
+    data_file, meta_file = _mirror_files(csv_path)
+    stat = csv_path.stat()
+    source = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    meta = _read_meta(meta_file)
+    if not refresh and meta.get("read") == options and data_file.exists():
+        if {k: meta.get(k) for k in source} == source:
+            return _read_mirror(data_file, columns)
+        sha256 = _file_sha256(csv_path)
+        if meta.get("sha256") == sha256:  # 只是 touch / git checkout：內容沒變，更新時間戳即可
+            try:
+                _write_atomic(meta_file, lambda p: p.write_text(
+                    json.dumps({**meta, **source}, ensure_ascii=False, indent=2), encoding="utf-8"))
+            except OSError:
+                pass
+            return _read_mirror(data_file, columns)
+    else:
+        sha256 = _file_sha256(csv_path)
+
+    df = pd.read_csv(csv_path, **options)
+    meta = {"version": _MIRROR_VERSION, "source": csv_path.name, "sha256": sha256, **source,
+            "read": options, "rows": len(df)}
+    try:
+        data_file.parent.mkdir(exist_ok=True)
+        _write_atomic(data_file, lambda p: df.to_feather(p))
+        _write_atomic(meta_file, lambda p: p.write_text(
+            json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8"))
+    except OSError:
+        pass  # 唯讀的資料夾：這次沒有鏡像，下次照樣讀 CSV
+    return _select(df, columns)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="建立 / 檢查課程資料集的 Feather 鏡像")
+    parser.add_argument("names", nargs="*", help="資料集名稱；省略則處理全部")
+    parser.add_argument("--refresh", action="store_true", help="強制重建鏡像")
+    args = parser.parse_args(argv)
+
+    if feather is None:
+        print("[datasets] 沒有安裝 pyarrow，load_dataset 會直接讀 CSV")
+        return 1
+    for name in args.names or list_datasets():
+        if not dataset_path(name).exists():
+            print(f"[datasets] {name:<30} 找不到 {dataset_path(name)}")
+            continue
+        before = mirror_status(name)
+        df = load_dataset(name, refresh=args.refresh)
+        print(f"[datasets] {name:<30} {before:>8} → fresh  {df.shape[0]:>8,} 列 × {df.shape[1]} 欄")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
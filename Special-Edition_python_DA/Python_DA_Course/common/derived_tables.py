@@ -0,0 +1,393 @@
+"""電商衍生資料表的建置 DAG（內容雜湊、增量重建）。
+
+``orders_clean.csv``、``orders_enriched.csv``、``monthly_revenue.csv`` 都是由
+``orders_raw.csv``、``customers.csv``、``products.csv`` 算出來的（S2 / S3 / S4 notebook 的存檔步驟），
+卻同時 check in 在 Python_DA_Course/datasets 與 homework-template/datasets 兩處，沒有東西負責重新產生。
+本模組把這幾步寫成 DAG：
+
+    orders_raw ──clean──▶ orders_clean ──enrich──▶ orders_enriched
+                              │            ▲    ▲
+                              │      customers  products
+                              └──monthly──▶ monthly_revenue
+
+- 節點的快取鍵 = sha256(節點名稱、轉換函式與所用 common 模組的原始碼、pandas / pyarrow 版本、
+  每個輸入檔的內容 sha256)
+- 輸出以內容 sha256 存進兩棵樹共用的 artifact store，同樣的輸入只算一次：
+
+    Special-Edition_python_DA/.build_store/
+      objects/ab/<sha256>       輸出檔內容（唯讀）
+      actions/<key>.json        快取鍵 → 輸出 sha256
+      hashes.json               路徑 + 大小 + 修改時間 → sha256，沒變的大檔不重讀
+
+- 只重跑輸入內容真的變了的節點；輸出沒變時下游直接命中（early cutoff），
+  例如只改 customers.csv 只會重跑 enrich
+- monthly 直接由 orders_clean 計算（left join 不增減列，結果與 S4 由 orders_enriched 算的相同），
+  因此與 enrich 是互不相依的分支，以多行程平行執行
+- 每個節點都逐區塊讀取；clean 沿用 :mod:`common.orders_pipeline` 的串流清理，
+  為了 qty 的全體中位數多讀一遍原始檔
+- 在課堂資料上，三個輸出與 repo 內的檔案逐位元相同
+
+使用方式：
+    from common.derived_tables import build
+    build()                                        # 兩棵樹都建，回傳每個節點的狀態
+
+    python -m common.derived_tables                # 同上（在 Python_DA_Course/ 下執行）
+    python -m common.derived_tables --tree course --jobs 2
+    python -m common.derived_tables --dry-run      # 只列出會重建哪些節點
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+
+from common import orders_pipeline, star_join
+from common.orders_pipeline import iter_clean_chunks
+from common.star_join import build_star
+
+_COURSE_ROOT = Path(__file__).resolve().parent.parent
+_EDITION_ROOT = _COURSE_ROOT.parent
+
+BUILD_CONFIG = {
+    "store": _EDITION_ROOT / ".build_store",
+    "jobs": None,            # None = min(節點數, CPU 核心數)；1 = 在目前行程依序執行
+    "chunksize": 1_000_000,  # enrich / monthly 每次讀入的列數
+}
+
+# 每棵樹要同步的輸出檔（homework-template 沒有 monthly_revenue.csv）
+TREES: dict[str, dict] = {
+    "course": {"path": _COURSE_ROOT / "datasets" / "ecommerce",
+               "targets": ("orders_clean.csv", "orders_enriched.csv", "monthly_revenue.csv")},
+    "homework": {"path": _EDITION_ROOT / "homework-template" / "datasets" / "ecommerce",
+                 "targets": ("orders_clean.csv", "orders_enriched.csv")},
+}
+
+_STORE_VERSION = 1
+_HASH_BLOCK = 1 << 24
+
+
+# ============================================================
+# 轉換（每個節點一個函式：輸入檔路徑 → 寫出一個 CSV）
+# ============================================================
+
+def clean_orders(inputs: Sequence[Path], output: Path, chunksize: int) -> None:
+    """S2 的清理步驟，以 :mod:`common.orders_pipeline` 串流處理。
+
+    qty 要用全體中位數補值，所以讀兩遍：第一遍只收 qty 算中位數，
+    第二遍補值、去重後逐區塊寫出（與 S2 相同，先補值再去重）。
+    """
+    (raw,) = inputs
+    qty = [t.column("qty") for t in iter_clean_chunks(raw, dedupe=False)]
+    median = pa.chunked_array(qty, type=pa.float64()).to_pandas().median()
+    first = True
+    for table in iter_clean_chunks(raw, fill={"qty": median}):
+        table.to_pandas().to_csv(output, mode="w" if first else "a", header=first, index=False)
+        first = False
+    if first:  # 全部被清掉：只寫表頭
+        names = [name.strip().lower() for name in pd.read_csv(raw, nrows=0).columns]
+        pd.DataFrame(columns=names).to_csv(output, index=False)
+
+
+def enrich_orders(inputs: Sequence[Path], output: Path, chunksize: int) -> None:
+    """S3 的三表 left join，以 :mod:`common.star_join` 逐區塊處理。"""
+    orders, customers, products = inputs
+    star = build_star(pd.read_csv(customers), pd.read_csv(products))
+    first = True
+    for chunk in star.enrich_chunks(pd.read_csv(orders, chunksize=chunksize)):
+        chunk.to_csv(output, mode="w" if first else "a", header=first, index=False)
+        first = False
+    if first:  # 沒有任何訂單：只寫表頭
+        star.enrich(pd.read_csv(orders, nrows=0)).to_csv(output, index=False)
+
+
+def monthly_revenue(inputs: Sequence[Path], output: Path, chunksize: int) -> None:
+    """S4 的月營收：``groupby(order_date 的月份)['amount'].sum()``，逐區塊累加。"""
+    (orders,) = inputs
+    total = pd.Series(dtype="float64", index=pd.PeriodIndex([], freq="M", name="year_mon"))
+    for chunk in pd.read_csv(orders, usecols=["order_date", "amount"], parse_dates=["order_date"],
+                             chunksize=chunksize):
+        month = chunk["order_date"].dt.to_period("M").rename("year_mon")
+        part = chunk.groupby(month)["amount"].sum()
+        total = part if total.empty else total.add(part, fill_value=0)
+    total.sort_index().to_csv(output, header=["amount"])
+
+
+class Node(NamedTuple):
+    """DAG 節點：由 ``inputs`` 幾個檔案算出 ``output``。"""
+
+    name: str
+    inputs: tuple
+    output: str
+    func: Callable
+    helpers: tuple = ()  # 轉換用到的 common 模組，原始碼一併算進快取鍵
+
+
+NODES: tuple = (
+    Node("clean", ("orders_raw.csv",), "orders_clean.csv", clean_orders, (orders_pipeline,)),
+    Node("enrich", ("orders_clean.csv", "customers.csv", "products.csv"), "orders_enriched.csv", enrich_orders,
+         (star_join,)),
+    Node("monthly", ("orders_clean.csv",), "monthly_revenue.csv", monthly_revenue),
+)
+
+
+def _node(name: str) -> Node:
+    return next(node for node in NODES if node.name == name)
+
+
+def _run_node(name: str, inputs: list, output: str, chunksize: int) -> float:
+    """在 worker 行程執行一個節點，回傳耗時（秒）。"""
+    start = time.perf_counter()
+    _node(name).func([Path(p) for p in inputs], Path(output), chunksize)
+    return time.perf_counter() - start
+
+
+def _required_nodes(targets: Sequence[str]) -> list[Node]:
+    """產生 targets 需要的節點（含上游），依 NODES 順序。"""
+    producers = {node.output: node for node in NODES}
+    needed, stack = set(), list(targets)
+    while stack:
+        node = producers.get(stack.pop())
+        if node is not None and node.name not in needed:
+            needed.add(node.name)
+            stack.extend(node.inputs)
+    return [node for node in NODES if node.name in needed]
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(_HASH_BLOCK)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def action_key(node: Node, input_hashes: Sequence[str]) -> str:
+    """節點快取鍵：節點名稱、轉換函式與 helper 模組的原始碼、pandas / pyarrow 版本、輸入內容雜湊。"""
+    code = hashlib.sha256(inspect.getsource(node.func).encode("utf-8"))
+    for module in node.helpers:
+        code.update(inspect.getsource(module).encode("utf-8"))
+    payload = {"version": _STORE_VERSION, "node": node.name, "code": code.hexdigest(),
+               "libs": [pd.__version__, pa.__version__], "inputs": list(input_hashes)}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# 內容定址的 artifact store
+# ============================================================
+
+class ArtifactStore:
+    """兩棵樹共用的內容定址儲存區。
+
+    Args:
+        root: 儲存區目錄，不存在會自動建立。
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._hashes_file = self.root / "hashes.json"
+        try:
+            self._hashes: dict = json.loads(self._hashes_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._hashes = {}
+
+    def object_path(self, sha: str) -> Path:
+        return self.root / "objects" / sha[:2] / sha
+
+    def tmp_path(self, key: str) -> Path:
+        return self.root / "tmp" / f"{key}.{os.getpid()}.tmp"
+
+    def file_hash(self, path: Path) -> Optional[str]:
+        """檔案內容的 sha256；大小與修改時間沒變就用記下的值。檔案不存在回傳 None。"""
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        entry = [stat.st_size, stat.st_mtime_ns]
+        cached = self._hashes.get(str(path.resolve()))
+        if cached and cached[:2] == entry:
+            return cached[2]
+        sha = _sha256_file(path)
+        self._hashes[str(path.resolve())] = entry + [sha]
+        return sha
+
+    def lookup(self, key: str) -> Optional[str]:
+        """快取鍵對應的輸出 sha256；沒有紀錄或物件已被刪除回傳 None。"""
+        try:
+            action = json.loads((self.root / "actions" / f"{key}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        sha = action.get("output")
+        return sha if sha and self.object_path(sha).exists() else None
+
+    def put(self, tmp: Path, key: str, node: Node, input_hashes: Sequence[str]) -> str:
+        """把節點剛寫好的暫存輸出收進 objects/，並記下快取鍵。"""
+        sha = _sha256_file(tmp)
+        dest = self.object_path(sha)
+        if dest.exists():
+            tmp.unlink()
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.chmod(tmp, 0o444)
+            os.replace(tmp, dest)
+        action = {"node": node.name, "inputs": dict(zip(node.inputs, input_hashes)), "output": sha}
+        self._write_json(self.root / "actions" / f"{key}.json", action)
+        return sha
+
+    def materialize(self, sha: str, dest: Path) -> bool:
+        """讓 dest 的內容等於物件 sha；已經相同就不動，回傳是否有複製。"""
+        if self.file_hash(dest) == sha:
+            return False
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        shutil.copyfile(self.object_path(sha), tmp)  # 複製而非 hard link：notebook 會原地覆寫這些檔
+        os.replace(tmp, dest)
+        stat = dest.stat()
+        self._hashes[str(dest.resolve())] = [stat.st_size, stat.st_mtime_ns, sha]
+        return True
+
+    def save(self) -> None:
+        self._write_json(self._hashes_file, self._hashes)
+
+    @staticmethod
+    def _write_json(path: Path, data: dict) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+# ============================================================
+# 建置
+# ============================================================
+
+def build(trees: Optional[dict | Sequence[str]] = None, store: Optional[str | Path] = None,
+          jobs: Optional[int] = None, force: bool = False, dry_run: bool = False,
+          chunksize: Optional[int] = None) -> list[dict]:
+    """依內容雜湊增量建置衍生資料表，並同步到各棵樹。
+
+    Args:
+        trees: 樹名稱（``TREES`` 的鍵）的 list，或 ``{名稱: {"path": ..., "targets": (...)}}``；預設全部。
+        store: artifact store 目錄，預設 ``BUILD_CONFIG["store"]``。
+        jobs: 平行的 worker 行程數；1 表示在目前行程依序執行。
+        force: 忽略快取，重跑所有需要的節點。
+        dry_run: 只判斷哪些節點會重建，不執行也不寫入任何檔案。
+        chunksize: enrich / monthly 每次讀入的列數。
+
+    Returns:
+        每棵樹每個節點一筆：``tree``、``node``、``status``、``sha256``、``seconds``。
+        status：``built``（這次執行）、``cached``（store 命中，已複製到樹裡）、
+        ``fresh``（樹裡的檔案已是最新）、``stale``（dry-run：需要重建）。
+
+    Raises:
+        FileNotFoundError: 樹裡缺少原始輸入檔。
+    """
+    if trees is None:
+        trees = dict(TREES)
+    elif not isinstance(trees, dict):
+        trees = {name: TREES[name] for name in trees}
+    store = ArtifactStore(store or BUILD_CONFIG["store"])
+    chunksize = chunksize or BUILD_CONFIG["chunksize"]
+    outputs = {node.output for node in NODES}
+
+    known: dict = {}      # 樹 → {檔名: sha256}
+    pending: list = []    # 尚未決定的 (樹, 節點)
+    for tree, spec in trees.items():
+        root = Path(spec["path"])
+        nodes = _required_nodes(spec["targets"])
+        known[tree] = {}
+        for name in {i for node in nodes for i in node.inputs} - outputs:
+            sha = store.file_hash(root / name)
+            if sha is None:
+                raise FileNotFoundError(f"[derived] {tree}: 找不到原始資料 {root / name}")
+            known[tree][name] = sha
+        pending += [(tree, node) for node in nodes]
+
+    results: list = []
+
+    def finish(tree: str, node: Node, sha: str, status: str, seconds: float = 0.0) -> None:
+        known[tree][node.output] = sha
+        spec = trees[tree]
+        if not dry_run and node.output in spec["targets"]:
+            copied = store.materialize(sha, Path(spec["path"]) / node.output)
+            if status == "cached" and not copied:
+                status = "fresh"
+        results.append({"tree": tree, "node": node.name, "status": status, "sha256": sha,
+                        "seconds": round(seconds, 3)})
+
+    jobs = jobs or BUILD_CONFIG["jobs"] or min(len(pending), os.cpu_count() or 1)
+    running: dict = {}    # future → (key, tmp, [(樹, 節點, 輸入雜湊)])
+    by_key: dict = {}     # key → future
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 and not dry_run else ThreadPoolExecutor(1)
+    try:
+        while pending or running:
+            ready = [t for t in pending if all(i in known[t[0]] for i in t[1].inputs)]
+            for tree, node in ready:
+                pending.remove((tree, node))
+                hashes = [known[tree][i] for i in node.inputs]
+                key = action_key(node, hashes)
+                sha = None if force else store.lookup(key)
+                if sha is not None:
+                    finish(tree, node, sha, "cached")
+                elif key in by_key:  # 另一棵樹已經在算同一份
+                    running[by_key[key]][2].append((tree, node, hashes))
+                elif dry_run:
+                    finish(tree, node, f"stale:{key}", "stale")
+                else:
+                    paths = [Path(trees[tree]["path"]) / i if i not in outputs else store.object_path(h)
+                             for i, h in zip(node.inputs, hashes)]
+                    tmp = store.tmp_path(key)
+                    tmp.parent.mkdir(parents=True, exist_ok=True)
+                    future = executor.submit(_run_node, node.name, [str(p) for p in paths], str(tmp), chunksize)
+                    running[future] = (key, tmp, [(tree, node, hashes)])
+                    by_key[key] = future
+            if not running:
+                if pending and not ready:
+                    raise RuntimeError(f"[derived] DAG 有無法滿足的輸入：{[(t, n.name) for t, n in pending]}")
+                continue  # 這一輪全部命中快取，下游可能已經就緒
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                key, tmp, waiters = running.pop(future)
+                del by_key[key]
+                seconds = future.result()
+                sha = store.put(tmp, key, waiters[0][1], waiters[0][2])
+                for tree, node, _ in waiters:
+                    finish(tree, node, sha, "built", seconds)
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if not dry_run:
+            store.save()
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="增量建置 orders_clean / orders_enriched / monthly_revenue")
+    parser.add_argument("--tree", action="append", choices=sorted(TREES), help="只建這棵樹（可重複）；預設全部")
+    parser.add_argument("--store", default=None, help=f"artifact store 目錄（預設 {BUILD_CONFIG['store']}）")
+    parser.add_argument("--jobs", type=int, default=None, help="平行 worker 數")
+    parser.add_argument("--force", action="store_true", help="忽略快取，全部重跑")
+    parser.add_argument("--dry-run", action="store_true", help="只列出需要重建的節點")
+    args = parser.parse_args(argv)
+
+    results = build(args.tree, store=args.store, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    for r in results:
+        sha = "-" if r["status"] == "stale" else r["sha256"][:12]
+        print(f"[derived] {r['tree']:<9} {r['node']:<8} {r['status']:<7} {sha:<12} {r['seconds']:.2f}s")
+    built = sum(r["status"] == "built" for r in results)
+    print(f"[derived] 共 {len(results)} 個節點，重建 {built} 個")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,14 +3,24 @@
 本模組提供統一介面，自動偵測作業系統並為 matplotlib 與 plotly 設定
 可用的繁體中文字型，避免圖表出現「豆腐字」（□□□）。
 
+字型偵測要載入 matplotlib 的 fontManager、列出所有已安裝字型，是每本 notebook
+第一格最慢的部分。偵測結果會存進快取檔（依平台、matplotlib 版本、字型目錄的
+修改時間為鍵），之後每次重開 kernel 都直接讀檔，不再掃描字型；
+matplotlib 與 plotly 共用同一次偵測結果。裝了新字型後快取自動失效，
+也可以呼叫 ``resolve_cjk_font(refresh=True)`` 強制重新偵測。
+
 使用方式：
     from common.font_setup import setup_chinese_font, set_plotly_chinese_font
     setup_chinese_font()          # matplotlib / seaborn
     set_plotly_chinese_font()     # plotly express / graph_objects
+    setup_fonts()                 # 兩者一起
 """
 from __future__ import annotations
 
+import json
+import os
 import platform
+from pathlib import Path
 from typing import Optional
 
 _FONT_CANDIDATES = {
@@ -26,6 +36,19 @@ _INSTALL_HINT = {
 }
 
 
+# 各平台的字型目錄：任何一層子目錄的修改時間變了（裝 / 移除字型）就重新偵測
+_FONT_DIRS = {
+    "Darwin": ["/System/Library/Fonts", "/Library/Fonts", "~/Library/Fonts"],
+    "Windows": [os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+                os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Fonts")],
+    "Linux": ["/usr/share/fonts", "/usr/local/share/fonts", "~/.fonts", "~/.local/share/fonts"],
+}
+
+_CACHE_VERSION = 1
+
+_resolved: dict = {}  # 同一個行程內的偵測結果：{快取鍵 JSON: 字型名稱}
+
+
 def _available_cjk_fonts(candidates: list[str]) -> list[str]:
     """回傳 matplotlib fontManager 中實際存在的候選字型。"""
     from matplotlib import font_manager
@@ -34,26 +57,102 @@ def _available_cjk_fonts(candidates: list[str]) -> list[str]:
     return [name for name in candidates if name in installed]
 
 
+def _cache_file() -> Path:
+    """快取檔位置（不 import matplotlib 就能算出來）。"""
+    if platform.system() == "Windows":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / "python_da_course" / "cjk_font.json"
+
+
+def _font_dirs_state(system: str) -> list:
+    """字型目錄（含子目錄）的數量與最新修改時間。"""
+    state = []
+    for root in _FONT_DIRS.get(system, _FONT_DIRS["Linux"]):
+        root = os.path.expanduser(root)
+        if not root or not os.path.isdir(root):
+            continue
+        count, latest = 0, 0
+        for dirpath, _, _ in os.walk(root):
+            count += 1
+            latest = max(latest, os.stat(dirpath).st_mtime_ns)
+        state.append([root, count, latest])
+    return state
+
+
+def _cache_key(system: str, candidates: list[str]) -> dict:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        mpl_version = version("matplotlib")
+    except PackageNotFoundError:
+        mpl_version = None
+    return {"version": _CACHE_VERSION, "platform": system, "matplotlib": mpl_version,
+            "candidates": candidates, "font_dirs": _font_dirs_state(system)}
+
+
+def resolve_cjk_font(refresh: bool = False, cache_path: Optional[str | Path] = None) -> Optional[str]:
+    """依平台挑出可用的繁體中文字型，結果存進快取檔。
+
+    快取命中時完全不載入 matplotlib 的 fontManager。
+
+    Args:
+        refresh: 忽略快取、重新掃描字型。
+        cache_path: 快取檔路徑，預設在使用者快取目錄（``~/.cache/python_da_course/cjk_font.json``）。
+
+    Returns:
+        字型名稱；沒有可用的候選字型時回傳 None。
+    """
+    system = platform.system()
+    candidates = _FONT_CANDIDATES.get(system, _FONT_CANDIDATES["Linux"])
+    key = _cache_key(system, candidates)
+    memo = json.dumps(key, sort_keys=True)
+    if not refresh and memo in _resolved:
+        return _resolved[memo]
+
+    path = Path(cache_path) if cache_path is not None else _cache_file()
+    if not refresh:
+        try:
+            cached = json.loads(path.read_text(encoding="utf-8"))
+            if cached.get("key") == key:
+                _resolved[memo] = cached["font"]
+                return cached["font"]
+        except (OSError, ValueError, AttributeError, KeyError):
+            pass
+
+    available = _available_cjk_fonts(candidates)
+    font = available[0] if available else None
+    _resolved[memo] = font
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"key": key, "font": font}, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass  # 唯讀的家目錄：只是下次還要再掃一次
+    return font
+
+
 def setup_chinese_font() -> Optional[str]:
     """偵測平台並設定 matplotlib 繁體中文字型。
 
     Returns:
         成功選用的字型名稱；若無任何候選字型可用則回傳 None 並印出安裝提示。
     """
-    import matplotlib.pyplot as plt
+    import matplotlib
 
     system = platform.system()
-    candidates = _FONT_CANDIDATES.get(system, _FONT_CANDIDATES["Linux"])
-    available = _available_cjk_fonts(candidates)
+    chosen = resolve_cjk_font()
 
-    if not available:
+    if chosen is None:
         print(f"[font_setup] 找不到可用的繁體中文字型（平台：{system}）。")
         print(f"[font_setup] 安裝建議：{_INSTALL_HINT.get(system, '請手動安裝 Noto Sans CJK TC。')}")
         return None
 
-    chosen = available[0]
-    plt.rcParams["font.sans-serif"] = [chosen] + plt.rcParams.get("font.sans-serif", [])
-    plt.rcParams["axes.unicode_minus"] = False
+    rc = matplotlib.rcParams
+    rc["font.sans-serif"] = [chosen] + [f for f in rc.get("font.sans-serif", []) if f != chosen]
+    rc["axes.unicode_minus"] = False
     print(f"[font_setup] 已套用 matplotlib 中文字型：{chosen}")
     return chosen
 
@@ -70,10 +169,7 @@ def set_plotly_chinese_font(font_name: Optional[str] = None) -> Optional[str]:
     import plotly.io as pio
 
     if font_name is None:
-        system = platform.system()
-        candidates = _FONT_CANDIDATES.get(system, _FONT_CANDIDATES["Linux"])
-        available = _available_cjk_fonts(candidates)
-        font_name = available[0] if available else None
+        font_name = resolve_cjk_font()
 
     if font_name is None:
         print("[font_setup] plotly 未設定中文字型：找不到可用字型。")
@@ -86,6 +182,14 @@ def set_plotly_chinese_font(font_name: Optional[str] = None) -> Optional[str]:
     return font_name
 
 
+def setup_fonts() -> Optional[str]:
+    """matplotlib 與 plotly 一起設定（共用同一次字型偵測）。"""
+    chosen = setup_chinese_font()
+    if chosen is not None:
+        set_plotly_chinese_font(chosen)
+    return chosen
+
+
 if __name__ == "__main__":
     from matplotlib import font_manager
 
@@ -95,4 +199,4 @@ if __name__ == "__main__":
     installed = {f.name for f in font_manager.fontManager.ttflist}
     print(f"系統實際可用的候選字型：{[c for c in candidates if c in installed]}")
     chosen = setup_chinese_font()
-    print(f"最終選用：{chosen}")
+    print(f"最終選用：{chosen}（快取：{_cache_file()}）")
@@ -0,0 +1,247 @@
+"""月報增量彙總（incremental monthly rollup）。
+
+S4 / M4 的月報（``red_monthly_report``、``yellow_monthly_revenue``、
+``monthly_revenue.csv``）每次都對全部歷史重跑 ``resample('ME')``；
+訂單累積好幾年後，每天只多一天資料，卻要重算整張表。
+
+本模組把月報物化成一個目錄，只把新到的日期併進去：
+
+    <store>/
+      state.json          已併入的日期、distinct 模式
+      monthly.csv         每月 order_count / revenue / active_customers / avg_order_value / revenue_growth
+      customers/YYYY-MM.npy   每月出現過的顧客（exact：排序後的 id；hll：HyperLogLog 暫存器）
+
+- order_count、revenue 直接累加
+- active_customers：exact 模式把新顧客插入該月的排序陣列；
+  hll 模式更新 HyperLogLog 暫存器（固定 16 KB / 月，誤差約 0.8%）
+- 只重算受影響月份的 avg_order_value 與 revenue_growth（含下一個月的成長率）
+
+每日更新的成本 ≈ 新資料列數 + 受影響月份的顧客集合，與歷史總長度無關。
+
+使用方式：
+    from common.monthly_rollup import MonthlyRollup
+    store = MonthlyRollup("datasets/ecommerce/monthly_rollup")
+    store.update(new_orders)          # 只傳新的一天（或數天）的訂單
+    store.report()                    # 同 red_monthly_report 的 DataFrame
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPORT_COLUMNS = ["order_count", "revenue", "active_customers", "avg_order_value", "revenue_growth"]
+
+# HyperLogLog：2^14 個暫存器，標準誤差 ≈ 1.04 / sqrt(2^14) ≈ 0.8%
+HLL_PRECISION = 14
+
+
+# ============================================================
+# HyperLogLog（向量化）
+# ============================================================
+
+def _hll_update(registers: np.ndarray, keys) -> None:
+    """把 keys 併入 HyperLogLog 暫存器（原地更新）。"""
+    h = pd.util.hash_array(np.asarray(keys))
+    p = HLL_PRECISION
+    idx = (h >> np.uint64(64 - p)).astype(np.intp)
+    rest = h << np.uint64(p)
+    # rho = 剩餘位元的前導零個數 + 1（全為 0 時取上限 64 - p + 1）；bit_length 用二分位移求
+    nbits = np.zeros(len(rest), dtype=np.int64)
+    x = rest.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= np.uint64(1 << shift)
+        nbits[big] += shift
+        x[big] >>= np.uint64(shift)
+    nbits += x.astype(np.int64)
+    rho = np.where(rest != 0, 64 - nbits + 1, 64 - p + 1).astype(np.uint8)
+    np.maximum.at(registers, idx, rho)
+
+
+def _hll_count(registers: np.ndarray) -> int:
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * np.log(m / zeros)  # 小基數改用 linear counting
+    return int(round(estimate))
+
+
+# ============================================================
+# 彙總目錄
+# ============================================================
+
+class MonthlyRollup:
+    """以目錄保存的月報彙總，可逐日增量更新。
+
+    Args:
+        path: 彙總目錄，不存在時自動建立。
+        distinct: 不重複顧客的算法，``"exact"``（預設）或 ``"hll"``；
+            只在建立新目錄時生效，之後以 state.json 為準。
+    """
+
+    def __init__(self, path: str | Path, distinct: str = "exact"):
+        if distinct not in ("exact", "hll"):
+            raise ValueError(f"distinct 只能是 'exact' 或 'hll'，收到 {distinct!r}")
+        self.path = Path(path)
+        (self.path / "customers").mkdir(parents=True, exist_ok=True)
+        state_file = self.path / "state.json"
+        if state_file.exists():
+            self.state = json.loads(state_file.read_text(encoding="utf-8"))
+        else:
+            self.state = {"distinct": distinct, "days": []}
+        self._days = set(self.state["days"])
+        monthly_file = self.path / "monthly.csv"
+        if monthly_file.exists():
+            self.monthly = pd.read_csv(monthly_file, index_col="month")
+        else:
+            self.monthly = pd.DataFrame(columns=REPORT_COLUMNS, index=pd.Index([], name="month"))
+
+    @property
+    def distinct(self) -> str:
+        return self.state["distinct"]
+
+    @property
+    def watermark(self) -> str | None:
+        """已併入的最後一天（YYYY-MM-DD）。"""
+        return max(self._days) if self._days else None
+
+    # ---------- 顧客集合 ----------
+
+    def _customers_file(self, month: str) -> Path:
+        return self.path / "customers" / f"{month}.npy"
+
+    def _fold_customers(self, month: str, customer_ids: np.ndarray) -> int:
+        """把一個月的新顧客併入該月集合，回傳更新後的不重複顧客數。"""
+        file = self._customers_file(month)
+        if self.distinct == "hll":
+            registers = np.load(file) if file.exists() else np.zeros(1 << HLL_PRECISION, dtype=np.uint8)
+            _hll_update(registers, customer_ids)
+            np.save(file, registers)
+            return _hll_count(registers)
+
+        seen = np.load(file, allow_pickle=False) if file.exists() else np.empty(0, dtype=np.int64)
+        new = np.unique(customer_ids.astype(np.int64))
+        if len(seen):
+            pos = np.searchsorted(seen, new)
+            hit = pos < len(seen)
+            hit[hit] = seen[pos[hit]] == new[hit]
+            new, pos = new[~hit], pos[~hit]
+            if len(new):
+                seen = np.insert(seen, pos, new)
+        else:
+            seen = new
+        if len(new):
+            np.save(file, seen)
+        return len(seen)
+
+    # ---------- 增量更新 ----------
+
+    def update(self, orders: pd.DataFrame, date: str = "order_date", amount: str = "amount",
+               customer: str = "customer_id") -> list[str]:
+        """把新到的訂單併入彙總，回傳受影響的月份（YYYY-MM）。
+
+        Args:
+            orders: 新訂單（欄位至少含 order_date、amount、customer_id），
+                日期不可與已併入的日期重複，以免重複計算。
+            date / amount / customer: 欄名。
+
+        Raises:
+            ValueError: orders 含已併入過的日期。
+        """
+        dates = pd.to_datetime(orders[date]).to_numpy(dtype="datetime64[ns]")
+        valid = ~np.isnat(dates)
+        dates = dates[valid]
+        if not len(dates):
+            return []
+        # 以 datetime64[D] / [M] 的整數運算分日、分月，只有不重複的值才轉成字串
+        day_codes = np.unique(dates.astype("datetime64[D]"))
+        new_days = set(np.datetime_as_string(day_codes, unit="D"))
+        again = sorted(new_days & self._days)
+        if again:
+            raise ValueError(f"以下日期已併入彙總：{again[:5]}{'…' if len(again) > 5 else ''}")
+
+        month_codes = dates.astype("datetime64[M]").view(np.int64)
+        amounts = pd.to_numeric(orders[amount], errors="coerce").to_numpy(dtype=np.float64)[valid]
+        customers = orders[customer].to_numpy()[valid]
+
+        order = np.argsort(month_codes, kind="stable")
+        uniq, starts = np.unique(month_codes[order], return_index=True)
+        bounds = np.append(starts, len(order))
+        affected = list(np.datetime_as_string(uniq.astype("datetime64[M]"), unit="M"))
+
+        self._extend_months(affected)
+        for i, m in enumerate(affected):
+            rows = order[bounds[i]:bounds[i + 1]]
+            month_amounts = amounts[rows]
+            self.monthly.loc[m, "order_count"] += int(np.count_nonzero(~np.isnan(month_amounts)))
+            self.monthly.loc[m, "revenue"] += float(np.nansum(month_amounts))
+            self.monthly.loc[m, "active_customers"] = self._fold_customers(m, customers[rows])
+
+        self._recompute_derived(affected)
+        self._days |= new_days
+        self._save()
+        return affected
+
+    def _extend_months(self, months: list[str]) -> None:
+        """補齊月份為連續區間（同 resample 會補上沒資料的月份）。"""
+        existing = list(self.monthly.index)
+        lo = min(existing + months)
+        hi = max(existing + months)
+        full = pd.period_range(lo, hi, freq="M").strftime("%Y-%m")
+        if len(full) == len(existing):
+            return
+        monthly = self.monthly.reindex(full)
+        monthly.index.name = "month"
+        filled = monthly["order_count"].isna()
+        monthly.loc[filled, ["order_count", "revenue", "active_customers"]] = 0
+        monthly[["order_count", "active_customers"]] = monthly[["order_count", "active_customers"]].astype(np.int64)
+        monthly["revenue"] = monthly["revenue"].astype(np.float64)
+        self.monthly = monthly
+        # 新補上的空月份也要算 AOV / 成長率
+        self._recompute_derived(list(monthly.index[filled]))
+
+    def _recompute_derived(self, months: list[str]) -> None:
+        """重算指定月份的 AOV，以及這些月份與其下一個月的 revenue_growth。"""
+        if not months:
+            return
+        index = self.monthly.index
+        pos = np.unique(np.concatenate([index.get_indexer(months), index.get_indexer(months) + 1]))
+        pos = pos[(pos >= 0) & (pos < len(index))]
+        revenue = self.monthly["revenue"].to_numpy(dtype=np.float64)
+        count = self.monthly["order_count"].to_numpy(dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            aov = revenue[pos] / count[pos]
+            prev = np.where(pos > 0, revenue[np.maximum(pos - 1, 0)], np.nan)
+            growth = revenue[pos] / prev - 1
+        self.monthly.iloc[pos, self.monthly.columns.get_loc("avg_order_value")] = aov
+        self.monthly.iloc[pos, self.monthly.columns.get_loc("revenue_growth")] = growth
+
+    def _save(self) -> None:
+        self.state["days"] = sorted(self._days)
+        self.monthly.to_csv(self.path / "monthly.csv")
+        (self.path / "state.json").write_text(json.dumps(self.state), encoding="utf-8")
+
+    # ---------- 讀取 ----------
+
+    def report(self) -> pd.DataFrame:
+        """月報 DataFrame，欄位與 index（月底日期）同 ``red_monthly_report``。"""
+        report = self.monthly[REPORT_COLUMNS].copy()
+        report.index = pd.DatetimeIndex(pd.PeriodIndex(report.index, freq="M").to_timestamp(how="end").normalize(),
+                                        freq="ME", name="order_date")
+        return report.astype({"order_count": np.int64, "revenue": np.float64,
+                              "active_customers": np.int64, "avg_order_value": np.float64,
+                              "revenue_growth": np.float64})
+
+    def monthly_revenue(self) -> pd.Series:
+        """每月營收（同 ``yellow_monthly_revenue``）。"""
+        return self.report()["revenue"].rename("amount")
+
+    def export_monthly_revenue(self, path: str | Path) -> None:
+        """寫出 S4 格式的 monthly_revenue.csv（year_mon, amount）。"""
+        revenue = self.monthly["revenue"].astype(np.float64)
+        revenue[self.monthly["order_count"] == 0] = np.nan
+        revenue.dropna().rename_axis("year_mon").rename("amount").to_csv(path)
@@ -0,0 +1,319 @@
+"""Plotly 大資料繪圖模式。
+
+S6 / M6 的 ``px.scatter(df, ...)``、``red_dashboard``、``generate_dashboard`` 把每一筆
+訂單原封不動塞進 Figure：10^6 筆訂單時 Figure JSON 上百 MB，瀏覽器直接卡死。
+畫面上其實只有幾十萬個像素，多出來的點只是重疊。本模組讓圖上的點數有固定上限：
+
+- 散佈圖：依 (顏色, x 格, y 格) 分箱，每個有資料的格子只留一筆代表列
+  （hover 顯示該格筆數），格子總數 ≤ ``max_points``，所以點數與資料量無關
+- 折線圖：超過 ``line_points`` 時用 LTTB（Largest-Triangle-Three-Buckets）抽點，
+  保留峰谷形狀
+- 點數超過 ``webgl_threshold`` 自動改用 ``Scattergl``（WebGL 繪製）
+- :class:`DashboardData` 把篩選欄位轉成整數代碼、用 ``np.bincount`` 聚合，
+  同一組篩選條件的聚合結果只算一次（切換按鈕 / 重畫不必重跑 groupby）
+
+使用方式：
+    from common.plotly_render import DashboardData, scatter_figure
+    fig = scatter_figure(df, x='unit_price', y='amount', color='category',
+                         hover_data=['product_name'])          # 取代 px.scatter
+    data = DashboardData(enriched)
+    fig = data.dashboard(region=['North', 'East'])            # 2×2 儀表板
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+RENDER_CONFIG = {
+    "max_points": 20_000,       # 單張圖的點數上限
+    "line_points": 2_000,       # 折線超過這個點數就做 LTTB 抽點
+    "webgl_threshold": 5_000,   # trace 點數超過這個值改用 Scattergl
+    "cache_size": 32,           # DashboardData 保留幾組篩選條件的聚合結果
+}
+
+
+# ============================================================
+# 抽點 / 分箱
+# ============================================================
+
+def _as_float(values) -> np.ndarray:
+    """數值或日期 → float64（日期以 ns 整數表示），供距離 / 面積計算用。"""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").view(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """LTTB 抽點：回傳要保留的列索引（遞增，含第一與最後一點）。
+
+    把中間的點均分成 n_out - 2 個桶，每桶選出與「上一個選中點」和「下一桶平均點」
+    構成三角形面積最大的那一點。迴圈只跑 n_out 次，桶內計算是向量化的。
+
+    Args:
+        x: 已排序的 x（數值或日期）。
+        y: 對應的 y。
+        n_out: 要保留的點數。
+    """
+    x = np.asarray(x)
+    if x.dtype.kind in "OUS":
+        x = np.arange(len(x))  # 類別 / 字串軸（例如 "2025-01"）依位置等距
+    x = _as_float(x)
+    y = _as_float(y)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = x - x[0]  # 平移後再累加，避免大數（ns 時間戳）的累加誤差
+    cx = np.concatenate([[0.0], np.cumsum(x)])
+    cy = np.concatenate([[0.0], np.cumsum(y)])
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    edges = np.append(edges, n)  # 最後一「桶」是終點本身
+
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = edges[i + 1], edges[i + 2]
+        avg_x = (cx[nhi] - cx[nlo]) / (nhi - nlo)
+        avg_y = (cy[nhi] - cy[nlo]) / (nhi - nlo)
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def bin_points(x, y, n_cells: int, groups: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+    """二維分箱抽點：每個 (群組, x 格, y 格) 只保留第一筆。
+
+    Args:
+        x, y: 座標（數值或日期），不可含 NaN。
+        n_cells: 每個群組的格子數上限（x、y 各取 ``sqrt(n_cells)`` 格）。
+        groups: 每列的群組代碼 0..g-1（例如顏色），None 表示單一群組。
+
+    Returns:
+        (保留的列索引（遞增）, 每個保留列所代表的筆數)
+    """
+    x = _as_float(x)
+    y = _as_float(y)
+    n = len(x)
+    side = max(int(np.sqrt(n_cells)), 1)
+
+    def cell_of(v):
+        lo, hi = v.min(), v.max()
+        if hi <= lo:
+            return np.zeros(len(v), dtype=np.int64)
+        return np.minimum(((v - lo) / (hi - lo) * side).astype(np.int64), side - 1)
+
+    key = cell_of(x) * side + cell_of(y)
+    n_keys = side * side
+    if groups is not None:
+        key = key + np.asarray(groups, dtype=np.int64) * n_keys
+        n_keys *= int(groups.max()) + 1 if len(groups) else 1
+    # 反向寫入：同一格最後寫入的是最前面那一列
+    first = np.full(n_keys, -1, dtype=np.int64)
+    first[key[::-1]] = np.arange(n - 1, -1, -1)
+    counts = np.bincount(key, minlength=n_keys)
+    occupied = counts > 0
+    order = np.argsort(first[occupied], kind="stable")
+    return first[occupied][order].astype(np.intp), counts[occupied][order]
+
+
+def count_points(fig: go.Figure) -> int:
+    """Figure 內所有 trace 的資料點數（x / values 長度加總）。"""
+    total = 0
+    for trace in fig.data:
+        for attr in ("x", "values", "labels"):
+            values = getattr(trace, attr, None)
+            if values is not None:
+                total += len(values)
+                break
+    return total
+
+
+# ============================================================
+# 單張圖
+# ============================================================
+
+def _scatter_class(n: int):
+    return go.Scattergl if n > RENDER_CONFIG["webgl_threshold"] else go.Scatter
+
+
+def line_trace(x, y, name: Optional[str] = None, max_points: Optional[int] = None, **kwargs):
+    """折線 trace：點數超過上限時先做 LTTB 抽點，點多時改用 Scattergl。"""
+    max_points = max_points or RENDER_CONFIG["line_points"]
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) > max_points:
+        keep = lttb(x, y, max_points)
+        x, y = x[keep], y[keep]
+    kwargs.setdefault("mode", "lines")
+    return _scatter_class(len(x))(x=x, y=y, name=name, **kwargs)
+
+
+def scatter_figure(df: pd.DataFrame, x: str, y: str, color: Optional[str] = None,
+                   hover_data: Optional[list[str]] = None, title: Optional[str] = None,
+                   max_points: Optional[int] = None) -> go.Figure:
+    """取代 ``px.scatter`` 的大資料版：點數永遠不超過 ``max_points``。
+
+    資料量在上限內時每筆都畫（與 px.scatter 相同）；超過時以 :func:`bin_points`
+    分箱，hover 多顯示「代表 N 筆」。每個顏色一個 trace，顏色順序同 px。
+    """
+    max_points = max_points or RENDER_CONFIG["max_points"]
+    hover_data = list(hover_data or [])
+    df = df.dropna(subset=[x, y])
+    if color is not None:
+        codes, labels = pd.factorize(df[color], sort=False, use_na_sentinel=False)
+    else:
+        codes, labels = np.zeros(len(df), dtype=np.intp), [None]
+    n_groups = max(len(labels), 1)
+
+    if len(df) > max_points:
+        rows, counts = bin_points(df[x].to_numpy(), df[y].to_numpy(), max_points // n_groups, codes)
+    else:
+        rows, counts = np.arange(len(df)), np.ones(len(df), dtype=np.int64)
+    codes = codes[rows]
+    sample = df.iloc[rows]
+
+    palette = px.colors.qualitative.Plotly
+    hover = "".join(f"<br>{c}=%{{customdata[{i}]}}" for i, c in enumerate(hover_data))
+    hover += f"<br>代表 %{{customdata[{len(hover_data)}]}} 筆"
+    fig = go.Figure()
+    for g, label in enumerate(labels):
+        mask = codes == g
+        part = sample[mask]
+        customdata = np.column_stack([part[c].to_numpy(dtype=object) for c in hover_data]
+                                     + [counts[mask]])
+        fig.add_trace(_scatter_class(int(mask.sum()))(
+            x=part[x].to_numpy(), y=part[y].to_numpy(), mode="markers",
+            name=None if label is None else str(label), showlegend=label is not None,
+            marker=dict(color=palette[g % len(palette)]), customdata=customdata,
+            hovertemplate=f"{x}=%{{x}}<br>{y}=%{{y}}{hover}<extra></extra>",
+        ))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y,
+                      legend_title_text=color)
+    return fig
+
+
+# ============================================================
+# 儀表板：依篩選條件快取聚合結果
+# ============================================================
+
+class DashboardData:
+    """M6 儀表板資料（orders_enriched 格式），聚合結果依篩選條件快取。
+
+    篩選欄位（region、category、vip_level…）第一次用到時轉成整數代碼，
+    之後的篩選都是整數比對；聚合用 ``np.bincount``，不走 groupby。
+
+    Args:
+        df: 合併後的訂單（至少含 order_date、amount，及要篩選 / 分組的欄位）。
+        date / amount: 欄名。
+        cache_size: 保留幾組篩選條件的結果（LRU）。
+    """
+
+    def __init__(self, df: pd.DataFrame, date: str = "order_date", amount: str = "amount",
+                 cache_size: Optional[int] = None):
+        self.df = df
+        self.amount = df[amount].to_numpy(dtype=np.float64)
+        self.months = pd.to_datetime(df[date]).to_numpy(dtype="datetime64[ns]").astype("datetime64[M]")
+        self._codes: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._cache: OrderedDict = OrderedDict()
+        self.cache_size = cache_size or RENDER_CONFIG["cache_size"]
+        self.hits = 0
+        self.misses = 0
+
+    def codes(self, column: str) -> tuple[np.ndarray, np.ndarray]:
+        """欄位 → (每列代碼, 代碼對應的值)；缺值代碼為 -1。"""
+        if column not in self._codes:
+            self._codes[column] = pd.factorize(self.df[column], sort=True)
+        return self._codes[column]
+
+    @staticmethod
+    def _key(filters: dict) -> tuple:
+        """篩選條件 → 可 hash 的 key（值的順序、list / 單值寫法不影響）。"""
+        items = []
+        for col, value in sorted(filters.items()):
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set, np.ndarray, pd.Index)):
+                value = tuple(sorted(set(value), key=str))
+            else:
+                value = (value,)
+            items.append((col, value))
+        return tuple(items)
+
+    def mask(self, **filters) -> np.ndarray:
+        """篩選條件 → 布林遮罩。每個欄位可給單值或多值（多值為 OR，不同欄位為 AND）。"""
+        keep = np.ones(len(self.df), dtype=bool)
+        for col, values in self._key(filters):
+            codes, uniques = self.codes(col)
+            wanted = pd.Index(uniques).get_indexer(list(values))
+            keep &= np.isin(codes, wanted[wanted >= 0])
+        return keep
+
+    def _group_sum(self, column: str, keep: np.ndarray) -> pd.DataFrame:
+        codes, uniques = self.codes(column)
+        ok = keep & (codes >= 0)
+        sums = np.bincount(codes[ok], weights=self.amount[ok], minlength=len(uniques))
+        present = np.bincount(codes[ok], minlength=len(uniques)) > 0
+        return pd.DataFrame({column: np.asarray(uniques)[present], "amount": sums[present]})
+
+    def aggregates(self, **filters) -> dict:
+        """依篩選條件計算（或取出快取的）四份儀表板資料：monthly、top_products、region、category。"""
+        key = self._key(filters)
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        self.misses += 1
+
+        # 缺金額或缺日期（NaT）的訂單不進任何一張圖
+        keep = self.mask(**filters) & ~np.isnan(self.amount) & ~np.isnat(self.months)
+        months = self.months[keep]
+        result = {}
+        if len(months):
+            month_codes = months.view(np.int64)
+            lo = month_codes.min()
+            sums = np.bincount(month_codes - lo, weights=self.amount[keep])
+            labels = np.arange(lo, lo + len(sums)).astype("datetime64[M]")
+            result["monthly"] = pd.DataFrame({"month": np.datetime_as_string(labels, unit="M"), "amount": sums})
+        else:
+            result["monthly"] = pd.DataFrame({"month": [], "amount": []})
+        top = self._group_sum("product_name", keep)
+        result["top_products"] = top.iloc[np.argsort(-top["amount"].to_numpy(), kind="stable")[:10]].reset_index(drop=True)
+        result["region"] = self._group_sum("region", keep)
+        result["category"] = self._group_sum("category", keep)
+
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def dashboard(self, title: str = "<b>E-Commerce Sales Dashboard</b>", **filters) -> go.Figure:
+        """2×2 儀表板（同 S6 ``generate_dashboard`` 的版面），點數與訂單筆數無關。"""
+        agg = self.aggregates(**filters)
+        fig = make_subplots(
+            rows=2, cols=2,
+            subplot_titles=("Monthly Revenue Trend", "Top 10 Products",
+                            "Revenue by Region", "Category Share"),
+            specs=[[{"type": "xy"}, {"type": "xy"}],
+                   [{"type": "xy"}, {"type": "domain"}]],
+        )
+        monthly = agg["monthly"]
+        fig.add_trace(line_trace(monthly["month"], monthly["amount"], name="Monthly",
+                                 mode="lines+markers"), row=1, col=1)
+        fig.add_trace(go.Bar(x=agg["top_products"]["product_name"], y=agg["top_products"]["amount"],
+                             name="Top"), row=1, col=2)
+        fig.add_trace(go.Bar(x=agg["region"]["region"], y=agg["region"]["amount"],
+                             name="Region"), row=2, col=1)
+        fig.add_trace(go.Pie(labels=agg["category"]["category"], values=agg["category"]["amount"],
+                             hole=0.4, name="Category"), row=2, col=2)
+        fig.update_layout(title_text=title, height=750, showlegend=False)
+        fig.update_xaxes(tickangle=45, row=1, col=2)
+        return fig
@@ -0,0 +1,224 @@
+"""規則表驅動的向量化分級定價引擎。
+
+S1 / M1 ``red_double11_prices`` 把三段庫存折扣寫死在巢狀 ``np.where`` 裡：
+多一條規則就多一層巢狀、多一整份暫存陣列，規則一多既難讀也難維護。
+本模組改成「規則表」：每列一條規則，依序比對，第一條符合的規則決定折扣
+（同 ``np.select`` / 巢狀 ``np.where`` 的優先順序）：
+
+    category   stock_min  stock_max  price_min  price_max  discount
+    NaN        100        NaN        NaN        NaN        0.7     # 庫存 >= 100：7 折
+    NaN        20         100        NaN        NaN        0.9     # 庫存 20~99：9 折
+                                                                    # 都不符合：原價
+
+- 下限含、上限不含；空白（NaN）表示該欄不限
+- 規則先編譯成「類別 × 庫存區間 × 價格區間」的折扣查表，每個 SKU 只做
+  ``np.searchsorted`` 找區間 + 一次查表，成本與規則條數無關
+- 逐區塊處理，輸入輸出都可以是 ``np.memmap``（``np.load(mmap_mode='r')``），
+  全品項重新定價不必整份載入記憶體
+
+使用方式：
+    from common.pricing import DOUBLE11_RULES, PricingRules
+    rules = PricingRules(DOUBLE11_RULES)
+    sale = rules.apply(prices, stocks)                    # = red_double11_prices(prices, stocks)
+    rules = PricingRules.from_csv("flash_sale_rules.csv")
+    rules.apply_files("prices.npy", "stocks.npy", "sale.npy")
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+RULE_COLUMNS = ["category", "stock_min", "stock_max", "price_min", "price_max", "discount"]
+
+# M1 雙 11 規則（與 red_double11_prices 的巢狀 np.where 相同）
+DOUBLE11_RULES = [
+    {"stock_min": 100, "discount": 0.7},
+    {"stock_min": 20, "stock_max": 100, "discount": 0.9},
+]
+
+# 每區塊的 SKU 數：暫存陣列留在 CPU 快取附近，也限制 memmap 輸入時的常駐記憶體
+CHUNK_SIZE = 1 << 18
+
+# 切點數不超過這個值時，用逐一比較取代 np.searchsorted
+_COMPARE_EDGES = 16
+
+
+def _edges(lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """規則的上下限 → 排序後的切點（不含 NaN）。"""
+    bounds = np.concatenate([lo, hi])
+    return np.unique(bounds[~np.isnan(bounds)])
+
+
+def _bin_match(edges: np.ndarray, lo: float, hi: float) -> np.ndarray:
+    """每個區間（含最後的缺值區間）是否落在 [lo, hi) 內。
+
+    區間 i 為 [edges[i-1], edges[i])；規則的上下限本身就是切點，所以整個區間不是全在內就是全在外。
+    缺值區間只符合「這一欄不限」的規則。
+    """
+    n = len(edges) + 1
+    bin_lo = np.concatenate([[-np.inf], edges])
+    bin_hi = np.concatenate([edges, [np.inf]])
+    ok = np.ones(n, dtype=bool)
+    if not np.isnan(lo):
+        ok &= bin_lo >= lo
+    if not np.isnan(hi):
+        ok &= bin_hi <= hi
+    nan_bin = np.isnan(lo) and np.isnan(hi)
+    return np.append(ok, nan_bin)
+
+
+class PricingRules:
+    """編譯好的定價規則表。
+
+    Args:
+        rules: 規則表（DataFrame，或 dict 的 list），欄位見 ``RULE_COLUMNS``；
+            缺少的欄位與空白值都表示不限。discount 是售價倍數（0.7 = 7 折）。
+        default: 沒有規則符合時的倍數，預設 1.0（原價）。
+    """
+
+    def __init__(self, rules, default: float = 1.0):
+        table = pd.DataFrame(rules).reindex(columns=RULE_COLUMNS)
+        if table["discount"].isna().any():
+            raise ValueError("每條規則都要有 discount")
+        self.rules = table
+        self.default = float(default)
+
+        stock_lo = table["stock_min"].to_numpy(dtype=np.float64)
+        stock_hi = table["stock_max"].to_numpy(dtype=np.float64)
+        price_lo = table["price_min"].to_numpy(dtype=np.float64)
+        price_hi = table["price_max"].to_numpy(dtype=np.float64)
+        self.stock_edges = _edges(stock_lo, stock_hi)
+        self.price_edges = _edges(price_lo, price_hi)
+        self.categories = pd.Index(table["category"].dropna().unique())
+
+        # 查表維度：類別（含「其他」）× 庫存區間（含缺值）× 價格區間（含缺值）
+        n_cat = len(self.categories) + 1
+        grid = np.full((n_cat, len(self.stock_edges) + 2, len(self.price_edges) + 2), self.default)
+        cat_codes = self.categories.get_indexer(table["category"])
+        # 由最後一條往前蓋，第一條符合的規則最後寫入 → 優先
+        for i in reversed(range(len(table))):
+            cats = np.zeros(n_cat, dtype=bool)
+            if pd.isna(table["category"].iloc[i]):
+                cats[:] = True
+            else:
+                cats[cat_codes[i]] = True
+            stock_ok = _bin_match(self.stock_edges, stock_lo[i], stock_hi[i])
+            price_ok = _bin_match(self.price_edges, price_lo[i], price_hi[i])
+            mask = cats[:, None, None] & stock_ok[None, :, None] & price_ok[None, None, :]
+            grid[mask] = table["discount"].iloc[i]
+        self.grid = grid
+
+    @classmethod
+    def from_csv(cls, path: str | Path, default: float = 1.0) -> "PricingRules":
+        return cls(pd.read_csv(path), default=default)
+
+    # ---------- 查表 ----------
+
+    @staticmethod
+    def _bins(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """值 → 區間編號（= 小於等於該值的切點個數），缺值為最後一格。"""
+        if len(edges) <= _COMPARE_EDGES:
+            # 切點少時逐一比較再加總，比 searchsorted 的逐元素二分搜尋快好幾倍
+            bins = np.zeros(len(values), dtype=np.intp)
+            for edge in edges:
+                bins += values >= edge
+        else:
+            bins = np.searchsorted(edges, values, side="right")
+        nan = np.isnan(values)
+        if nan.any():
+            bins[nan] = len(edges) + 1
+        return bins
+
+    def category_codes(self, categories, labels: Optional[Sequence[str]] = None) -> np.ndarray:
+        """類別值 → 查表用代碼（規則沒提到的類別為「其他」）。
+
+        Args:
+            categories: 每個 SKU 的類別；可為字串 / Categorical，或搭配 labels 的整數代碼。
+            labels: 整數代碼對應的類別名稱（例如 memmap 存的是代碼時）。
+        """
+        other = len(self.categories)
+        if labels is not None:
+            lookup = self.categories.get_indexer(list(labels))
+            lookup[lookup < 0] = other
+            lookup = np.append(lookup, other)  # 超出範圍的代碼 → 最後一格（其他）
+            codes = np.asarray(categories, dtype=np.int64)
+            return lookup[np.where((codes < 0) | (codes >= len(labels)), -1, codes)]
+        codes = self.categories.get_indexer(pd.Index(categories))
+        codes[codes < 0] = other
+        return codes
+
+    def multiplier(self, stocks, prices, categories=None) -> np.ndarray:
+        """每個 SKU 的售價倍數（查表）。categories 為 :meth:`category_codes` 的結果或 None。"""
+        stocks = np.asarray(stocks, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        grid = self.grid
+        # 沒用到的維度只有「全部」與「缺值」兩格：用不到就不做 searchsorted
+        if len(self.price_edges) == 0 and not np.isnan(prices).any():
+            grid = grid[:, :, :1]
+            flat = self._bins(stocks, self.stock_edges)
+        else:
+            flat = self._bins(stocks, self.stock_edges) * grid.shape[2] + self._bins(prices, self.price_edges)
+        if categories is not None and len(self.categories):
+            flat += np.asarray(categories) * (grid.shape[1] * grid.shape[2])
+        return grid.ravel()[flat]
+
+    def apply(self, prices, stocks, categories=None, labels: Optional[Sequence[str]] = None,
+              out: Optional[np.ndarray] = None, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+        """依規則計算售價 = 原價 × 倍數。
+
+        Args:
+            prices / stocks: 原價、庫存（ndarray 或 memmap）。
+            categories: 類別（可省略）；整數代碼請一併給 labels。
+            out: 輸出陣列（例如 ``np.lib.format.open_memmap`` 開的檔案），預設新配置。
+            chunk_size: 每次處理的 SKU 數。
+
+        Returns:
+            售價陣列（float64），與巢狀 ``np.where`` 的結果逐位元相同。
+        """
+        n = len(prices)
+        if len(stocks) != n or (categories is not None and len(categories) != n):
+            raise ValueError("prices、stocks、categories 長度必須相同")
+        if out is None:
+            out = np.empty(n, dtype=np.float64)
+        for start in range(0, n, chunk_size):
+            sl = slice(start, min(start + chunk_size, n))
+            price = np.asarray(prices[sl], dtype=np.float64)
+            cats = None if categories is None else self.category_codes(categories[sl], labels)
+            np.multiply(price, self.multiplier(stocks[sl], price, cats), out=out[sl])
+        return out
+
+    def apply_select(self, prices, stocks, categories=None) -> np.ndarray:
+        """同 :meth:`apply`，但直接把規則展開成 ``np.select``（規則少、資料小時的對照版本）。"""
+        prices = np.asarray(prices, dtype=np.float64)
+        stocks = np.asarray(stocks, dtype=np.float64)
+        conditions, choices = [], []
+        for rule in self.rules.itertuples(index=False):
+            cond = np.ones(len(prices), dtype=bool)
+            if not pd.isna(rule.category):
+                cond &= np.asarray(pd.Index(categories) == rule.category)
+            for values, lo, hi in ((stocks, rule.stock_min, rule.stock_max),
+                                   (prices, rule.price_min, rule.price_max)):
+                if not pd.isna(lo):
+                    cond &= values >= lo
+                if not pd.isna(hi):
+                    cond &= values < hi
+            conditions.append(cond)
+            choices.append(prices * rule.discount)
+        return np.select(conditions, choices, default=prices * self.default)
+
+    def apply_files(self, prices_path: str | Path, stocks_path: str | Path, out_path: str | Path,
+                    categories_path: str | Path | None = None, labels: Optional[Sequence[str]] = None,
+                    chunk_size: int = CHUNK_SIZE) -> Path:
+        """對 .npy 檔以 memmap 逐區塊重新定價，結果寫到 out_path（.npy）。"""
+        prices = np.load(prices_path, mmap_mode="r")
+        stocks = np.load(stocks_path, mmap_mode="r")
+        categories = None if categories_path is None else np.load(categories_path, mmap_mode="r",
+                                                                  allow_pickle=False)
+        out = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float64, shape=prices.shape)
+        self.apply(prices, stocks, categories, labels=labels, out=out, chunk_size=chunk_size)
+        out.flush()
+        del out
+        return Path(out_path)
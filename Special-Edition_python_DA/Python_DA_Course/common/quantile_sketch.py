@@ -0,0 +1,259 @@
+"""可合併的分位數 sketch（KLL），用於大量資料的分組中位數 / p95。
+
+S4 / M4 ``yellow_category_median`` 的寫法是 ``df.groupby('category')['amount'].median()``：
+每一組的整欄金額都得同時放在記憶體裡排序，資料到數十億列就做不到，
+也沒辦法分檔、分機器算完再合併。本模組用 KLL sketch 近似分位數：
+
+- 每一層是一個緩衝區，第 h 層每個值代表 2^h 筆原始資料；緩衝區超過 k 個值時
+  排序、隨機取奇數或偶數位置的一半升到上一層（壓縮），總大小約 k × log2(n / k)
+- 一次吃一整批（``update(values)``），排序與取半都是 numpy 向量運算
+- 兩個 sketch 直接逐層串接再壓縮就是合併（:meth:`QuantileSketch.merge`），
+  所以可以逐區塊 / 逐檔 / 逐行程各算一份，最後再合併
+
+誤差界限：第 h 層的一次壓縮，對任一查詢值的排名最多偏差 2^h，且偏正偏負機率相同。
+各次壓縮獨立，由 Hoeffding 不等式，單一查詢的正規化排名誤差
+
+    |rank_est(x) - rank(x)| / n  ≤  sqrt(2 · Σ(2^h)² · ln(2 / δ)) / n      （機率 ≥ 1 - δ）
+
+Σ 是這份 sketch 實際做過的每次壓縮，:meth:`QuantileSketch.rank_error` 會依實際紀錄算出這個值。
+換成分位數的說法：``quantile(0.5)`` 回傳值的真實排名落在 0.5 ± ε 之間。
+預設 k = 1024 時 ε 約 0.3%，與 n 幾乎無關；n ≤ k 時完全沒有壓縮，結果與 pandas 相同。
+
+使用方式：
+    from common.quantile_sketch import GroupedQuantiles, grouped_quantiles
+    table = grouped_quantiles(pd.read_csv(path, chunksize=1_000_000), by="category",
+                              column="amount", q=(0.5, 0.95))
+    table["p50"].sort_values(ascending=False)            # ≈ yellow_category_median(df)
+
+    # 分散計算：各行程各自 update，再把部分結果合併
+    total = GroupedQuantiles()
+    for part in partial_results:
+        total.merge(part)
+"""
+from __future__ import annotations
+
+import math
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+SKETCH_CONFIG = {
+    "k": 1024,              # 每層緩衝區上限；誤差約與 1/k 成正比，記憶體與 k 成正比
+    "seed": 0,              # 壓縮時取奇 / 偶位置的亂數種子，固定後結果可重現
+    "confidence": 0.99,     # rank_error 預設的信心水準
+}
+
+
+def quantile_name(q: float) -> str:
+    """0.5 → ``p50``、0.025 → ``p2.5``（欄名與 :mod:`common.rolling_stream` 相同）。"""
+    return f"p{q * 100:g}"
+
+
+# ============================================================
+# 單一序列的 sketch
+# ============================================================
+
+class QuantileSketch:
+    """KLL 分位數 sketch。
+
+    Args:
+        k: 每層緩衝區上限。
+        seed: 亂數種子。
+    """
+
+    def __init__(self, k: Optional[int] = None, seed: Optional[int] = None):
+        self.k = int(k or SKETCH_CONFIG["k"])
+        if self.k < 2:
+            raise ValueError("k 至少為 2")
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._sq_error = 0.0  # Σ(2^h)²：每次壓縮最大排名偏差的平方和
+        self._rng = np.random.default_rng(SKETCH_CONFIG["seed"] if seed is None else seed)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __repr__(self) -> str:
+        return (f"QuantileSketch(n={self.n:,}, k={self.k}, levels={len(self.levels)}, "
+                f"retained={self.retained:,})")
+
+    @property
+    def retained(self) -> int:
+        """目前保留的值個數（記憶體用量）。"""
+        return sum(len(level) for level in self.levels)
+
+    @property
+    def exact(self) -> bool:
+        """還沒壓縮過：保留的就是全部原始值。"""
+        return self._sq_error == 0.0
+
+    def update(self, values) -> "QuantileSketch":
+        """加入一批值（NaN 略過，同 pandas 的 median）。"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """把另一份 sketch 併進來（other 不變）。"""
+        if other.n == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._sq_error += other._sq_error
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self.k:
+                level = np.sort(level)
+                # 奇數個時留下最大的一個在本層，其餘兩兩一組，隨機取每組的第 1 或第 2 個
+                keep = level[-1:] if len(level) % 2 else level[:0]
+                offset = int(self._rng.integers(2))
+                promoted = level[offset:len(level) - len(keep):2]
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.levels[h] = keep.copy()
+                self._sq_error += 4.0 ** h
+            h += 1
+
+    def _sorted(self) -> tuple[np.ndarray, np.ndarray]:
+        """保留值排序後的 (值, 累計權重)。"""
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    # ---------- 查詢 ----------
+
+    def quantile(self, q):
+        """分位數（q 可為純量或陣列）。
+
+        沒壓縮過時與 ``np.quantile``（線性內插，同 pandas）相同；
+        壓縮後回傳累計權重第一個達到 q·n 的保留值，q = 0 / 1 為精確的最小 / 最大值。
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if np.any((q < 0) | (q > 1)):
+            raise ValueError("q 必須介於 0 與 1")
+        if self.n == 0:
+            return np.full(q.shape, np.nan)[()]
+        if self.exact:
+            return np.quantile(self.levels[0], q)
+        values, cum = self._sorted()
+        idx = np.minimum(np.searchsorted(cum, q * self.n, side="left"), len(values) - 1)
+        out = values[idx]
+        out = np.where(q == 0, self.min, np.where(q == 1, self.max, out))
+        return out[()]
+
+    def rank(self, x):
+        """x 的估計正規化排名（≤ x 的比例）。"""
+        if self.n == 0:
+            return np.full(np.shape(x), np.nan)[()]
+        values, cum = self._sorted()
+        idx = np.searchsorted(values, np.asarray(x, dtype=np.float64), side="right")
+        return (np.concatenate([[0.0], cum])[idx] / self.n)[()]
+
+    def rank_error(self, confidence: Optional[float] = None) -> float:
+        """單一查詢的正規化排名誤差上界（見模組說明），信心水準預設 0.99。"""
+        confidence = SKETCH_CONFIG["confidence"] if confidence is None else confidence
+        if self.n == 0 or self.exact:
+            return 0.0
+        return math.sqrt(2.0 * self._sq_error * math.log(2.0 / (1.0 - confidence))) / self.n
+
+
+# ============================================================
+# 分組：每組一份 sketch，逐區塊更新、最後合併
+# ============================================================
+
+class GroupedQuantiles:
+    """``groupby(by)[column].quantile(q)`` 的串流版本。
+
+    Args:
+        k / seed: 傳給每組的 :class:`QuantileSketch`。
+    """
+
+    def __init__(self, k: Optional[int] = None, seed: Optional[int] = None):
+        self.k = k
+        self.seed = seed
+        self.sketches: dict = {}
+
+    def __len__(self) -> int:
+        return len(self.sketches)
+
+    def _sketch(self, key) -> QuantileSketch:
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = QuantileSketch(self.k, self.seed)
+        return sketch
+
+    def update(self, keys, values) -> "GroupedQuantiles":
+        """加入一個區塊：keys 為每列的組別，values 為要算分位數的值（缺 key 的列略過）。"""
+        codes, uniques = pd.factorize(pd.Series(keys))
+        values = np.asarray(values, dtype=np.float64)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        values = values[order]
+        for g, key in enumerate(uniques):
+            self._sketch(key).update(values[bounds[g]:bounds[g + 1]])
+        return self
+
+    def update_frame(self, df: pd.DataFrame, by: str = "category", column: str = "amount") -> "GroupedQuantiles":
+        return self.update(df[by], df[column])
+
+    def merge(self, other: "GroupedQuantiles") -> "GroupedQuantiles":
+        """合併另一份部分結果（例如另一個行程、另一個檔案算的）。"""
+        for key, sketch in other.sketches.items():
+            self._sketch(key).merge(sketch)
+        return self
+
+    def result(self, q: Sequence[float] = (0.5, 0.95), confidence: Optional[float] = None) -> pd.DataFrame:
+        """每組一列：``count``、``p50`` / ``p95`` …、``rank_error``（正規化排名誤差上界）。"""
+        keys = sorted(self.sketches)
+        rows = []
+        for key in keys:
+            sketch = self.sketches[key]
+            row = {"count": sketch.n}
+            row.update(zip(map(quantile_name, q), np.atleast_1d(sketch.quantile(q))))
+            row["rank_error"] = sketch.rank_error(confidence)
+            rows.append(row)
+        columns = ["count", *map(quantile_name, q), "rank_error"]
+        return pd.DataFrame(rows, index=pd.Index(keys), columns=columns)
+
+
+def grouped_quantiles(data, by: str = "category", column: str = "amount", q: Sequence[float] = (0.5, 0.95),
+                      k: Optional[int] = None, seed: Optional[int] = None) -> pd.DataFrame:
+    """對 DataFrame（或區塊的 iterable）一次掃過，回傳各組的近似分位數。
+
+    Args:
+        data: DataFrame，或 DataFrame 區塊的 iterable（例如 ``pd.read_csv(path, chunksize=...)``）。
+        by: 分組欄位。
+        column: 數值欄位。
+        q: 分位數。
+        k / seed: 見 :class:`QuantileSketch`。
+
+    Returns:
+        index 為組別、欄位為 ``count`` / ``p50`` / ``p95`` … / ``rank_error`` 的 DataFrame。
+    """
+    grouped = GroupedQuantiles(k, seed)
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    for chunk in chunks:
+        grouped.update_frame(chunk, by, column)
+    return grouped.result(q).rename_axis(by)
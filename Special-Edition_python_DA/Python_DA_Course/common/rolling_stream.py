@@ -0,0 +1,403 @@
+"""串流式移動視窗統計（rolling window）。
+
+S4 / M4 ``yellow_rolling_avg`` 是先 ``resample`` 出整段月營收，再 ``.rolling(3).mean()``；
+訂單是一筆一筆進來的，每多一天就要重算整條序列。本模組逐筆吃訂單事件，
+每個時間桶（日或月）結束時才把該桶的營收推進視窗：
+
+- sum / mean / var / std：進一個值、出一個值，O(1) 更新
+  （sum 用 Kahan 補償、var 用 Welford 加減公式，長時間累加也不漂移）
+- median / 任意分位數：視窗內的值放在可索引的 skiplist，插入、刪除、取第 k 小都是 O(log w)
+- 同時維護多個視窗長度（例如 7、28、90 天），也可依 key（例如 category）各自一條序列
+- 沒有訂單的日子補 0（同 ``resample('D').sum()``），每個 key 從自己的第一天算起
+
+同一套引擎可以接即時資料流（:meth:`DailyRollingEngine.push`），
+也可以對已排序的檔案逐區塊批次跑（:func:`rolling_frame`），結果與
+``s.rolling(w).sum() / mean() / var() / std() / median() / quantile(q)`` 相同。
+
+使用方式：
+    from common.rolling_stream import DailyRollingEngine, rolling_frame
+    engine = DailyRollingEngine(windows=(7, 28), quantiles=(0.5, 0.9))
+    for event in feed:
+        for row in engine.push(event.date, event.amount, key=event.category):
+            ...                                  # 每個 (key, 日) 結束時產生一列
+    table = rolling_frame(pd.read_csv(path, chunksize=1_000_000), key="category", windows=(7, 28))
+"""
+from __future__ import annotations
+
+import math
+import random
+from collections import deque
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+STATS = ("sum", "mean", "var", "std")
+
+
+# ============================================================
+# 可索引 skiplist：O(log n) 插入 / 刪除 / 取第 k 小
+# ============================================================
+
+class IndexableSkiplist:
+    """排序容器，每個節點記錄各層「跳過幾個元素」，所以能以 O(log n) 依名次取值。
+
+    Args:
+        expected_size: 預期的最大元素數（決定層數）。
+        seed: 亂數種子（層高是隨機的；固定種子讓結果可重現）。
+    """
+
+    def __init__(self, expected_size: int = 100, seed: int = 0):
+        self.size = 0
+        self.max_levels = max(int(1 + math.log2(max(expected_size, 2))), 1)
+        self._head = [math.inf, [None] * self.max_levels, [1] * self.max_levels]
+        self._nil = [math.inf, [], []]
+        self._head[1] = [self._nil] * self.max_levels
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, i: int) -> float:
+        node = self._head
+        i += 1
+        for level in reversed(range(self.max_levels)):
+            while node[2][level] <= i:
+                i -= node[2][level]
+                node = node[1][level]
+        return node[0]
+
+    def __iter__(self):
+        node = self._head[1][0]
+        while node is not self._nil:
+            yield node[0]
+            node = node[1][0]
+
+    def insert(self, value: float) -> None:
+        chain = [None] * self.max_levels
+        steps_at_level = [0] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node[1][level][0] <= value:
+                steps_at_level[level] += node[2][level]
+                node = node[1][level]
+            chain[level] = node
+
+        # 層高：1 + 幾何分布，最多 max_levels 層
+        d = min(self.max_levels, 1 - int(math.log2(self._random.random() or 1e-300)))
+        new = [value, [None] * d, [None] * d]
+        steps = 0
+        for level in range(d):
+            prev = chain[level]
+            new[1][level] = prev[1][level]
+            prev[1][level] = new
+            new[2][level] = prev[2][level] - steps
+            prev[2][level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(d, self.max_levels):
+            chain[level][2][level] += 1
+        self.size += 1
+
+    def remove(self, value: float) -> None:
+        chain = [None] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node[1][level][0] < value:
+                node = node[1][level]
+            chain[level] = node
+        if value != chain[0][1][0][0]:
+            raise KeyError(f"{value!r} 不在 skiplist 中")
+
+        d = len(chain[0][1][0][1])
+        for level in range(d):
+            prev = chain[level]
+            prev[2][level] += prev[1][level][2][level] - 1
+            prev[1][level] = prev[1][level][1][level]
+        for level in range(d, self.max_levels):
+            chain[level][2][level] -= 1
+        self.size -= 1
+
+
+# ============================================================
+# 單一視窗
+# ============================================================
+
+class RollingWindow:
+    """固定長度（以觀測值個數計）的移動視窗，語意同 ``pd.Series.rolling(window)``。
+
+    Args:
+        window: 視窗長度 w。
+        quantiles: 要維護的分位數（0~1），例如 ``(0.5,)`` 為中位數；空 tuple 表示不維護。
+        min_periods: 視窗內至少幾個非缺值才輸出，預設等於 window（同 pandas）。
+    """
+
+    def __init__(self, window: int, quantiles: Sequence[float] = (0.5,), min_periods: Optional[int] = None):
+        if window < 1:
+            raise ValueError(f"window 必須 ≥ 1，收到 {window}")
+        self.window = window
+        self.quantiles = tuple(quantiles)
+        self.min_periods = window if min_periods is None else min_periods
+        self._values: deque = deque()
+        self._sorted = IndexableSkiplist(window) if self.quantiles else None
+        self.count = 0          # 視窗內的非缺值個數
+        self._sum = 0.0
+        self._comp = 0.0        # Kahan 補償項
+        self._mean = 0.0
+        self._m2 = 0.0
+        # 結尾連續相同值的個數：整個視窗都同值時 var 直接為 0、mean 為該值（同 pandas），
+        # 避免加減公式殘留的極小誤差
+        self._last = math.nan
+        self._same = 0
+
+    def _add_sum(self, x: float) -> None:
+        y = x - self._comp
+        t = self._sum + y
+        self._comp = (t - self._sum) - y
+        self._sum = t
+
+    def update(self, x: float) -> None:
+        """推入一個新值（NaN 視為缺值：佔視窗位置但不計入統計），必要時移出最舊的值。"""
+        self._values.append(x)
+        if x == x:
+            self.count += 1
+            self._add_sum(x)
+            delta = x - self._mean
+            self._mean += delta / self.count
+            self._m2 += delta * (x - self._mean)
+            if self._sorted is not None:
+                self._sorted.insert(x)
+            self._same = self._same + 1 if x == self._last else 1
+            self._last = x
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            if old == old:
+                self.count -= 1
+                self._add_sum(-old)
+                if self.count == 0:
+                    self._mean = self._m2 = 0.0
+                    self._sum = self._comp = 0.0
+                else:
+                    delta = old - self._mean
+                    self._mean -= delta / self.count
+                    self._m2 -= delta * (old - self._mean)
+                if self._sorted is not None:
+                    self._sorted.remove(old)
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= max(self.min_periods, 1)
+
+    @property
+    def sum(self) -> float:
+        return self._sum if self.ready else math.nan
+
+    @property
+    def mean(self) -> float:
+        if not self.ready:
+            return math.nan
+        return self._last if self._same >= self.count else self._sum / self.count
+
+    @property
+    def var(self) -> float:
+        """樣本變異數（ddof=1，同 pandas）。"""
+        if not self.ready or self.count < 2:
+            return math.nan
+        if self._same >= self.count:
+            return 0.0
+        return max(self._m2, 0.0) / (self.count - 1)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+    def quantile(self, q: float) -> float:
+        """分位數（線性內插，同 ``rolling().quantile(q)``）。"""
+        if not self.ready:
+            return math.nan
+        pos = q * (self.count - 1)
+        lo = int(math.floor(pos))
+        frac = pos - lo
+        low = self._sorted[lo]
+        if frac == 0:
+            return low
+        return low + (self._sorted[lo + 1] - low) * frac
+
+    def stats(self, suffix: str = "") -> dict:
+        """目前的全部統計值，例如 ``{"sum_7": ..., "mean_7": ..., "p50_7": ...}``。"""
+        out = {f"{name}{suffix}": getattr(self, name) for name in STATS}
+        for q in self.quantiles:
+            out[f"{quantile_name(q)}{suffix}"] = self.quantile(q)
+        return out
+
+
+def quantile_name(q: float) -> str:
+    """0.5 → ``p50``、0.025 → ``p2.5``。"""
+    return f"p{q * 100:g}"
+
+
+class RollingStats:
+    """同一條序列上同時維護多個視窗長度。"""
+
+    def __init__(self, windows: Sequence[int] = (3,), quantiles: Sequence[float] = (0.5,),
+                 min_periods: Optional[int] = None):
+        self.windows = [RollingWindow(w, quantiles, min_periods) for w in windows]
+
+    def update(self, x: float) -> dict:
+        """推入一個值，回傳所有視窗的統計（欄名加上 ``_w`` 後綴）。"""
+        row = {}
+        for win in self.windows:
+            win.update(x)
+            row.update(win.stats(f"_{win.window}"))
+        return row
+
+
+# ============================================================
+# 訂單事件 → 每日（每月）序列 → 移動統計
+# ============================================================
+
+class DailyRollingEngine:
+    """吃逐筆訂單事件（依日期非遞減），維護每個 key 的每日營收移動統計。
+
+    一個時間桶（日或月）結束時，各 key 當期的營收推進各自的視窗並產生一列輸出；
+    某 key 中間沒有訂單的桶補 0，所以結果同 ``groupby(key).resample(freq).sum().rolling(w)``。
+
+    Args:
+        windows: 視窗長度（以桶數計），可同時多個。
+        quantiles: 要維護的分位數。
+        min_periods: 同 pandas rolling；預設等於各自的 window。
+        freq: ``"D"``（每日）或 ``"M"``（每月，輸出日期為月底，同 ``resample('ME')``）。
+    """
+
+    def __init__(self, windows: Sequence[int] = (3,), quantiles: Sequence[float] = (0.5,),
+                 min_periods: Optional[int] = None, freq: str = "D"):
+        if freq not in ("D", "M"):
+            raise ValueError(f"freq 只能是 'D' 或 'M'，收到 {freq!r}")
+        self.windows = tuple(windows)
+        self.quantiles = tuple(quantiles)
+        self.min_periods = min_periods
+        self.freq = freq
+        self.current: Optional[int] = None          # 目前尚未結束的桶（datetime64[freq] 整數）
+        self._open: dict = {}                       # key → 目前桶的累計營收
+        self._last: dict = {}                       # key → 最後一個已推入視窗的桶
+        self._stats: dict = {}                      # key → RollingStats
+        self._latest: dict = {}                     # key → 最後一列輸出
+
+    def _bucket(self, date) -> int:
+        return int(np.datetime64(pd.Timestamp(date), self.freq).astype(np.int64))
+
+    def _label(self, bucket: int) -> pd.Timestamp:
+        if self.freq == "D":
+            return pd.Timestamp(np.datetime64(bucket, "D"))
+        return pd.Timestamp((np.datetime64(bucket + 1, "M").astype("datetime64[D]") - 1))
+
+    def _close(self) -> list[dict]:
+        """結束目前的桶：每個有訂單的 key 補上缺的空桶，再推入本桶營收。"""
+        rows = []
+        for key, total in self._open.items():
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = RollingStats(self.windows, self.quantiles, self.min_periods)
+            last = self._last.get(key)
+            if last is not None:
+                for gap in range(last + 1, self.current):
+                    rows.append(self._emit(key, gap, stats.update(0.0)))
+            rows.append(self._emit(key, self.current, stats.update(total)))
+            self._last[key] = self.current
+        self._open = {}
+        return rows
+
+    def _emit(self, key, bucket: int, stats: dict) -> dict:
+        row = {"key": key, "date": self._label(bucket), **stats}
+        self._latest[key] = row
+        return row
+
+    def push(self, date, amount: float, key=None) -> list[dict]:
+        """推入一筆訂單；若它開啟了新的桶，回傳上一個桶結束時產生的各列。
+
+        Raises:
+            ValueError: 訂單日期早於目前的桶（事件未依日期排序）。
+        """
+        return self._push_bucket(self._bucket(date), [(key, float(amount))])
+
+    def _push_bucket(self, bucket: int, items: Iterable[tuple]) -> list[dict]:
+        rows = []
+        if self.current is None:
+            self.current = bucket
+        elif bucket < self.current:
+            raise ValueError(f"事件未依日期排序：{self._label(bucket).date()} 早於 {self._label(self.current).date()}")
+        elif bucket > self.current:
+            rows = self._close()
+            self.current = bucket
+        for key, amount in items:
+            if amount == amount:  # 缺值金額不計（同 resample().sum() 的 skipna）
+                self._open[key] = self._open.get(key, 0.0) + amount
+            else:
+                self._open.setdefault(key, 0.0)
+        return rows
+
+    def push_frame(self, df: pd.DataFrame, date: str = "order_date", amount: str = "amount",
+                   key: Optional[str] = None) -> list[dict]:
+        """推入一整塊已依日期排序的訂單（例如 ``read_csv(chunksize=...)`` 的一塊）。
+
+        塊內先以向量化方式彙總成 (桶, key) 的營收，Python 迴圈只跑「桶 × key」次。
+        """
+        buckets = pd.to_datetime(df[date]).to_numpy(dtype="datetime64[ns]").astype(f"datetime64[{self.freq}]")
+        valid = ~np.isnat(buckets)
+        codes = buckets[valid].view(np.int64)
+        if len(codes) and (np.diff(codes) < 0).any():
+            raise ValueError("push_frame 的資料需依日期排序")
+        amounts = df[amount].to_numpy(dtype=np.float64)[valid]
+        keys = df[key].to_numpy()[valid] if key is not None else np.zeros(len(codes), dtype=np.int8)
+
+        # 依 (桶, key) 加總；sum 跳過缺值，全缺值的組合仍保留（營收 0），與逐筆 push 一致
+        grouped = pd.DataFrame({"b": codes, "k": keys, "a": amounts}).groupby(
+            ["b", "k"], sort=False, dropna=False)["a"].sum()
+        rows = []
+        bounds = np.flatnonzero(np.diff(grouped.index.get_level_values(0))) + 1
+        starts = np.concatenate([[0], bounds])
+        ends = np.concatenate([bounds, [len(grouped)]])
+        bucket_of = grouped.index.get_level_values(0)
+        key_of = grouped.index.get_level_values(1) if key is not None else [None] * len(grouped)
+        sums = grouped.to_numpy()
+        for s, e in zip(starts, ends):
+            if s == e:
+                continue
+            items = [(key_of[i], sums[i]) for i in range(s, e)]
+            rows.extend(self._push_bucket(int(bucket_of[s]), items))
+        return rows
+
+    def flush(self) -> list[dict]:
+        """結束目前的桶（資料流結束、或每天收盤時呼叫）。"""
+        if self.current is None:
+            return []
+        return self._close()
+
+    def latest(self, key=None) -> Optional[dict]:
+        """某 key 最近一次輸出的統計列。"""
+        return self._latest.get(key)
+
+
+def rolling_frame(data, date: str = "order_date", amount: str = "amount", key: Optional[str] = None,
+                  windows: Sequence[int] = (3,), quantiles: Sequence[float] = (0.5,),
+                  min_periods: Optional[int] = None, freq: str = "D") -> pd.DataFrame:
+    """對已依日期排序的訂單批次跑一遍，回傳完整的移動統計表。
+
+    Args:
+        data: DataFrame，或 DataFrame 區塊的 iterable（例如 ``pd.read_csv(path, chunksize=...)``）。
+        其餘參數同 :class:`DailyRollingEngine`。
+
+    Returns:
+        index 為 (key, date)（沒有 key 時只有 date）、欄位為 ``sum_w`` / ``mean_w`` / ``var_w`` /
+        ``std_w`` / ``p50_w`` … 的 DataFrame。
+    """
+    engine = DailyRollingEngine(windows, quantiles, min_periods, freq)
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    rows = []
+    for chunk in chunks:
+        rows.extend(engine.push_frame(chunk, date, amount, key))
+    rows.extend(engine.flush())
+    columns = ["key", "date"] + [f"{s}_{w}" for w in windows for s in (*STATS, *map(quantile_name, quantiles))]
+    table = pd.DataFrame(rows, columns=columns)
+    if key is None:
+        return table.drop(columns="key").set_index("date")
+    return table.rename(columns={"key": key}).sort_values([key, "date"], kind="stable").set_index([key, "date"])
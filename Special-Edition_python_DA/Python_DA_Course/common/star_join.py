@@ -0,0 +1,164 @@
+"""星狀結構（star schema）維度快取與 join。
+
+S3 / M3 ``green_load_and_merge``、S6 / M6 ``yellow_clean_and_merge`` 每次都重新讀
+``customers.csv``、``products.csv``，再做兩次完整的 ``pd.merge``（hash join）。
+訂單是事實表（fact），顧客、商品是維度表（dimension）：維度小、鍵是整數，
+所以可以只載入一次，把「鍵 → 列位置」做成陣列，join 時直接依位置 ``take``：
+
+- 鍵範圍夠密：``slot[key - min]`` 就是列位置，不做 hash
+- 鍵很稀疏：退回 ``pd.Index.get_indexer``（索引只建一次）
+- 找不到的鍵同 LEFT JOIN：整數欄升為 float 並補 NaN，結果與 ``merge(how='left')`` 相同
+- 可逐區塊處理（``enrich_chunks``），事實表不必整份進記憶體
+
+使用方式：
+    from common.star_join import load_star
+    star = load_star("datasets/ecommerce")               # 同一路徑只讀一次
+    enriched = star.enrich(orders)                       # = orders.merge(customers, how="left").merge(products, how="left")
+    for chunk in star.enrich_chunks(pd.read_csv(path, chunksize=1_000_000)):
+        ...
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+
+# 鍵範圍 ≤ 列數 × 這個倍數（或 2^20 以內）時，用陣列直接定址
+_DENSE_SPAN_FACTOR = 16
+_DENSE_SPAN_MIN = 1 << 20
+
+
+class Dimension:
+    """可依整數鍵以位置定址的維度表。
+
+    Args:
+        table: 維度 DataFrame，key 欄不可重複。
+        key: 鍵欄名（例如 ``customer_id``）。
+        columns: 要附加到事實表的欄位，預設為 key 以外的全部欄位。
+        categorical: 字串欄輸出成 ``pd.Categorical``（較省記憶體）；預設輸出 object，與 merge 相同。
+    """
+
+    def __init__(self, table: pd.DataFrame, key: str, columns: Optional[list[str]] = None,
+                 categorical: bool = False):
+        keys = table[key]
+        if keys.duplicated().any():
+            raise ValueError(f"維度表的 {key} 有重複值，無法當作 join 鍵")
+        self.key = key
+        self.columns = [c for c in (columns or table.columns) if c != key]
+        self.categorical = categorical
+        self._values = {}
+        self._codes = {}
+        for c in self.columns:
+            values = table[c].to_numpy()
+            if values.dtype == object:
+                # 字串欄先 factorize：join 時只 take 整數代碼，再對很小的 uniques 查表，
+                # 比直接對百萬列的 object 陣列做隨機 take 快得多
+                codes, uniques = pd.factorize(values)
+                self._codes[c] = (codes, uniques, bool((codes < 0).any()))
+            else:
+                self._values[c] = values
+
+        self._slot = None
+        self._index = None
+        key_values = keys.to_numpy()
+        if len(key_values) and np.issubdtype(key_values.dtype, np.integer):
+            lo, hi = int(key_values.min()), int(key_values.max())
+            if hi - lo < max(_DENSE_SPAN_FACTOR * len(key_values), _DENSE_SPAN_MIN):
+                self._lo = lo
+                self._slot = np.full(hi - lo + 1, -1, dtype=np.intp)
+                self._slot[key_values - lo] = np.arange(len(key_values))
+        if self._slot is None:
+            self._index = pd.Index(key_values)
+
+    def __len__(self) -> int:
+        return len(self._slot) if self._index is None else len(self._index)
+
+    def positions(self, fact_keys) -> np.ndarray:
+        """事實表的鍵 → 維度表的列位置，找不到為 -1。"""
+        fact_keys = np.asarray(fact_keys)
+        if self._slot is None:
+            return self._index.get_indexer(fact_keys)
+        if not np.issubdtype(fact_keys.dtype, np.integer):
+            # 含 NaN 的鍵欄會被讀成 float：NaN 與非整數值都視為找不到
+            ok = np.isfinite(fact_keys) & (fact_keys == np.round(fact_keys))
+            as_int = np.where(ok, fact_keys, self._lo - 1).astype(np.int64)
+        else:
+            as_int = fact_keys.astype(np.int64, copy=False)
+        offset = as_int - self._lo
+        inside = (offset >= 0) & (offset < len(self._slot))
+        pos = np.full(len(offset), -1, dtype=np.intp)
+        pos[inside] = self._slot[offset[inside]]
+        return pos
+
+    def take(self, positions: np.ndarray) -> dict:
+        """依位置取出維度欄位，-1 補缺值（同 LEFT JOIN）。"""
+        missing = bool((positions < 0).any())
+        out = {}
+        for c in self.columns:
+            if c in self._values:
+                out[c] = take(self._values[c], positions, allow_fill=missing)
+                continue
+            codes, uniques, has_na = self._codes[c]
+            taken = take(codes, positions, allow_fill=missing, fill_value=-1)
+            if self.categorical:
+                out[c] = pd.Categorical.from_codes(taken, categories=uniques)
+            else:
+                # 代碼 -1 = 找不到的鍵或維度表本身的缺值
+                out[c] = take(uniques, taken, allow_fill=missing or has_na)
+        return out
+
+
+class StarSchema:
+    """事實表外鍵 → 維度表的對應集合。
+
+    Args:
+        dimensions: 依 join 順序排列的 Dimension，每個以自己的 key 對到事實表同名欄位。
+    """
+
+    def __init__(self, dimensions: list[Dimension]):
+        self.dimensions = list(dimensions)
+        names = [c for d in self.dimensions for c in d.columns]
+        if len(names) != len(set(names)):
+            raise ValueError("不同維度表有同名欄位，請用 Dimension(columns=...) 挑選")
+
+    def enrich(self, facts: pd.DataFrame) -> pd.DataFrame:
+        """把維度欄位附加到事實表，欄位順序與 ``facts.merge(d1).merge(d2)`` 相同。
+
+        保留 facts 原本的 index（逐區塊處理時方便對回原始列號）。
+        """
+        overlap = set(facts.columns) & {c for d in self.dimensions for c in d.columns}
+        if overlap:
+            raise ValueError(f"事實表已有欄位 {sorted(overlap)}，請先移除或用 Dimension(columns=...) 排除")
+        columns = {c: facts[c].to_numpy() for c in facts.columns}
+        for dim in self.dimensions:
+            columns.update(dim.take(dim.positions(facts[dim.key].to_numpy())))
+        return pd.DataFrame(columns, index=facts.index, copy=False)
+
+    def enrich_chunks(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """逐區塊 enrich（例如 ``pd.read_csv(chunksize=...)`` 的輸出）。"""
+        for chunk in chunks:
+            yield self.enrich(chunk)
+
+
+def build_star(customers: pd.DataFrame, products: pd.DataFrame, categorical: bool = False) -> StarSchema:
+    """電商資料集的星狀結構：orders × customers × products。"""
+    return StarSchema([Dimension(customers, "customer_id", categorical=categorical),
+                       Dimension(products, "product_id", categorical=categorical)])
+
+
+@lru_cache(maxsize=8)
+def _load_star(customers_path: str, products_path: str, mtimes: tuple, categorical: bool) -> StarSchema:
+    return build_star(pd.read_csv(customers_path), pd.read_csv(products_path), categorical=categorical)
+
+
+def load_star(datasets_dir: str | Path = "datasets/ecommerce", categorical: bool = False) -> StarSchema:
+    """讀入 customers.csv / products.csv 並建好索引；同一份檔案在同一行程只讀一次（檔案更新會重讀）。"""
+    datasets_dir = Path(datasets_dir).resolve()
+    customers = datasets_dir / "customers.csv"
+    products = datasets_dir / "products.csv"
+    mtimes = (customers.stat().st_mtime_ns, products.stat().st_mtime_ns)
+    return _load_star(str(customers), str(products), mtimes, categorical)
@@ -8,17 +8,35 @@
 
 三份資料透過 product_id / customer_id 可以 join，日期橫跨 12 個月讓 S4 能做時序分析。
 
-執行方式：python _generate.py
+規模化（--scale）：
+- scale=1（預設）：逐列 Python random 流程，逐位元重現 repo 中的課堂資料
+- scale>1：NumPy Generator 向量化產生，每 BLOCK_ROWS 筆訂單一個區塊、
+  分塊寫出 CSV / Parquet，記憶體只跟區塊大小有關，與總筆數無關
+  - 訂單數 = 200 × scale（最多 10^8），顧客數 = 26 × scale，商品主檔固定 30 筆
+  - 髒資料比例與課堂版相同：8% 缺日期、15% "$1,234" 金額、5% 缺 qty、5% 重複列
+  - 每個區塊的亂數由 (seed, 區塊編號) 決定，同樣參數必產出同樣檔案
+
+執行方式：
+  python _generate.py                                        # 課堂用小資料
+  python _generate.py --scale 5000 --out big/                # 100 萬筆訂單
+  python _generate.py --scale 500000 --format parquet --out big/   # 10^8 筆訂單
 """
+import argparse
 import csv
 import random
 from datetime import date, timedelta
+from pathlib import Path
+
+SEED = 42  # 讓每次產出一致，學員環境可重現
 
-random.seed(42)  # 讓每次產出一致，學員環境可重現
+# 大資料模式每個區塊的訂單數（決定記憶體上限，也決定亂數切分方式，不要隨意更改）
+BLOCK_ROWS = 1_000_000
 
-OUT_DIR = "."
+BASE_ORDERS = 200
+BASE_DUPLICATES = 10
+MAX_ORDERS = 10 ** 8
 
-# ---------- products.csv ----------
+# ---------- 共用設定 ----------
 CATEGORIES = ["Electronics", "Books", "Clothing", "Home", "Sports"]
 PRODUCT_NAMES = {
     "Electronics": ["Wireless Mouse", "USB-C Cable", "Bluetooth Speaker", "Webcam HD", "Laptop Stand", "Power Bank"],
@@ -27,91 +45,306 @@ PRODUCT_NAMES = {
     "Home":        ["Coffee Mug", "Desk Lamp", "Throw Pillow", "Candle Set", "Wall Clock", "Plant Pot"],
     "Sports":      ["Yoga Mat", "Dumbbell 5kg", "Running Shoes", "Water Bottle", "Jump Rope", "Resistance Band"],
 }
+PRODUCT_FIELDS = ["product_id", "product_name", "category", "unit_price", "stock_qty"]
 
-products = []
-pid = 1001
-for cat in CATEGORIES:
-    for name in PRODUCT_NAMES[cat]:
-        price = round(random.uniform(80, 2500), 0)
-        stock = random.randint(0, 300)
-        products.append({
-            "product_id": pid,
-            "product_name": name,
-            "category": cat,
-            "unit_price": int(price),
-            "stock_qty": stock,
-        })
-        pid += 1
-
-with open(f"{OUT_DIR}/products.csv", "w", newline="", encoding="utf-8") as f:
-    w = csv.DictWriter(f, fieldnames=["product_id", "product_name", "category", "unit_price", "stock_qty"])
-    w.writeheader()
-    w.writerows(products)
-
-print(f"products.csv: {len(products)} rows")
-
-# ---------- customers.csv ----------
 REGIONS = ["North", "South", "East", "West"]
+VIP_LEVELS = ["Bronze", "Silver", "Gold", "Platinum"]
 FIRST_NAMES = ["Alice", "Bob", "Carol", "David", "Emma", "Frank", "Grace", "Henry",
                "Ivy", "Jack", "Kate", "Leo", "Mia", "Nick", "Olivia", "Paul",
                "Quinn", "Rachel", "Sam", "Tina", "Uma", "Victor", "Wendy", "Xander", "Yuki", "Zoe"]
 LAST_NAMES = ["Chen", "Wang", "Liu", "Lin", "Huang"]
+CUSTOMER_FIELDS = ["customer_id", "customer_name", "region", "signup_date", "vip_level"]
+
+# 亂欄名：有尾端空白、大小寫不一致
+HEADERS = ["Order_ID ", "customer_id", "Product_ID", " qty", "order_date", "amount"]
+
+SIGNUP_START = date(2023, 1, 1)
+ORDER_START = date(2025, 1, 1)
+
+# 刻意污染資料的比例
+MISSING_DATE_RATE = 0.08
+DIRTY_AMOUNT_RATE = 0.15
+MISSING_QTY_RATE = 0.05
+
+
+# ============================================================
+# 課堂版（scale=1）：逐列 Python random，與 repo 內檔案逐位元相同
+# ============================================================
+
+def _make_products(rng: random.Random) -> list[dict]:
+    products = []
+    pid = 1001
+    for cat in CATEGORIES:
+        for name in PRODUCT_NAMES[cat]:
+            price = round(rng.uniform(80, 2500), 0)
+            stock = rng.randint(0, 300)
+            products.append({
+                "product_id": pid,
+                "product_name": name,
+                "category": cat,
+                "unit_price": int(price),
+                "stock_qty": stock,
+            })
+            pid += 1
+    return products
+
+
+def _make_customers(rng: random.Random) -> list[dict]:
+    customers = []
+    for i, fn in enumerate(FIRST_NAMES):
+        cid = 2001 + i
+        customers.append({
+            "customer_id": cid,
+            "customer_name": f"{fn} {rng.choice(LAST_NAMES)}",
+            "region": rng.choice(REGIONS),
+            "signup_date": (SIGNUP_START + timedelta(days=rng.randint(0, 500))).isoformat(),
+            "vip_level": rng.choice(VIP_LEVELS),
+        })
+    return customers
+
+
+def _make_orders(rng: random.Random, customers: list[dict], products: list[dict]) -> list[list]:
+    rows = []
+    for oid in range(5001, 5001 + BASE_ORDERS):
+        customer = rng.choice(customers)["customer_id"]
+        product = rng.choice(products)
+        qty = rng.randint(1, 5)
+        d = ORDER_START + timedelta(days=rng.randint(0, 364))
+        amount = product["unit_price"] * qty
+
+        # 1) ~8% 訂單日期缺失
+        date_str = "" if rng.random() < MISSING_DATE_RATE else d.isoformat()
+        # 2) ~15% amount 寫成帶 $ 和逗號的字串（模擬從 Excel 抓來的髒資料）
+        if rng.random() < DIRTY_AMOUNT_RATE:
+            amount_str = f"${amount:,}"
+        else:
+            amount_str = str(amount)
+        # 3) ~5% qty 缺失
+        qty_str = "" if rng.random() < MISSING_QTY_RATE else str(qty)
+
+        rows.append([oid, customer, product["product_id"], qty_str, date_str, amount_str])
+
+    # 4) 塞入 10 筆重複列（同一 order_id 出現兩次）
+    for _ in range(BASE_DUPLICATES):
+        rows.append(rng.choice(rows[:]))
+
+    # 5) 打亂順序模擬真實情況
+    rng.shuffle(rows)
+    return rows
+
+
+def _write_dicts(path: Path, fieldnames: list[str], rows: list[dict]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fieldnames)
+        w.writeheader()
+        w.writerows(rows)
+
+
+def generate_classroom(out_dir: Path, seed: int = SEED) -> None:
+    """產生課堂用的 30 商品 / 26 顧客 / 210 筆訂單。"""
+    rng = random.Random(seed)
+
+    products = _make_products(rng)
+    _write_dicts(out_dir / "products.csv", PRODUCT_FIELDS, products)
+    print(f"products.csv: {len(products)} rows")
+
+    customers = _make_customers(rng)
+    _write_dicts(out_dir / "customers.csv", CUSTOMER_FIELDS, customers)
+    print(f"customers.csv: {len(customers)} rows")
+
+    rows = _make_orders(rng, customers, products)
+    with open(out_dir / "orders_raw.csv", "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(HEADERS)
+        w.writerows(rows)
+    print(f"orders_raw.csv: {len(rows)} rows "
+          f"(含 {BASE_DUPLICATES} 筆重複 + 約 8% 缺日期 + 15% 字串金額)")
+
+
+# ============================================================
+# 大資料版（scale>1）：NumPy Generator 向量化 + 分塊寫出
+# ============================================================
 
-customers = []
-for i, fn in enumerate(FIRST_NAMES):
-    cid = 2001 + i
-    customers.append({
-        "customer_id": cid,
-        "customer_name": f"{fn} {random.choice(LAST_NAMES)}",
-        "region": random.choice(REGIONS),
-        "signup_date": (date(2023, 1, 1) + timedelta(days=random.randint(0, 500))).isoformat(),
-        "vip_level": random.choice(["Bronze", "Silver", "Gold", "Platinum"]),
+def _dollar_strings(amount):
+    """向量化版 f"${amount:,}"（非負整數）。"""
+    import numpy as np
+
+    groups = []
+    rest = amount.astype("int64")
+    while True:
+        groups.append(rest % 1000)
+        rest = rest // 1000
+        if not rest.any():
+            break
+
+    text = np.full(len(amount), "", dtype=object)
+    started = np.zeros(len(amount), dtype=bool)
+    for i, g in enumerate(reversed(groups)):
+        is_last = i == len(groups) - 1
+        piece = np.where(started, np.char.zfill(g.astype(str), 3), g.astype(str)).astype(object)
+        emit = started | (g > 0) | is_last
+        text = np.where(started, text + "," + piece, np.where(emit, piece, text))
+        started |= emit
+    return "$" + text
+
+
+class _ChunkWriter:
+    """把 DataFrame 區塊依序附加到 CSV 與（可選）Parquet。"""
+
+    def __init__(self, out_dir: Path, stem: str, formats: set[str]):
+        self.csv_path = out_dir / f"{stem}.csv" if "csv" in formats else None
+        self.parquet_path = out_dir / f"{stem}.parquet" if "parquet" in formats else None
+        self._parquet = None
+        self._first = True
+        self.rows = 0
+
+    def write(self, df) -> None:
+        if self.csv_path is not None:
+            df.to_csv(self.csv_path, mode="w" if self._first else "a", header=self._first,
+                      index=False, lineterminator="\r\n", encoding="utf-8")
+        if self.parquet_path is not None:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.parquet_path, table.schema)
+            self._parquet.write_table(table)
+        self._first = False
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def _block_rng(seed: int, table: str, block: int):
+    import numpy as np
+
+    return np.random.default_rng([seed, sum(map(ord, table)), block])
+
+
+def _blocks(total: int):
+    for block, start in enumerate(range(0, total, BLOCK_ROWS)):
+        yield block, start, min(start + BLOCK_ROWS, total)
+
+
+def _customer_block(seed: int, block: int, start: int, stop: int):
+    import numpy as np
+    import pandas as pd
+
+    rng = _block_rng(seed, "customers", block)
+    n = stop - start
+    idx = np.arange(start, stop)
+    first = np.asarray(FIRST_NAMES, dtype=object)[idx % len(FIRST_NAMES)]
+    last = np.asarray(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), n)]
+    signup = np.datetime64(SIGNUP_START.isoformat()) + rng.integers(0, 501, n)
+    return pd.DataFrame({
+        "customer_id": 2001 + idx,
+        "customer_name": first + " " + last,
+        "region": np.asarray(REGIONS, dtype=object)[rng.integers(0, len(REGIONS), n)],
+        "signup_date": np.datetime_as_string(signup, unit="D"),
+        "vip_level": np.asarray(VIP_LEVELS, dtype=object)[rng.integers(0, len(VIP_LEVELS), n)],
     })
 
-with open(f"{OUT_DIR}/customers.csv", "w", newline="", encoding="utf-8") as f:
-    w = csv.DictWriter(f, fieldnames=["customer_id", "customer_name", "region", "signup_date", "vip_level"])
-    w.writeheader()
-    w.writerows(customers)
 
-print(f"customers.csv: {len(customers)} rows")
+def _order_block(seed: int, block: int, start: int, stop: int,
+                 n_customers: int, product_ids, unit_prices):
+    import numpy as np
+    import pandas as pd
 
-# ---------- orders_raw.csv (intentionally dirty) ----------
-# 亂欄名：有尾端空白、大小寫不一致
-HEADERS = ["Order_ID ", "customer_id", "Product_ID", " qty", "order_date", "amount"]
+    rng = _block_rng(seed, "orders", block)
+    n = stop - start
+    customer = 2001 + rng.integers(0, n_customers, n)
+    pidx = rng.integers(0, len(product_ids), n)
+    qty = rng.integers(1, 6, n)
+    day = rng.integers(0, 365, n)
+    amount = unit_prices[pidx] * qty
+
+    # 刻意污染資料：與課堂版相同比例
+    missing_date = rng.random(n) < MISSING_DATE_RATE
+    dirty_amount = rng.random(n) < DIRTY_AMOUNT_RATE
+    missing_qty = rng.random(n) < MISSING_QTY_RATE
+
+    order_date = np.datetime_as_string(np.datetime64(ORDER_START.isoformat()) + day, unit="D")
+    amount_str = amount.astype(str).astype(object)
+    amount_str[dirty_amount] = _dollar_strings(amount[dirty_amount])
+
+    df = pd.DataFrame({
+        HEADERS[0]: np.arange(start, stop) + 5001,
+        HEADERS[1]: customer,
+        HEADERS[2]: product_ids[pidx],
+        HEADERS[3]: np.where(missing_qty, "", qty.astype(str)).astype(object),
+        HEADERS[4]: np.where(missing_date, "", order_date).astype(object),
+        HEADERS[5]: amount_str,
+    })
+
+    # 重複列（比例同課堂版 10/200）+ 區塊內打亂
+    n_dup = round(n * BASE_DUPLICATES / BASE_ORDERS)
+    order = np.concatenate([np.arange(n), rng.integers(0, n, n_dup)])
+    return df.iloc[rng.permutation(order)]
 
-rows = []
-start = date(2025, 1, 1)
-for oid in range(5001, 5201):  # 200 orders
-    customer = random.choice(customers)["customer_id"]
-    product = random.choice(products)
-    qty = random.randint(1, 5)
-    d = start + timedelta(days=random.randint(0, 364))
-    amount = product["unit_price"] * qty
-
-    # 刻意污染資料
-    # 1) ~8% 訂單日期缺失
-    date_str = "" if random.random() < 0.08 else d.isoformat()
-    # 2) ~15% amount 寫成帶 $ 和逗號的字串（模擬從 Excel 抓來的髒資料）
-    if random.random() < 0.15:
-        amount_str = f"${amount:,}"
-    else:
-        amount_str = str(amount)
-    # 3) ~5% qty 缺失
-    qty_str = "" if random.random() < 0.05 else str(qty)
 
-    rows.append([oid, customer, product["product_id"], qty_str, date_str, amount_str])
+def generate_scaled(out_dir: Path, scale: int, seed: int = SEED,
+                    formats: frozenset = frozenset({"csv"})) -> None:
+    """產生 200 × scale 筆訂單的大資料版，逐區塊寫出。"""
+    import numpy as np
+    import pandas as pd
 
-# 4) 塞入 10 筆重複列（同一 order_id 出現兩次）
-for _ in range(10):
-    rows.append(random.choice(rows[:]))
+    n_orders = BASE_ORDERS * scale
+    n_customers = len(FIRST_NAMES) * scale
+    if n_orders > MAX_ORDERS:
+        raise ValueError(f"訂單數 {n_orders:,} 超過上限 {MAX_ORDERS:,}")
+    if "parquet" in formats:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("[generate] 未安裝 pyarrow，略過 Parquet 輸出（pip install pyarrow）")
+            formats = formats - {"parquet"}
 
-# 5) 打亂順序模擬真實情況
-random.shuffle(rows)
+    # 商品主檔維持 30 筆，沿用課堂版的產生方式
+    products = pd.DataFrame(_make_products(random.Random(seed)), columns=PRODUCT_FIELDS)
+    writer = _ChunkWriter(out_dir, "products", formats)
+    writer.write(products)
+    writer.close()
+    print(f"products: {writer.rows:,} rows")
+
+    writer = _ChunkWriter(out_dir, "customers", formats)
+    for block, start, stop in _blocks(n_customers):
+        writer.write(_customer_block(seed, block, start, stop))
+    writer.close()
+    print(f"customers: {writer.rows:,} rows")
+
+    product_ids = products["product_id"].to_numpy()
+    unit_prices = products["unit_price"].to_numpy()
+    writer = _ChunkWriter(out_dir, "orders_raw", formats)
+    for block, start, stop in _blocks(n_orders):
+        writer.write(_order_block(seed, block, start, stop, n_customers, product_ids, unit_prices))
+        print(f"  orders_raw: {stop:,} / {n_orders:,}", end="\r")
+    writer.close()
+    print(f"orders_raw: {writer.rows:,} rows（{n_orders:,} 筆訂單 + 約 5% 重複列）")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="電商資料集生成器")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="訂單數 = 200 × scale（1 = 課堂版，最多 500000 = 10^8 筆）")
+    parser.add_argument("--seed", type=int, default=SEED, help="亂數種子")
+    parser.add_argument("--out", default=".", help="輸出資料夾")
+    parser.add_argument("--format", default="csv",
+                        help="輸出格式，逗號分隔：csv,parquet（僅 scale>1 支援 parquet）")
+    args = parser.parse_args()
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    formats = frozenset(x.strip() for x in args.format.split(",") if x.strip())
+
+    if args.scale <= 1:
+        generate_classroom(out_dir, seed=args.seed)
+    else:
+        generate_scaled(out_dir, args.scale, seed=args.seed, formats=formats)
+    print("\n全部資料集生成完畢。")
 
-with open(f"{OUT_DIR}/orders_raw.csv", "w", newline="", encoding="utf-8") as f:
-    w = csv.writer(f)
-    w.writerow(HEADERS)
-    w.writerows(rows)
 
-print(f"orders_raw.csv: {len(rows)} rows (含 10 筆重複 + 約 8% 缺日期 + 15% 字串金額)")
-print("\n全部資料集生成完畢。")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""Per-cell time and memory profiler for notebooks.
+
+Executes a notebook in a fresh kernel and records, for every code cell:
+
+- wall time (measured around the execute request)
+- CPU time of the kernel process (user + system, all threads, via ``os.times``)
+- RSS before / after and the peak RSS reached *during* the cell; on Linux the
+  kernel's high-water mark is reset before each cell (``/proc/self/clear_refs``),
+  elsewhere only the before / after RSS is available and ``peak`` is None
+
+The result is a ranked text report plus a JSON file; ``diff`` compares two
+JSON runs cell by cell (matched on the cell source) and exits non-zero when
+a cell got noticeably slower or hungrier, e.g. after a library upgrade.
+
+Course notebooks run in the same sandbox as tests/notebook_runner.py;
+notebooks elsewhere (Master-Advance, Classic-Edition) run in their own
+directory, as they would in Jupyter.
+
+Run (from ``Python_DA_Course/``):
+    python tests/notebook_profiler.py run M3_Pandas_Advanced/S4_timeseries_eda.ipynb --json s4.json
+    python tests/notebook_profiler.py run ../../Master-Advance/competition/Inferential_Statistics/05_*.ipynb
+    python tests/notebook_profiler.py diff before.json after.json
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+from tests.notebook_runner import RUNNER_CONFIG, _execute_cell, _sandbox, _workdir  # noqa: E402
+
+PROFILE_CONFIG = {
+    "top": 10,               # rows per ranking in the text report
+    "slower": 0.2,           # diff: flag a cell 20% slower ...
+    "min_seconds": 0.5,      # ... and at least this many seconds slower
+    "min_mb": 20.0,          # diff: flag a cell whose peak grew by this many MB (and 20%)
+}
+
+MB = 1024 * 1024
+
+# Defined once in the kernel; returns CPU seconds, RSS and high-water mark as JSON.
+_PROBE = r'''
+def __nbprof_probe(reset):
+    import json, os
+    t = os.times()
+    rss = hwm = None
+    resettable = False
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"):
+                    hwm = int(line.split()[1]) * 1024
+        if reset:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+        resettable = True
+    except OSError:
+        try:
+            import psutil
+            rss = psutil.Process().memory_info().rss
+        except ImportError:
+            pass
+    return json.dumps({"cpu": t.user + t.system, "rss": rss, "hwm": hwm, "resettable": resettable})
+'''
+
+
+# ============================================================
+# Kernel-side probe
+# ============================================================
+
+async def _silent(kc, code: str, expression: Optional[str] = None, timeout: float = 30) -> Optional[dict]:
+    """Run code without touching history / outputs; return the JSON value of ``expression``."""
+    msg_id = kc.execute(code, silent=True, store_history=False,
+                        user_expressions={"probe": expression} if expression else None)
+    while True:
+        msg = await kc.get_shell_msg(timeout=timeout)
+        if msg["parent_header"].get("msg_id") == msg_id:
+            break
+    if expression is None:
+        return None
+    value = msg["content"]["user_expressions"]["probe"]
+    if value.get("status") != "ok":
+        raise RuntimeError(f"profiler probe failed: {value.get('ename')}: {value.get('evalue')}")
+    return json.loads(ast.literal_eval(value["data"]["text/plain"]))
+
+
+def _first_line(source: str) -> str:
+    for line in source.splitlines():
+        if line.strip():
+            return line.strip()[:60]
+    return ""
+
+
+def _source_hash(source: str) -> str:
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+# ============================================================
+# Profiling
+# ============================================================
+
+def profile_notebook(path: str | Path, timeout: Optional[int] = None, keep_going: bool = False) -> dict:
+    """Execute a notebook and measure every code cell.
+
+    Args:
+        path: notebook path.
+        timeout: per-cell timeout in seconds (default ``RUNNER_CONFIG["timeout"]``).
+        keep_going: continue after a failing cell (later numbers may then be meaningless).
+
+    Returns:
+        JSON-ready dict: ``notebook``, ``python``, ``platform``, ``started``, ``total``
+        (wall / cpu / peak) and ``cells`` (one dict per executed code cell).
+    """
+    import nbformat
+    from jupyter_core.utils import run_sync
+    from nbclient import NotebookClient
+    from nbclient.exceptions import CellExecutionError, CellTimeoutError
+
+    path = Path(path).resolve()
+    timeout = timeout or RUNNER_CONFIG["timeout"]
+    nb = nbformat.read(path, as_version=4)
+    try:
+        rel_path = path.relative_to(COURSE_ROOT).as_posix()
+    except ValueError:
+        rel_path = None
+
+    cells = []
+    started = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with tempfile.TemporaryDirectory(prefix="nb_prof_") as tmp:
+        cwd = _workdir(_sandbox(Path(tmp), COURSE_ROOT), rel_path) if rel_path else path.parent
+        client = NotebookClient(nb, timeout=timeout, kernel_name=RUNNER_CONFIG["kernel"],
+                                startup_timeout=RUNNER_CONFIG["startup_timeout"],
+                                resources={"metadata": {"path": str(cwd)}})
+        probe = run_sync(_silent)
+        with client.setup_kernel():
+            probe(client.kc, _PROBE)
+            for i, cell in enumerate(nb.cells):
+                if cell.cell_type != "code":
+                    continue
+                before = probe(client.kc, "", "__nbprof_probe(True)")
+                status = "ok"
+                start = time.perf_counter()
+                try:
+                    _execute_cell(client, cell, i, timeout)
+                except CellTimeoutError:
+                    status = "timeout"
+                except CellExecutionError:
+                    status = "error"
+                wall = time.perf_counter() - start
+                after = probe(client.kc, "", "__nbprof_probe(False)") if status != "timeout" else before
+                peak = None
+                if before["resettable"] and after["hwm"] is not None and before["rss"] is not None:
+                    peak = max(after["hwm"] - before["rss"], 0)
+                cells.append({
+                    "index": i,
+                    "execution_count": cell.get("execution_count"),
+                    "source_hash": _source_hash(cell.source),
+                    "first_line": _first_line(cell.source),
+                    "status": status,
+                    "wall": round(wall, 4),
+                    "cpu": round(after["cpu"] - before["cpu"], 4),
+                    "rss_before": before["rss"],
+                    "rss_after": after["rss"],
+                    "peak": peak,
+                })
+                if status != "ok" and not keep_going:
+                    break
+
+    peaks = [c["peak"] for c in cells if c["peak"] is not None]
+    return {
+        "notebook": rel_path or str(path),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started": started,
+        "total": {
+            "cells": len(cells),
+            "wall": round(sum(c["wall"] for c in cells), 4),
+            "cpu": round(sum(c["cpu"] for c in cells), 4),
+            "peak": max(peaks) if peaks else None,
+            "failed": sum(c["status"] != "ok" for c in cells),
+        },
+        "cells": cells,
+    }
+
+
+# ============================================================
+# Reports
+# ============================================================
+
+def _mb(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value / MB:,.1f}"
+
+
+def format_report(profile: dict, top: Optional[int] = None) -> str:
+    """Ranked text report: slowest cells, then the most memory-hungry ones."""
+    top = top or PROFILE_CONFIG["top"]
+    total = profile["total"]
+    lines = [f"[notebook_profiler] {profile['notebook']} — {total['cells']} cells, "
+             f"wall {total['wall']:.2f}s, CPU {total['cpu']:.2f}s, max peak +{_mb(total['peak'])} MB"
+             + (f", {total['failed']} failed" if total["failed"] else "")]
+    header = f"  {'rank':>4}  {'cell':>4}  {'wall(s)':>8}  {'share':>6}  {'cpu(s)':>7}  {'peak(MB)':>9}  first line"
+    rankings = (("slowest cells", "wall"), ("largest memory peaks", "peak"))
+    for title, key in rankings:
+        ranked = sorted((c for c in profile["cells"] if c[key] is not None), key=lambda c: -c[key])[:top]
+        lines += ["", title, header]
+        for rank, c in enumerate(ranked, 1):
+            share = c["wall"] / total["wall"] if total["wall"] else 0.0
+            flag = "" if c["status"] == "ok" else f"  [{c['status']}]"
+            lines.append(f"  {rank:>4}  {c['index']:>4}  {c['wall']:>8.3f}  {share:>6.1%}  {c['cpu']:>7.3f}  "
+                         f"{_mb(c['peak']):>9}  {c['first_line']}{flag}")
+    return "\n".join(lines)
+
+
+def _match(old_cells: list[dict], new_cells: list[dict]) -> list[tuple[Optional[dict], Optional[dict]]]:
+    """Pair cells by source (n-th occurrence of the same source matches the n-th)."""
+    pool: dict = {}
+    for c in old_cells:
+        pool.setdefault(c["source_hash"], []).append(c)
+    pairs = []
+    for c in new_cells:
+        candidates = pool.get(c["source_hash"])
+        pairs.append((candidates.pop(0) if candidates else None, c))
+    pairs += [(c, None) for remaining in pool.values() for c in remaining]
+    return pairs
+
+
+def compare(old: dict, new: dict, slower: Optional[float] = None, min_seconds: Optional[float] = None,
+            min_mb: Optional[float] = None) -> list[dict]:
+    """Cell-by-cell comparison of two profiles; ``regression`` marks cells over the thresholds."""
+    slower = PROFILE_CONFIG["slower"] if slower is None else slower
+    min_seconds = PROFILE_CONFIG["min_seconds"] if min_seconds is None else min_seconds
+    min_mb = PROFILE_CONFIG["min_mb"] if min_mb is None else min_mb
+    rows = []
+    for a, b in _match(old["cells"], new["cells"]):
+        row = {"index": (b or a)["index"], "first_line": (b or a)["first_line"],
+               "change": "removed" if b is None else "added" if a is None else "same",
+               "wall_old": a and a["wall"], "wall_new": b and b["wall"],
+               "peak_old": a and a["peak"], "peak_new": b and b["peak"], "regression": False}
+        if a and b:
+            wall_delta = b["wall"] - a["wall"]
+            slow = wall_delta > min_seconds and b["wall"] > a["wall"] * (1 + slower)
+            hungry = (a["peak"] is not None and b["peak"] is not None
+                      and b["peak"] - a["peak"] > min_mb * MB and b["peak"] > a["peak"] * (1 + slower))
+            row["regression"] = slow or hungry or (a["status"] == "ok" and b["status"] != "ok")
+        rows.append(row)
+    return sorted(rows, key=lambda r: (not r["regression"], r["index"]))
+
+
+def format_diff(old: dict, new: dict, rows: list[dict]) -> str:
+    lines = [f"[notebook_profiler] {new['notebook']}: wall {old['total']['wall']:.2f}s → "
+             f"{new['total']['wall']:.2f}s, max peak +{_mb(old['total']['peak'])} → +{_mb(new['total']['peak'])} MB",
+             f"  {'cell':>4}  {'wall old':>8}  {'wall new':>8}  {'peak old':>9}  {'peak new':>9}  first line"]
+    for r in rows:
+        if r["change"] == "same" and not r["regression"]:
+            continue
+        wall_old = "-" if r["wall_old"] is None else f"{r['wall_old']:.3f}"
+        wall_new = "-" if r["wall_new"] is None else f"{r['wall_new']:.3f}"
+        mark = "REGRESSION" if r["regression"] else r["change"]
+        lines.append(f"  {r['index']:>4}  {wall_old:>8}  {wall_new:>8}  {_mb(r['peak_old']):>9}  "
+                     f"{_mb(r['peak_new']):>9}  {r['first_line']}  [{mark}]")
+    regressions = sum(r["regression"] for r in rows)
+    lines.append(f"  {regressions} regression(s)")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-cell time / memory profiler for notebooks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="profile notebooks")
+    run.add_argument("notebooks", nargs="+")
+    run.add_argument("--json", default=None, help="output JSON (single notebook) or directory (several)")
+    run.add_argument("--timeout", type=int, default=None, help="per-cell timeout in seconds")
+    run.add_argument("--top", type=int, default=None, help="rows per ranking")
+    run.add_argument("--keep-going", action="store_true", help="continue after a failing cell")
+    diff = sub.add_parser("diff", help="compare two JSON profiles")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    args = parser.parse_args(argv)
+
+    if args.command == "diff":
+        old = json.loads(Path(args.old).read_text(encoding="utf-8"))
+        new = json.loads(Path(args.new).read_text(encoding="utf-8"))
+        rows = compare(old, new)
+        print(format_diff(old, new, rows))
+        return 1 if any(r["regression"] for r in rows) else 0
+
+    failed = 0
+    for nb_path in args.notebooks:
+        profile = profile_notebook(nb_path, timeout=args.timeout, keep_going=args.keep_going)
+        print(format_report(profile, args.top))
+        failed += profile["total"]["failed"] > 0
+        if args.json:
+            out = Path(args.json)
+            if len(args.notebooks) > 1:
+                out.mkdir(parents=True, exist_ok=True)
+                out = out / f"{Path(nb_path).stem}.json"
+            out.write_text(json.dumps(profile, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
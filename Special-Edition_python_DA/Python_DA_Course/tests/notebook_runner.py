@@ -0,0 +1,299 @@
+"""Parallel notebook execution with per-cell timeouts and an output cache.
+
+``test_notebooks_static.py`` only parses the code cells, so a notebook that
+parses but crashes (or takes minutes) still passes. This runner executes
+the notebooks in real kernels:
+
+- one worker process + kernel per notebook (up to one per core), so with
+  enough cores a full run takes about as long as the slowest notebook
+- every notebook runs in its own sandbox (a copy of ``datasets/`` and
+  ``common/``), so S2 rewriting ``orders_clean.csv`` cannot race with S3
+  reading it, and outputs such as ``dashboard.html`` stay out of the tree
+- every cell has a timeout (``RUNNER_CONFIG["timeout"]``, overridable per
+  cell through ``metadata.timeout``)
+- outputs are cached per cell, keyed by the hash of the input data plus the
+  source of that cell and every code cell above it; when every cell of a
+  notebook hits the cache no kernel is started at all
+- the "🏁 大地遊戲" cells are student answer slots and raise ``NameError``
+  until answered; that error (and only that one) is allowed there
+
+Requires ``nbclient``, ``nbformat`` and ``ipykernel``.
+
+Run (from ``Python_DA_Course/``):
+    python tests/notebook_runner.py                       # S1–S6
+    python tests/notebook_runner.py --self-check --archive
+    python tests/notebook_runner.py M1_Numpy_Basic/S1_numpy_vectorization.ipynb --no-cache
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+from tests.test_notebooks_static import NOTEBOOKS  # noqa: E402
+
+SELF_CHECK = "S0_pre_course_self_check.ipynb"
+ARCHIVE_DIR = "docs/_archive"
+
+RUNNER_CONFIG = {
+    "timeout": 120,                      # seconds per cell
+    "startup_timeout": 60,               # seconds to start a kernel
+    "start_attempts": 2,
+    "kernel": "python3",
+    "cache_dir": COURSE_ROOT / "tests" / ".nb_cache",
+    # files the notebooks read; any change invalidates every cached cell
+    "inputs": ("datasets/**/*.csv", "datasets/**/*.py", "common/**/*.py"),
+    "sandbox": ("datasets", "common"),
+    "exercise_marker": "# 🏁 大地遊戲",
+}
+
+
+def archive_notebooks() -> list[str]:
+    return sorted(p.relative_to(COURSE_ROOT).as_posix() for p in (COURSE_ROOT / ARCHIVE_DIR).glob("*.ipynb"))
+
+
+def select_notebooks(self_check: bool = False, archive: bool = False) -> list[str]:
+    """S1–S6, optionally plus the pre-course self check and the archived reference notebooks."""
+    selected = list(NOTEBOOKS)
+    if self_check:
+        selected.append(SELF_CHECK)
+    if archive:
+        selected.extend(archive_notebooks())
+    return selected
+
+
+# ============================================================
+# Cache keys
+# ============================================================
+
+def input_digest(root: Path = COURSE_ROOT) -> str:
+    """Hash of everything the notebooks read, plus the interpreter version."""
+    h = hashlib.sha256(f"{sys.version}|{RUNNER_CONFIG['kernel']}".encode())
+    files = sorted({p for pattern in RUNNER_CONFIG["inputs"] for p in root.glob(pattern)
+                    if "__pycache__" not in p.parts})
+    for path in files:
+        h.update(path.relative_to(root).as_posix().encode())
+        h.update(hashlib.sha256(path.read_bytes()).digest())
+    return h.hexdigest()
+
+
+def cell_keys(nb, digest: str) -> list[Optional[str]]:
+    """Chained key per cell (None for non-code cells): hash(previous key + source)."""
+    keys, key = [], digest
+    for cell in nb.cells:
+        if cell.cell_type != "code":
+            keys.append(None)
+            continue
+        key = hashlib.sha256((key + "\0" + cell.source).encode()).hexdigest()
+        keys.append(key)
+    return keys
+
+
+def _cache_path(cache_dir: Path, key: str) -> Path:
+    return cache_dir / key[:2] / f"{key}.json"
+
+
+def _load_cached(cache_dir: Path, key: str) -> Optional[dict]:
+    path = _cache_path(cache_dir, key)
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _store(cache_dir: Path, key: str, entry: dict) -> None:
+    path = _cache_path(cache_dir, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# ============================================================
+# Execution
+# ============================================================
+
+def _is_exercise(cell) -> bool:
+    return cell.source.lstrip().startswith(RUNNER_CONFIG["exercise_marker"])
+
+
+def _errors(cell) -> list[str]:
+    return [out.get("ename", "") for out in cell.get("outputs", []) if out.get("output_type") == "error"]
+
+
+def _execute_cell(client, cell, index: int, timeout: int) -> float:
+    """Run one cell with its own timeout; returns the wall time in seconds."""
+    from nbclient.exceptions import CellExecutionError
+
+    exercise = _is_exercise(cell)
+    if exercise:
+        cell.metadata.setdefault("tags", []).append("raises-exception")
+    client.timeout = int(cell.metadata.get("timeout", timeout))
+    start = time.perf_counter()
+    try:
+        client.execute_cell(cell, index)
+    finally:
+        if exercise:
+            cell.metadata["tags"].remove("raises-exception")
+    unexpected = [name for name in _errors(cell) if name != "NameError"] if exercise else []
+    if unexpected:
+        raise CellExecutionError(f"{unexpected[0]} in exercise cell", "", unexpected[0])
+    return time.perf_counter() - start
+
+
+def _sandbox(tmp: Path, root: Path) -> Path:
+    for name in RUNNER_CONFIG["sandbox"]:
+        src = root / name
+        if src.is_dir():
+            shutil.copytree(src, tmp / name, ignore=shutil.ignore_patterns("__pycache__", "*.html"))
+    return tmp
+
+
+def _workdir(sandbox: Path, rel_path: str) -> Path:
+    """Working directory for a notebook inside the sandbox (where its relative paths resolve)."""
+    cwd = sandbox / Path(rel_path).parent
+    if Path(rel_path).parent.as_posix() == ARCHIVE_DIR:
+        cwd = sandbox / "docs"  # archived refs still use the module-level "../datasets" paths
+    cwd.mkdir(parents=True, exist_ok=True)
+    return cwd
+
+
+def run_notebook(rel_path: str, root: Path = COURSE_ROOT, cache_dir: Optional[Path] = None,
+                 timeout: Optional[int] = None, digest: Optional[str] = None,
+                 out_dir: Optional[Path] = None) -> dict:
+    """Execute one notebook (or replay it from the cache).
+
+    Args:
+        rel_path: notebook path relative to ``root``.
+        root: course root; the notebook runs in a sandbox copy with the same layout.
+        cache_dir: per-cell output cache, None disables caching.
+        timeout: default per-cell timeout in seconds.
+        digest: :func:`input_digest` of ``root`` (computed if omitted).
+        out_dir: if given, the executed notebook is written there.
+
+    Returns:
+        ``{"notebook", "status" ("cached" / "passed" / "failed"), "seconds", "executed",
+        "cached", "failed_cell", "error", "slowest"}``.
+    """
+    import nbformat
+    from nbclient import NotebookClient
+    from nbclient.exceptions import CellExecutionError, CellTimeoutError
+
+    t0 = time.perf_counter()
+    root = Path(root)
+    timeout = timeout or RUNNER_CONFIG["timeout"]
+    nb = nbformat.read(root / rel_path, as_version=4)
+    keys = cell_keys(nb, digest or input_digest(root))
+    code = [i for i, key in enumerate(keys) if key is not None]
+    result = {"notebook": rel_path, "status": "passed", "executed": 0, "cached": 0,
+              "failed_cell": None, "error": None, "slowest": []}
+
+    entries = {i: _load_cached(cache_dir, keys[i]) for i in code} if cache_dir else {}
+    timings = []
+    if cache_dir and all(entries[i] is not None for i in code):
+        for i in code:
+            nb.cells[i].outputs = [nbformat.from_dict(o) for o in entries[i]["outputs"]]
+            nb.cells[i].execution_count = entries[i]["execution_count"]
+            timings.append((entries[i]["seconds"], i))
+        result.update(status="cached", cached=len(code))
+    else:
+        with tempfile.TemporaryDirectory(prefix="nb_run_") as tmp:
+            cwd = _workdir(_sandbox(Path(tmp), root), rel_path)
+            for attempt in range(RUNNER_CONFIG["start_attempts"]):
+                client = NotebookClient(nb, timeout=timeout, kernel_name=RUNNER_CONFIG["kernel"],
+                                        startup_timeout=RUNNER_CONFIG["startup_timeout"],
+                                        resources={"metadata": {"path": str(cwd)}})
+                started = False
+                try:
+                    with client.setup_kernel():
+                        for i in code:
+                            started = True
+                            seconds = _execute_cell(client, nb.cells[i], i, timeout)
+                            timings.append((seconds, i))
+                            result["executed"] += 1
+                            if cache_dir:
+                                _store(cache_dir, keys[i], {"outputs": nb.cells[i].outputs,
+                                                            "execution_count": nb.cells[i].execution_count,
+                                                            "seconds": seconds})
+                    break
+                except (CellExecutionError, CellTimeoutError, RuntimeError) as exc:
+                    if not started and attempt + 1 < RUNNER_CONFIG["start_attempts"]:
+                        continue  # the kernel failed to start (e.g. a port clash with a parallel launch)
+                    failed = code[result["executed"]] if result["executed"] < len(code) else None
+                    message = str(exc).strip().splitlines()
+                    result.update(status="failed", failed_cell=failed,
+                                  error=f"{type(exc).__name__}: {message[-1] if message else ''}")
+                    break
+
+    result["slowest"] = [{"cell": i, "seconds": round(s, 3)} for s, i in sorted(timings, reverse=True)[:3]]
+    result["seconds"] = round(time.perf_counter() - t0, 3)
+    if out_dir is not None:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        nbformat.write(nb, out_dir / Path(rel_path).name)
+    return result
+
+
+def _run_task(task: tuple) -> dict:
+    return run_notebook(*task)
+
+
+def run_all(notebooks: Sequence[str], root: Path = COURSE_ROOT, cache_dir: Optional[Path] = None,
+            timeout: Optional[int] = None, jobs: Optional[int] = None,
+            out_dir: Optional[Path] = None) -> list[dict]:
+    """Run notebooks in parallel, one worker process (and kernel) per notebook.
+
+    ``jobs`` defaults to one per notebook, capped at the number of cores:
+    the notebooks are CPU-bound (pandas / matplotlib), and oversubscribed
+    kernels only slow each other down until they miss the startup timeout.
+    """
+    digest = input_digest(root)
+    tasks = [(rel, root, cache_dir, timeout, digest, out_dir) for rel in notebooks]
+    jobs = jobs or min(len(tasks), os.cpu_count() or 1) or 1
+    if jobs <= 1 or len(tasks) <= 1:
+        return [_run_task(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_run_task, tasks))
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Execute the course notebooks in parallel kernels")
+    parser.add_argument("notebooks", nargs="*", help="notebook paths relative to Python_DA_Course/ (default S1–S6)")
+    parser.add_argument("--self-check", action="store_true", help=f"also run {SELF_CHECK}")
+    parser.add_argument("--archive", action="store_true", help=f"also run {ARCHIVE_DIR}/*.ipynb")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: one per notebook, at most one per core)")
+    parser.add_argument("--timeout", type=int, default=None, help="per-cell timeout in seconds")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not update the cell cache")
+    parser.add_argument("--out-dir", default=None, help="write executed notebooks here")
+    args = parser.parse_args(argv)
+
+    notebooks = args.notebooks or select_notebooks(args.self_check, args.archive)
+    cache_dir = None if args.no_cache else RUNNER_CONFIG["cache_dir"]
+    t0 = time.perf_counter()
+    results = run_all(notebooks, cache_dir=cache_dir, timeout=args.timeout, jobs=args.jobs,
+                      out_dir=args.out_dir and Path(args.out_dir))
+    for r in results:
+        line = f"{r['status']:>7}  {r['seconds']:6.1f}s  {r['notebook']}"
+        if r["error"]:
+            line += f"  (cell {r['failed_cell']}: {r['error']})"
+        print(line)
+    failed = sum(r["status"] == "failed" for r in results)
+    print(f"[notebook_runner] {len(results)} notebooks, {failed} failed ({time.perf_counter() - t0:.1f}s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
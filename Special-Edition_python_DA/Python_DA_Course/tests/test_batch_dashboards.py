@@ -0,0 +1,64 @@
+"""Tests for common/batch_dashboards.py against the M5 red_category_dashboard solution."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+pytest.importorskip("matplotlib")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+from common.datasets import load_dataset  # noqa: E402
+from common.batch_dashboards import draw_dashboard, prepare_groups, render_dashboards  # noqa: E402
+
+pytestmark = pytest.mark.filterwarnings("ignore:Glyph .* missing from font")
+
+
+@pytest.fixture(scope="module")
+def orders() -> pd.DataFrame:
+    return load_dataset("ecommerce/orders_enriched")
+
+
+def test_summaries_match_solution_groupbys(orders) -> None:
+    groups = dict(prepare_groups(orders, ["category"]))
+    assert list(groups) == [(c,) for c in sorted(orders["category"].unique())]
+    for (category,), summary in groups.items():
+        cat_df = orders[orders["category"] == category]
+        monthly = cat_df.set_index("order_date").resample("ME")["amount"].sum()
+        month_end, sums = summary["monthly"]
+        assert list(month_end) == list(monthly.index.values.astype("datetime64[D]"))
+        np.testing.assert_allclose(sums, monthly.to_numpy())
+        region = cat_df.groupby("region")["amount"].sum()
+        assert list(summary["region"][0]) == list(region.index)
+        np.testing.assert_allclose(summary["region"][1], region.to_numpy())
+        top = cat_df.groupby("product_name")["amount"].sum().nlargest(5)
+        assert list(summary["top_products"][0]) == list(top.index)
+
+
+def test_dashboard_uses_figure_api_only(orders) -> None:
+    import matplotlib.pyplot as plt
+
+    before = plt.get_fignums()
+    (key, summary), *_ = prepare_groups(orders, ["category"])
+    fig = draw_dashboard(summary, key[0])
+    assert len(fig.get_axes()) == 4
+    assert plt.get_fignums() == before
+
+
+def test_parallel_output_is_identical_to_serial(orders, tmp_path: Path) -> None:
+    subset = orders[orders["region"] == "North"]
+    serial = render_dashboards(subset, tmp_path / "serial", by=["region", "category"],
+                               formats=("png", "svg"), jobs=1)
+    parallel = render_dashboards(subset, tmp_path / "parallel", by=["region", "category"],
+                                 formats=("png", "svg"), jobs=2)
+    expected = subset.groupby(["region", "category"]).size()
+    assert list(serial) == list(expected.index)
+    assert (tmp_path / "serial" / "North__Books.svg").exists()
+    for key, paths in serial.items():
+        for a, b in zip(paths, parallel[key]):
+            assert Path(a).read_bytes() == Path(b).read_bytes()
@@ -0,0 +1,110 @@
+"""Tests for common/catalog.py against the in-memory ``np.genfromtxt`` formulations of M1."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+from common.catalog import Catalog, build_catalog  # noqa: E402
+
+PRODUCTS = COURSE_ROOT / "datasets" / "ecommerce" / "products.csv"
+
+
+@pytest.fixture(scope="module")
+def big_csv(tmp_path_factory):
+    """大量重複值的商品表，用來檢查跨區塊 top-k 的平手順序。"""
+    rng = np.random.default_rng(7)
+    n = 50_000
+    df = pd.DataFrame({
+        "product_id": np.arange(n) + 1001,
+        "product_name": np.array([f"Item {i}" for i in range(300)], dtype=object)[rng.integers(0, 300, n)],
+        "category": np.array(["Electronics", "Books", "Home", "Sports", "Clothing"],
+                             dtype=object)[rng.integers(0, 5, n)],
+        "unit_price": rng.integers(80, 2500, n).astype(float),
+        "stock_qty": rng.integers(0, 50, n),
+    })
+    path = tmp_path_factory.mktemp("catalog") / "products.csv"
+    df.to_csv(path, index=False)
+    return path, df
+
+
+def test_matches_m1_solutions(tmp_path):
+    data = np.genfromtxt(PRODUCTS, delimiter=",", skip_header=1, usecols=(3, 4))
+    prices, stocks = data[:, 0], data[:, 1]
+    catalog = build_catalog(PRODUCTS, tmp_path / "store")
+
+    assert list(catalog.top_k("stock_qty", 3)) == list(np.argsort(stocks)[-3:][::-1])
+    assert catalog.count("unit_price", ">", 1000) == int(np.sum(prices > 1000))
+    restock = np.sum(prices[prices < 500] * 50)
+    assert catalog.sum("unit_price", where=("unit_price", "<", 500)) * 50 == pytest.approx(restock)
+
+
+def test_chunked_queries_match_pandas(big_csv, tmp_path):
+    path, df = big_csv
+    build_catalog(path, tmp_path / "store")
+    catalog = Catalog(tmp_path / "store", chunk_size=4096)
+    stocks = df["stock_qty"].to_numpy()
+
+    for k in (1, 10, 500):
+        expected = np.argsort(stocks, kind="stable")
+        assert np.array_equal(catalog.top_k("stock_qty", k), expected[-k:][::-1])
+        assert np.array_equal(catalog.top_k("stock_qty", k, largest=False), expected[:k])
+
+    books = df["category"] == "Books"
+    assert catalog.count("stock_qty", ">=", 25, where=("category", "==", "Books")) \
+        == int(((df["stock_qty"] >= 25) & books).sum())
+    assert catalog.count("category", "!=", "Books") == int((~books).sum())
+    assert catalog.count("category", "==", "Toys") == 0
+    assert catalog.sum("unit_price", where=[("unit_price", "<", 500), ("category", "==", "Books")]) \
+        == pytest.approx(df.loc[(df["unit_price"] < 500) & books, "unit_price"].sum())
+
+    index = catalog.top_k("unit_price", 5, where=("category", "==", "Home"))
+    home = df[df["category"] == "Home"]
+    expected = home.index.to_numpy()[np.argsort(home["unit_price"].to_numpy(), kind="stable")[-5:][::-1]]
+    assert np.array_equal(index, expected)
+    pd.testing.assert_frame_equal(catalog.take(index).reset_index(drop=True),
+                                  df.loc[index].reset_index(drop=True), check_dtype=False)
+
+
+def test_reuses_store_until_source_changes(big_csv, tmp_path):
+    path, _ = big_csv
+    store = tmp_path / "store"
+    build_catalog(path, store)
+    stamp = (store / "stock_qty.npy").stat().st_mtime_ns
+    build_catalog(path, store)
+    assert (store / "stock_qty.npy").stat().st_mtime_ns == stamp
+
+    small = tmp_path / "small.csv"
+    pd.read_csv(path).head(10).to_csv(small, index=False)
+    assert len(build_catalog(small, store)) == 10
+
+
+def test_rejects_missing_int(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text("product_id,product_name,category,unit_price,stock_qty\n"
+                    "1,A,Books,100,\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        build_catalog(path, tmp_path / "store")
+
+
+def test_where_none_and_top_k_edge_cases(tmp_path):
+    path = tmp_path / "nan.csv"
+    path.write_text("product_id,product_name,category,unit_price,stock_qty\n"
+                    "1,A,Books,300,1\n2,B,Books,,2\n3,C,Home,100,3\n4,D,Home,,4\n5,E,Books,200,5\n",
+                    encoding="utf-8")
+    catalog = Catalog(build_catalog(path, tmp_path / "store").path, chunk_size=2)
+
+    assert list(catalog.where(None)) == [0, 1, 2, 3, 4]
+    assert list(catalog.where(("category", "==", "Home"))) == [2, 3]
+    assert len(catalog.top_k("unit_price", 0)) == 0 and len(catalog.top_k("stock_qty", -1)) == 0
+    # NaN 不參與排名（無論由大到小或由小到大）
+    assert list(catalog.top_k("unit_price", 5)) == [0, 4, 2]
+    assert list(catalog.top_k("unit_price", 2, largest=False)) == [2, 4]
+    assert list(catalog.top_k("unit_price", 5, largest=False, where=("category", "==", "Books"))) == [4, 0]
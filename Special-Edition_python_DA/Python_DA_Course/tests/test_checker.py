@@ -0,0 +1,101 @@
+"""Tests for common/checker.py: the checked-in answers plus array / DataFrame answers."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+import common.checker as checker  # noqa: E402
+from common.checker import check, check_many, make_entry  # noqa: E402
+
+# 原始答案（見 checker._ANSWERS 的註解）
+KNOWN = {"S1": 27153.1, "S2": 188, "S3": "Books", "S4": 186506, "S5": "North"}
+
+
+def test_checked_in_answers(capsys) -> None:
+    for session, answer in KNOWN.items():
+        check(session.lower(), answer)
+        assert "答對了" in capsys.readouterr().out
+    check("S1", "not a number")
+    assert "答案不對" in capsys.readouterr().out
+
+    results = check_many({**KNOWN, "S2": 187, "S9": 1})
+    assert results == {"S1": True, "S2": False, "S3": True, "S4": True, "S5": True, "S9": None}
+    assert "答對 4 關" in capsys.readouterr().out
+
+
+def test_array_answers(monkeypatch) -> None:
+    np = pytest.importorskip("numpy")
+    values = np.random.default_rng(0).normal(size=(1000, 3))
+    monkeypatch.setitem(checker._ANSWERS, "A1", make_entry(values, "array"))
+    monkeypatch.setitem(checker._ANSWERS, "A2", make_entry([1, 2, 3], "array"))
+    monkeypatch.setitem(checker._ANSWERS, "A3", make_entry(np.array(["a", "b"]), "array"))
+    verify = checker._verify
+
+    assert verify("A1", values + 1e-9)
+    assert verify("A1", np.asfortranarray(values))
+    assert not verify("A1", values.reshape(3, 1000))
+    assert not verify("A1", values + 0.01)
+    assert verify("A2", np.array([1.0, 2.0, 3.0]))
+    assert not verify("A2", [1, 2, 4])
+    assert verify("A3", ["a", "b"]) and not verify("A3", ["a", "c"])
+
+    nan = np.array([1.0, np.nan, -0.0])
+    monkeypatch.setitem(checker._ANSWERS, "A4", make_entry(nan, "array"))
+    assert verify("A4", np.array([1.0, -np.nan, 0.0]))
+
+    labels = np.array(["a", None, np.nan], dtype=object)
+    monkeypatch.setitem(checker._ANSWERS, "A6", make_entry(labels, "array"))
+    assert verify("A6", ["a", None, float("nan")])
+    assert not verify("A6", ["a", "None", "nan"])                    # 缺值不等於字串
+    assert verify("A3", np.array(["a", "b"], dtype=object))
+
+
+def test_frame_answers(monkeypatch) -> None:
+    pd = pytest.importorskip("pandas")
+    from common.datasets import load_dataset
+
+    orders = load_dataset("ecommerce/orders_enriched")
+    by_category = orders.groupby("category")["amount"].sum().sort_values(ascending=False)
+    monkeypatch.setitem(checker._ANSWERS, "F1", make_entry(by_category, "frame"))
+    monkeypatch.setitem(checker._ANSWERS, "F2", make_entry(orders.head(50), "frame"))
+    verify = checker._verify
+
+    assert verify("F1", by_category + 1e-7)
+    assert verify("F1", by_category.rename("revenue"))
+    assert verify("F1", by_category.astype("float32").astype("float64").round(2))
+    assert not verify("F1", by_category.sort_index())                  # order matters
+    assert not verify("F1", by_category.reset_index(drop=True))        # keys are part of the answer
+
+    head = orders.head(50)
+    assert verify("F2", head.copy())
+    assert not verify("F2", head[head.columns[::-1]])
+    changed = head.copy()
+    changed.loc[3, "region"] = "Nowhere"
+    assert not verify("F2", changed)
+    assert check_many({"F1": by_category, "F2": head}) == {"F1": True, "F2": True}
+
+    # 0..n-1 的一般 Index 與 RangeIndex 是同一個答案
+    assert verify("F2", head.set_axis(pd.Index(list(range(50)), dtype="int64")))
+    assert not verify("F2", head.set_axis(pd.Index(list(range(1, 51)))))
+
+    labels = pd.DataFrame({"city": ["Taipei", "Tainan", None], "flag": [True, False, True]})
+    monkeypatch.setitem(checker._ANSWERS, "F3", make_entry(labels, "frame"))
+    assert verify("F3", labels.astype({"city": "category"}))
+    assert verify("F3", labels.astype({"city": "string"}))
+    assert not verify("F3", labels.fillna({"city": "None"}))          # 缺值不等於字串 "None"
+    assert not verify("F3", labels.astype({"flag": str}))
+
+
+def test_float_answers_are_compared_after_rounding(monkeypatch) -> None:
+    np = pytest.importorskip("numpy")
+    monkeypatch.setitem(checker._ANSWERS, "A5", make_entry([0.125 + 1e-9], "array"))
+    verify = checker._verify
+
+    assert verify("A5", [0.1251]) and verify("A5", [0.134])
+    # 文件上寫明：四捨五入後比對，不是容許誤差，進位邊界兩側算不同答案
+    assert not verify("A5", np.array([0.125 - 1e-9]))
@@ -0,0 +1,82 @@
+"""Tests for common/datasets.py: Feather mirrors must load exactly what ``pd.read_csv`` does."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+import common.datasets as datasets  # noqa: E402
+from common.datasets import dataset_path, list_datasets, load_dataset, mirror_status  # noqa: E402
+
+
+@pytest.fixture
+def demo(tmp_path: Path, monkeypatch) -> Path:
+    csv = tmp_path / "demo.csv"
+    csv.write_text("id,day,label\n1,2025-01-01,a\n2,2025-01-02,\n", encoding="utf-8")
+    monkeypatch.setitem(datasets.DATASETS, "demo", {"path": csv, "read": {"parse_dates": ["day"]}})
+    return csv
+
+
+@pytest.mark.parametrize("name", [n for n in list_datasets() if dataset_path(n).exists()])
+def test_same_frame_as_read_csv(name: str) -> None:
+    pytest.importorskip("pyarrow")
+    expected = pd.read_csv(dataset_path(name), **datasets.DATASETS[name]["read"])
+    pd.testing.assert_frame_equal(load_dataset(name), expected)
+    assert mirror_status(name) == "fresh"
+    pd.testing.assert_frame_equal(load_dataset(name), expected)  # now from the mirror
+    columns = list(expected.columns[::-2])
+    pd.testing.assert_frame_equal(load_dataset(name, columns=columns), expected[columns])
+    pd.testing.assert_frame_equal(load_dataset(name, columns=columns, mirror=False), expected[columns])
+
+
+def test_mirror_follows_csv_content(demo: Path, monkeypatch) -> None:
+    pytest.importorskip("pyarrow")
+    data_file, meta_file = datasets._mirror_files(demo)
+    assert mirror_status("demo") == "missing"
+    df = load_dataset("demo")
+    assert df["day"].dtype == "datetime64[ns]" and df["label"].isna().tolist() == [False, True]
+    assert mirror_status("demo") == "fresh" and data_file.exists()
+
+    def no_csv(*args, **kwargs):
+        raise AssertionError("read the CSV although the mirror is fresh")
+
+    with monkeypatch.context() as m:
+        m.setattr(datasets.pd, "read_csv", no_csv)
+        pd.testing.assert_frame_equal(load_dataset("demo"), df)
+        # touched but unchanged: the sha256 matches, only the timestamps in the metadata move
+        stat = demo.stat()
+        os.utime(demo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert mirror_status("demo") == "stale"
+        pd.testing.assert_frame_equal(load_dataset("demo"), df)
+        assert mirror_status("demo") == "fresh"
+
+    demo.write_text("id,day,label\n1,2025-01-01,a\n2,2025-01-02,b\n3,2025-02-01,c\n", encoding="utf-8")
+    assert load_dataset("demo")["label"].tolist() == ["a", "b", "c"]
+    assert json.loads(meta_file.read_text(encoding="utf-8"))["rows"] == 3
+
+    monkeypatch.setitem(datasets.DATASETS["demo"], "read", {})  # registered options are part of the key
+    assert mirror_status("demo") == "stale"
+    assert load_dataset("demo")["day"].dtype == object
+
+    meta_file.write_text("{broken", encoding="utf-8")
+    assert mirror_status("demo") == "missing"
+    assert len(load_dataset("demo")) == 3
+    assert not [p for p in data_file.parent.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_csv_fallback(demo: Path, monkeypatch) -> None:
+    monkeypatch.setattr(datasets, "feather", None)
+    df = load_dataset("demo", columns=["label", "day"])
+    assert list(df.columns) == ["label", "day"] and df["day"].dtype == "datetime64[ns]"
+    assert mirror_status("demo") == "unavailable"
+    assert not (demo.parent / datasets.MIRROR_DIR).exists()
+    with pytest.raises(KeyError, match="ecommerce/orders_enriched"):
+        load_dataset("ecommerce/orders")
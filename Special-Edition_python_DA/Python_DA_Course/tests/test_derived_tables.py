@@ -0,0 +1,109 @@
+"""Tests for common/derived_tables.py: byte-identical outputs, incremental rebuilds, shared store."""
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+DATASETS_DIR = COURSE_ROOT / "datasets" / "ecommerce"
+sys.path.insert(0, str(COURSE_ROOT))
+
+from common import derived_tables, star_join  # noqa: E402
+from common.derived_tables import build  # noqa: E402
+
+SOURCES = ("orders_raw.csv", "customers.csv", "products.csv")
+TARGETS = ("orders_clean.csv", "orders_enriched.csv", "monthly_revenue.csv")
+
+
+def _tree(root: Path, targets=TARGETS) -> dict:
+    root.mkdir(parents=True)
+    for name in SOURCES:
+        shutil.copyfile(DATASETS_DIR / name, root / name)
+    return {"path": root, "targets": targets}
+
+
+def _status(results: list[dict]) -> dict:
+    return {(r["tree"], r["node"]): r["status"] for r in results}
+
+
+def test_reproduces_checked_in_files(tmp_path: Path) -> None:
+    trees = {"a": _tree(tmp_path / "a")}
+    results = build(trees, store=tmp_path / "store", jobs=1, chunksize=50)  # several chunks per node
+    assert set(_status(results).values()) == {"built"}
+    for name in TARGETS:
+        assert (tmp_path / "a" / name).read_bytes() == (DATASETS_DIR / name).read_bytes(), name
+
+
+def test_incremental_rebuild_and_shared_store(tmp_path: Path) -> None:
+    store = tmp_path / "store"
+    trees = {"a": _tree(tmp_path / "a")}
+    build(trees, store=store, jobs=1)
+
+    # a second tree with the same sources only copies from the store
+    trees["b"] = _tree(tmp_path / "b", targets=TARGETS[:2])
+    status = _status(build(trees, store=store, jobs=1))
+    assert status == {("a", "clean"): "fresh", ("a", "enrich"): "fresh", ("a", "monthly"): "fresh",
+                      ("b", "clean"): "cached", ("b", "enrich"): "cached"}
+    assert not (tmp_path / "b" / "monthly_revenue.csv").exists()
+
+    # touched but unchanged sources rebuild nothing
+    raw = tmp_path / "a" / "orders_raw.csv"
+    os.utime(raw, ns=(raw.stat().st_atime_ns, raw.stat().st_mtime_ns + 10**9))
+    assert set(_status(build(trees, store=store, jobs=1)).values()) == {"fresh"}
+
+    # a customer change only reaches enrich; the orders branch stays cached
+    customers = tmp_path / "a" / "customers.csv"
+    customers.write_text(customers.read_text(encoding="utf-8").replace("Alice Chen", "Alice Wu"), encoding="utf-8")
+    status = _status(build(trees, store=store, jobs=1))
+    assert status[("a", "enrich")] == "built" and status[("b", "enrich")] == "fresh"
+    assert status[("a", "clean")] == status[("a", "monthly")] == "fresh"
+    enriched = pd.read_csv(tmp_path / "a" / "orders_enriched.csv")
+    assert "Alice Wu" in set(enriched["customer_name"]) and "Alice Chen" not in set(enriched["customer_name"])
+
+    # an edited derived file is restored from the store
+    (tmp_path / "b" / "orders_clean.csv").write_text("broken\n", encoding="utf-8")
+    assert _status(build(trees, store=store, jobs=1))[("b", "clean")] == "cached"
+    assert (tmp_path / "b" / "orders_clean.csv").read_bytes() == (DATASETS_DIR / "orders_clean.csv").read_bytes()
+
+
+def test_parallel_build_and_dry_run(tmp_path: Path) -> None:
+    trees = {"a": _tree(tmp_path / "a"), "b": _tree(tmp_path / "b")}
+    raw = tmp_path / "b" / "orders_raw.csv"
+    lines = raw.read_text(encoding="utf-8").splitlines(keepends=True)
+    raw.write_text("".join(lines[:-20]), encoding="utf-8")  # different raw data → separate builds
+
+    dry = build(trees, store=tmp_path / "store", dry_run=True)
+    assert set(_status(dry).values()) == {"stale"}
+    assert not (tmp_path / "store").exists() and not (tmp_path / "a" / "orders_clean.csv").exists()
+
+    results = build(trees, store=tmp_path / "store", jobs=2)
+    assert set(_status(results).values()) == {"built"}
+    for name in TARGETS:
+        assert (tmp_path / "a" / name).read_bytes() == (DATASETS_DIR / name).read_bytes()
+    clean_b = pd.read_csv(tmp_path / "b" / "orders_clean.csv")
+    monthly_b = pd.read_csv(tmp_path / "b" / "monthly_revenue.csv")
+    assert monthly_b["amount"].sum() == pytest.approx(clean_b["amount"].sum())
+    assert not list((tmp_path / "store" / "tmp").iterdir())
+
+    with pytest.raises(FileNotFoundError):
+        (tmp_path / "a" / "products.csv").unlink()
+        build(trees, store=tmp_path / "store", jobs=1)
+
+
+def test_helper_module_change_invalidates_its_nodes(tmp_path: Path, monkeypatch) -> None:
+    trees = {"a": _tree(tmp_path / "a")}
+    build(trees, store=tmp_path / "store", jobs=1)
+
+    # an edit to star_join.py must rebuild enrich, even though enrich_orders itself is unchanged
+    getsource = derived_tables.inspect.getsource
+    monkeypatch.setattr(derived_tables.inspect, "getsource",
+                        lambda obj: getsource(obj) + ("# edited\n" if obj is star_join else ""))
+    status = _status(build(trees, store=tmp_path / "store", jobs=1))
+    assert status == {("a", "clean"): "fresh", ("a", "enrich"): "built", ("a", "monthly"): "fresh"}
@@ -0,0 +1,88 @@
+"""Tests for the persisted CJK font resolution in common/font_setup.py."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+import common.font_setup as font_setup  # noqa: E402
+
+
+@pytest.fixture
+def fake_fonts(tmp_path: Path, monkeypatch):
+    """Linux-like platform with one font directory and a counting scanner."""
+    font_dir = tmp_path / "fonts"
+    font_dir.mkdir()
+    scans = []
+
+    def scan(candidates):
+        scans.append(list(candidates))
+        return candidates[1:2]
+
+    monkeypatch.setattr(font_setup.platform, "system", lambda: "Linux")
+    monkeypatch.setitem(font_setup._FONT_DIRS, "Linux", [str(font_dir)])
+    monkeypatch.setattr(font_setup, "_available_cjk_fonts", scan)
+    monkeypatch.setattr(font_setup, "_resolved", {})
+    monkeypatch.setattr(font_setup, "_cache_file", lambda: tmp_path / "cache" / "cjk_font.json")
+    return font_dir, scans
+
+
+def test_cache_hit_skips_scan(fake_fonts, tmp_path: Path) -> None:
+    font_dir, scans = fake_fonts
+    expected = font_setup._FONT_CANDIDATES["Linux"][1]
+    assert font_setup.resolve_cjk_font() == expected
+    assert len(scans) == 1
+    cached = json.loads((tmp_path / "cache" / "cjk_font.json").read_text(encoding="utf-8"))
+    assert cached["font"] == expected
+
+    font_setup._resolved.clear()  # a restarted kernel only has the file
+    assert font_setup.resolve_cjk_font() == expected
+    assert len(scans) == 1
+
+    # installing a font (new sub-directory) invalidates the cache
+    (font_dir / "noto").mkdir()
+    font_setup._resolved.clear()
+    assert font_setup.resolve_cjk_font() == expected
+    assert len(scans) == 2
+
+    assert font_setup.resolve_cjk_font(refresh=True) == expected
+    assert len(scans) == 3
+
+
+def test_corrupt_cache_and_missing_fonts(fake_fonts, tmp_path: Path, monkeypatch) -> None:
+    _, scans = fake_fonts
+    cache = tmp_path / "cache" / "cjk_font.json"
+    cache.parent.mkdir()
+    cache.write_text("{not json", encoding="utf-8")
+    monkeypatch.setattr(font_setup, "_available_cjk_fonts", lambda c: scans.append(c) or [])
+    assert font_setup.resolve_cjk_font() is None
+    font_setup._resolved.clear()
+    assert font_setup.resolve_cjk_font() is None  # the negative result is cached too
+    assert len(scans) == 1
+    assert not [p for p in cache.parent.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_matplotlib_and_plotly_share_one_resolution(fake_fonts) -> None:
+    matplotlib = pytest.importorskip("matplotlib")
+    pio = pytest.importorskip("plotly.io")
+    _, scans = fake_fonts
+    expected = font_setup._FONT_CANDIDATES["Linux"][1]
+    with matplotlib.rc_context():
+        template = pio.templates[pio.templates.default or "plotly"]
+        family = template.layout.font.family
+        try:
+            assert font_setup.setup_fonts() == expected
+            assert matplotlib.rcParams["font.sans-serif"][0] == expected
+            assert font_setup.setup_chinese_font() == expected
+            assert matplotlib.rcParams["font.sans-serif"].count(expected) == 1
+            assert template.layout.font.family == expected
+        finally:
+            template.layout.font.family = family
+    assert len(scans) == 1
+    assert os.fspath(font_setup._cache_file()).endswith("cjk_font.json")
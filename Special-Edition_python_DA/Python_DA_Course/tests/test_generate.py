@@ -0,0 +1,48 @@
+"""Tests for datasets/ecommerce/_generate.py.
+
+The classroom path is stdlib-only and must reproduce the checked-in CSVs
+byte for byte; the scaled path needs numpy/pandas and is skipped otherwise.
+"""
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+DATASETS_DIR = COURSE_ROOT / "datasets" / "ecommerce"
+
+
+def _load_generator():
+    spec = importlib.util.spec_from_file_location("_generate", DATASETS_DIR / "_generate.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("name", ["products.csv", "customers.csv", "orders_raw.csv"])
+def test_classroom_scale_is_bit_identical(tmp_path: Path, name: str) -> None:
+    _load_generator().generate_classroom(tmp_path)
+    assert (tmp_path / name).read_bytes() == (DATASETS_DIR / name).read_bytes()
+
+
+def test_dollar_strings_match_python_format() -> None:
+    np = pytest.importorskip("numpy")
+    gen = _load_generator()
+    amount = np.array([0, 7, 999, 1000, 1005, 12500, 1_000_000, 123_456_789])
+    assert list(gen._dollar_strings(amount)) == [f"${x:,}" for x in amount]
+
+
+def test_scaled_output_is_deterministic(tmp_path: Path, monkeypatch) -> None:
+    pytest.importorskip("pandas")
+    gen = _load_generator()
+    monkeypatch.setattr(gen, "BLOCK_ROWS", 1_000)
+    for sub in ("a", "b"):
+        (tmp_path / sub).mkdir()
+        gen.generate_scaled(tmp_path / sub, scale=20, formats=frozenset({"csv"}))
+    first = (tmp_path / "a" / "orders_raw.csv").read_bytes()
+    assert first == (tmp_path / "b" / "orders_raw.csv").read_bytes()
+    assert first.splitlines()[0] == b"Order_ID ,customer_id,Product_ID, qty,order_date,amount"
+    # 200 × 20 筆訂單 + 5% 重複列
+    assert len(first.splitlines()) == 1 + 4000 + 200
@@ -0,0 +1,83 @@
+"""Tests for common/monthly_rollup.py against the M4 resample-based report."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+DATASETS_DIR = COURSE_ROOT / "datasets" / "ecommerce"
+sys.path.insert(0, str(COURSE_ROOT))
+
+from common.datasets import load_dataset  # noqa: E402
+from common.monthly_rollup import MonthlyRollup  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def orders() -> pd.DataFrame:
+    return load_dataset("ecommerce/orders_enriched")
+
+
+def _red_monthly_report(df: pd.DataFrame) -> pd.DataFrame:
+    monthly = df.set_index("order_date").resample("ME").agg(
+        order_count=("amount", "count"),
+        revenue=("amount", "sum"),
+        active_customers=("customer_id", "nunique"),
+    )
+    monthly["avg_order_value"] = monthly["revenue"] / monthly["order_count"]
+    monthly["revenue_growth"] = monthly["revenue"].pct_change()
+    return monthly
+
+
+def test_daily_updates_match_full_resample(tmp_path: Path, orders) -> None:
+    for _, day in orders.groupby(orders["order_date"].dt.date):
+        MonthlyRollup(tmp_path / "rollup").update(day)
+    report = MonthlyRollup(tmp_path / "rollup").report()
+    pd.testing.assert_frame_equal(report, _red_monthly_report(orders))
+
+
+def test_out_of_order_batches_and_gap_months(tmp_path: Path, orders) -> None:
+    store = MonthlyRollup(tmp_path / "rollup")
+    late = orders["order_date"] >= "2025-07-01"
+    store.update(orders[late])
+    store.update(orders[~late & (orders["order_date"] < "2025-03-01")])
+    # 3~6 月還沒到：resample 會補 0，成長率照算
+    partial = orders[late | (orders["order_date"] < "2025-03-01")]
+    pd.testing.assert_frame_equal(store.report(), _red_monthly_report(partial))
+    store.update(orders[~late & (orders["order_date"] >= "2025-03-01")])
+    pd.testing.assert_frame_equal(store.report(), _red_monthly_report(orders))
+
+
+def test_refolding_a_day_is_rejected(tmp_path: Path, orders) -> None:
+    store = MonthlyRollup(tmp_path / "rollup")
+    store.update(orders.head(20))
+    with pytest.raises(ValueError):
+        store.update(orders.head(1))
+
+
+def test_export_reproduces_monthly_revenue_csv(tmp_path: Path, orders) -> None:
+    store = MonthlyRollup(tmp_path / "rollup")
+    store.update(orders)
+    store.export_monthly_revenue(tmp_path / "monthly_revenue.csv")
+    expected = (DATASETS_DIR / "monthly_revenue.csv").read_text(encoding="utf-8")
+    assert (tmp_path / "monthly_revenue.csv").read_text(encoding="utf-8") == expected
+
+
+def test_hll_distinct_customers_within_error(tmp_path: Path) -> None:
+    rng = np.random.default_rng(0)
+    n = 200_000
+    df = pd.DataFrame({
+        "order_date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 59, n), unit="D"),
+        "amount": rng.integers(100, 5000, n).astype(float),
+        "customer_id": rng.integers(0, 100_000, n),
+    })
+    store = MonthlyRollup(tmp_path / "rollup", distinct="hll")
+    for _, week in df.groupby(df["order_date"].dt.isocalendar().week):
+        store.update(week)
+    got = store.report()["active_customers"]
+    expected = _red_monthly_report(df)["active_customers"]
+    assert (abs(got - expected) / expected).max() < 0.03
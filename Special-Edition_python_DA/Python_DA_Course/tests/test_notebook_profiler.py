@@ -0,0 +1,80 @@
+"""Tests for tests/notebook_profiler.py (per-cell time / memory profile and diff)."""
+from __future__ import annotations
+
+import copy
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+from tests.notebook_profiler import MB, compare, format_report, main, profile_notebook  # noqa: E402
+
+
+def _write_notebook(path: Path, sources: list[str]) -> None:
+    cells = [{"id": f"cell-{i}", "cell_type": "code", "metadata": {}, "source": s, "outputs": [],
+              "execution_count": None} for i, s in enumerate(sources)]
+    nb = {"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+    path.write_text(json.dumps(nb), encoding="utf-8")
+
+
+def _profile(cells: list[tuple[str, float, float]]) -> dict:
+    """Synthetic profile from (source, wall, peak MB) rows."""
+    rows = [{"index": i, "execution_count": i + 1, "source_hash": f"h{source}", "first_line": source,
+             "status": "ok", "wall": wall, "cpu": wall, "rss_before": 0, "rss_after": 0, "peak": peak * MB}
+            for i, (source, wall, peak) in enumerate(cells)]
+    total = {"cells": len(rows), "wall": sum(r["wall"] for r in rows), "cpu": 0.0,
+             "peak": max(r["peak"] for r in rows), "failed": 0}
+    return {"notebook": "demo.ipynb", "total": total, "cells": rows}
+
+
+def test_profile_measures_time_and_memory(tmp_path: Path) -> None:
+    pytest.importorskip("nbclient")
+    pytest.importorskip("ipykernel")
+    np = pytest.importorskip("numpy")  # noqa: F841
+    nb_path = tmp_path / "demo.ipynb"
+    _write_notebook(nb_path, [
+        "import numpy as np\nimport time",
+        "time.sleep(0.6)",
+        "block = np.ones(32 * 1024 * 1024)\ntotal = float(block.sum())\ndel block",
+        "x = 1 / 0",
+        "print('not reached')",
+    ])
+    profile = profile_notebook(nb_path)
+    cells = profile["cells"]
+    assert [c["index"] for c in cells] == [0, 1, 2, 3]  # stops at the failing cell
+    assert [c["status"] for c in cells] == ["ok", "ok", "ok", "error"]
+    assert profile["total"]["failed"] == 1
+
+    sleep, alloc = cells[1], cells[2]
+    assert sleep["wall"] >= 0.6 and sleep["cpu"] < 0.3
+    if alloc["peak"] is not None:  # Linux: high-water mark reset per cell
+        assert alloc["peak"] > 200 * MB
+        assert alloc["rss_after"] - alloc["rss_before"] < 100 * MB
+        assert sleep["peak"] < 50 * MB
+
+    report = format_report(profile, top=2)
+    slowest = report.split("slowest cells")[1].splitlines()[2]
+    assert "time.sleep(0.6)" in slowest
+    json.dumps(profile)
+
+
+def test_diff_flags_regressions(tmp_path: Path) -> None:
+    old = _profile([("load", 1.0, 50), ("plot", 2.0, 10), ("model", 0.1, 5), ("gone", 0.2, 1)])
+    new = _profile([("load", 1.1, 50), ("plot", 3.5, 10), ("model", 0.1, 300), ("extra", 0.2, 1)])
+    rows = {r["first_line"]: r for r in compare(old, new)}
+    assert rows["plot"]["regression"] and rows["model"]["regression"]
+    assert not rows["load"]["regression"]  # within 20% / 0.5s
+    assert rows["gone"]["change"] == "removed" and rows["extra"]["change"] == "added"
+
+    failed = copy.deepcopy(old)
+    failed["cells"][0]["status"] = "error"
+    assert [r["first_line"] for r in compare(old, failed) if r["regression"]] == ["load"]
+
+    (tmp_path / "old.json").write_text(json.dumps(old), encoding="utf-8")
+    (tmp_path / "new.json").write_text(json.dumps(new), encoding="utf-8")
+    assert main(["diff", str(tmp_path / "old.json"), str(tmp_path / "old.json")]) == 0
+    assert main(["diff", str(tmp_path / "old.json"), str(tmp_path / "new.json")]) == 1
@@ -0,0 +1,90 @@
+"""Execution tier for the course notebooks (see tests/notebook_runner.py).
+
+Needs nbclient / nbformat / ipykernel; skipped otherwise. Scope is set by
+``NB_EXECUTE``: ``course`` (default, S1–S6), ``all`` (adds S0 and the
+``docs/_archive`` refs) or ``off``. Cell outputs are cached in
+``tests/.nb_cache``, so unchanged notebooks are not re-executed.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("nbclient")
+pytest.importorskip("nbformat")
+pytest.importorskip("ipykernel")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+from tests.notebook_runner import RUNNER_CONFIG, run_all, run_notebook, select_notebooks  # noqa: E402
+
+SCOPE = os.environ.get("NB_EXECUTE", "course")
+SELECTED = [] if SCOPE == "off" else select_notebooks(self_check=SCOPE == "all", archive=SCOPE == "all")
+
+
+@pytest.fixture(scope="module")
+def results():
+    return {r["notebook"]: r for r in run_all(SELECTED, cache_dir=RUNNER_CONFIG["cache_dir"])}
+
+
+@pytest.mark.skipif(not SELECTED, reason="NB_EXECUTE=off")
+@pytest.mark.parametrize("rel_path", SELECTED)
+def test_notebook_executes(results, rel_path: str) -> None:
+    result = results[rel_path]
+    assert result["status"] != "failed", f"{rel_path} cell {result['failed_cell']}: {result['error']}"
+
+
+def _write_notebook(path: Path, sources: list[str]) -> None:
+    cells = [{"id": "intro", "cell_type": "markdown", "metadata": {}, "source": "# demo"}]
+    cells += [{"id": f"cell-{i}", "cell_type": "code", "metadata": {}, "source": s, "outputs": [],
+               "execution_count": None} for i, s in enumerate(sources)]
+    nb = {"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(nb), encoding="utf-8")
+
+
+@pytest.fixture
+def course(tmp_path: Path) -> Path:
+    root = tmp_path / "course"
+    (root / "datasets" / "ecommerce").mkdir(parents=True)
+    (root / "datasets" / "ecommerce" / "data.csv").write_text("x\n1\n2\n", encoding="utf-8")
+    (root / "common").mkdir()
+    _write_notebook(root / "M1" / "demo.ipynb", [
+        "import pandas as pd\ndf = pd.read_csv('../datasets/ecommerce/data.csv')",
+        "df.to_csv('../datasets/ecommerce/data.csv', index=False)\nprint(df['x'].sum())",
+        "# 🏁 大地遊戲 — 作答格\ncheck(answer)",
+    ])
+    return root
+
+
+def test_cache_skips_unchanged_notebooks(course: Path, tmp_path: Path) -> None:
+    cache = tmp_path / "cache"
+    first = run_notebook("M1/demo.ipynb", root=course, cache_dir=cache)
+    assert first["status"] == "passed" and first["executed"] == 3
+
+    second = run_notebook("M1/demo.ipynb", root=course, cache_dir=cache, out_dir=tmp_path / "out")
+    assert second["status"] == "cached" and second["executed"] == 0
+    executed = json.loads((tmp_path / "out" / "demo.ipynb").read_text(encoding="utf-8"))
+    assert "".join(executed["cells"][2]["outputs"][0]["text"]) == "3\n"
+
+    # changed input data invalidates every cell
+    (course / "datasets" / "ecommerce" / "data.csv").write_text("x\n5\n", encoding="utf-8")
+    third = run_notebook("M1/demo.ipynb", root=course, cache_dir=cache)
+    assert third["status"] == "passed" and third["executed"] == 3
+
+
+def test_failures_and_timeouts(course: Path) -> None:
+    _write_notebook(course / "M1" / "bad.ipynb", ["x = 1", "# 🏁 大地遊戲\n1 / 0"])
+    result = run_notebook("M1/bad.ipynb", root=course)
+    assert result["status"] == "failed" and result["failed_cell"] == 2
+    assert "ZeroDivisionError" in result["error"]
+
+    _write_notebook(course / "M1" / "slow.ipynb", ["import time\ntime.sleep(30)", "print('unreachable')"])
+    result = run_notebook("M1/slow.ipynb", root=course, timeout=2)
+    assert result["status"] == "failed" and result["failed_cell"] == 1
+    assert "Timeout" in result["error"]
@@ -0,0 +1,109 @@
+"""Tests for common/orders_pipeline.py.
+
+The streaming pipeline must produce exactly what the in-memory S2
+``clean_orders`` rules produce, however the file is split into blocks.
+Needs numpy/pandas/pyarrow; skipped otherwise.
+"""
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+pa = pytest.importorskip("pyarrow")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+DATASETS_DIR = COURSE_ROOT / "datasets" / "ecommerce"
+sys.path.insert(0, str(COURSE_ROOT))
+
+import pandas as pd  # noqa: E402
+
+from common.orders_pipeline import clean_orders_stream, iter_clean_chunks, parse_amount  # noqa: E402
+
+
+def _reference_clean(path: Path) -> pd.DataFrame:
+    """S2 / M2 red_clean_orders 的 in-memory 版本。"""
+    df = pd.read_csv(path)
+    df.columns = df.columns.str.strip().str.lower()
+    amount = df["amount"].astype(str).str.replace("$", "", regex=False).str.replace(",", "", regex=False)
+    df["amount"] = pd.to_numeric(amount, errors="coerce").astype(float)
+    df["order_date"] = pd.to_datetime(df["order_date"], errors="coerce")
+    df = df.dropna(subset=["amount", "order_date"])
+    return df.drop_duplicates().reset_index(drop=True)
+
+
+def test_parse_amount_matches_python_float() -> None:
+    values = ["$3,538", "1355", "0.1", "-12.5", "$-1,200.75", "7.", "12345678901234567890"]
+    assert list(parse_amount(pa.array(values))) == [
+        float(v.replace("$", "").replace(",", "")) for v in values
+    ]
+
+
+def test_parse_amount_invalid_is_nan() -> None:
+    parsed = parse_amount(pa.array(["", None, "abc", "1.2.3", "$", "1-2"]))
+    assert pd.isna(parsed).all()
+
+
+@pytest.mark.parametrize("block_size", [2_000, 1 << 20])
+def test_classroom_file_matches_in_memory_clean(tmp_path: Path, block_size: int) -> None:
+    src = DATASETS_DIR / "orders_raw.csv"
+    stats = clean_orders_stream(src, tmp_path / "clean.parquet", block_size=block_size)
+    expected = _reference_clean(src)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "clean.parquet"), expected)
+    assert stats["rows_in"] == 210
+    assert stats["rows_out"] == len(expected)
+
+
+def test_duplicates_are_detected_across_blocks(tmp_path: Path, monkeypatch) -> None:
+    spec = importlib.util.spec_from_file_location("_generate", DATASETS_DIR / "_generate.py")
+    gen = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gen)
+    monkeypatch.setattr(gen, "BLOCK_ROWS", 1_000)
+    gen.generate_scaled(tmp_path, scale=20, formats=frozenset({"csv"}))
+
+    src = tmp_path / "orders_raw.csv"
+    stats = clean_orders_stream(src, tmp_path / "clean.parquet", block_size=16_000)
+    expected = _reference_clean(src)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "clean.parquet"), expected)
+    assert stats["dropped_duplicates"] > 0
+    assert stats["rows_in"] == stats["rows_out"] + stats["dropped_null"] + stats["dropped_duplicates"]
+
+
+def _write_orders(path: Path, rows: list[str]) -> Path:
+    path.write_text("order_id,customer_id,product_id,qty,order_date,amount\n" + "".join(rows), encoding="utf-8")
+    return path
+
+
+def test_leading_block_of_null_rows(tmp_path: Path) -> None:
+    rows = [f"{i},1,1,1,,100\n" for i in range(300)]                       # 沒有 order_date → 整塊被丟掉
+    rows += [f"{i},2,1,{i % 5 or ''},2025-01-{i % 28 + 1:02d},{i}\n" for i in range(300, 600)]
+    src = _write_orders(tmp_path / "orders_raw.csv", rows)
+    stats = clean_orders_stream(src, tmp_path / "clean.parquet", block_size=4_000)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "clean.parquet"), _reference_clean(src))
+    assert stats["dropped_null"] == 300 and stats["rows_out"] == 300
+
+
+def test_block_of_only_duplicates(tmp_path: Path) -> None:
+    first = [f"{i},1,1,{i % 5 or ''},2025-02-01,{i}\n" for i in range(200)]      # qty 偶有缺值，與課堂檔相同
+    rest = [f"{i},1,1,{i % 5 or ''},2025-03-01,{i}\n" for i in range(200, 400)]
+    src = _write_orders(tmp_path / "orders_raw.csv", first + first + first + rest)   # 中間幾塊全是重複
+    stats = clean_orders_stream(src, tmp_path / "clean.parquet", block_size=2_000)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "clean.parquet"), _reference_clean(src))
+    assert stats["dropped_duplicates"] == 400 and stats["rows_out"] == 400
+
+
+def test_fill_happens_before_dedupe(tmp_path: Path) -> None:
+    rows = ["1,1,1,,2025-01-01,10\n", "1,1,1,3,2025-01-01,10\n", "2,1,1,3,2025-01-02,20\n"] * 100
+    src = _write_orders(tmp_path / "orders_raw.csv", rows)
+    every = pa.concat_tables(iter_clean_chunks(src, block_size=2_000, dedupe=False))
+    assert every.num_rows == 300 and every.column("qty").null_count == 100
+
+    # 缺值補成 3 之後與下一列相同，去重時一起去掉（同 S2 的 fillna → drop_duplicates）
+    stats: dict = {}
+    filled = pa.concat_tables(iter_clean_chunks(src, block_size=2_000, stats=stats, fill={"qty": 3.0}))
+    expected = _reference_clean(src).assign(qty=lambda df: df["qty"].fillna(3.0)).drop_duplicates()
+    pd.testing.assert_frame_equal(filled.to_pandas(), expected.reset_index(drop=True))
+    assert stats["rows_out"] == 2
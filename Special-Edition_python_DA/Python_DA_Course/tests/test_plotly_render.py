@@ -0,0 +1,115 @@
+"""Tests for common/plotly_render.py: point budgets, LTTB and cached dashboard aggregates."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+go = pytest.importorskip("plotly.graph_objects")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+from common.datasets import load_dataset  # noqa: E402
+from common.plotly_render import DashboardData, count_points, lttb, scatter_figure  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def enriched() -> pd.DataFrame:
+    return load_dataset("ecommerce/orders_enriched")
+
+
+@pytest.fixture(scope="module")
+def big(enriched) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 300_000
+    df = enriched.iloc[rng.integers(0, len(enriched), n)].reset_index(drop=True)
+    df["amount"] = df["amount"] * rng.lognormal(0, 0.3, n)
+    df["unit_price"] = df["unit_price"] * rng.lognormal(0, 0.3, n)
+    df["order_date"] = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 3 * 365, n), unit="D")
+    return df
+
+
+def _lttb_reference(x, y, n_out):
+    """教科書版 LTTB（逐點迴圈）。"""
+    n = len(x)
+    every = (n - 2) / (n_out - 2)
+    keep, a = [0], 0
+    for i in range(n_out - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        nlo, nhi = hi, min(int((i + 2) * every) + 1, n)
+        if i == n_out - 3:
+            nlo, nhi = n - 1, n
+        avg_x = sum(x[nlo:nhi]) / (nhi - nlo)
+        avg_y = sum(y[nlo:nhi]) / (nhi - nlo)
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+    return keep + [n - 1]
+
+
+def test_lttb_matches_reference_and_keeps_extremes() -> None:
+    rng = np.random.default_rng(1)
+    x = np.arange(5_000, dtype=float)
+    y = np.cumsum(rng.normal(size=len(x)))
+    y[1234] = 100.0
+    keep = lttb(x, y, 200)
+    assert list(keep) == _lttb_reference(list(x), list(y), 200)
+    assert 1234 in keep
+    dates = pd.date_range("2020-01-01", periods=len(x), freq="h").to_numpy()
+    assert list(lttb(dates, y, 200)) == list(keep)
+
+
+def test_small_scatter_draws_every_row(enriched) -> None:
+    fig = scatter_figure(enriched, x="unit_price", y="amount", color="category", hover_data=["product_name"])
+    assert count_points(fig) == len(enriched)
+    assert [t.name for t in fig.data] == list(enriched["category"].unique())
+
+
+def test_large_scatter_stays_under_budget(big) -> None:
+    fig = scatter_figure(big, x="unit_price", y="amount", color="category",
+                         hover_data=["product_name"], max_points=5_000)
+    assert 0 < count_points(fig) <= 5_000
+    represented = sum(int(t.customdata[:, -1].sum()) for t in fig.data)
+    assert represented == len(big)
+    # 極值一定落在某個格子的代表點範圍內
+    assert max(max(t.y) for t in fig.data) >= big["amount"].quantile(0.999)
+
+
+def test_dashboard_aggregates_match_groupby_and_are_cached(big) -> None:
+    data = DashboardData(big)
+    agg = data.aggregates(region=["North", "East"])
+    sub = big[big["region"].isin(["North", "East"])]
+    monthly = sub.groupby(sub["order_date"].dt.to_period("M").astype(str))["amount"].sum()
+    assert list(agg["monthly"]["month"]) == list(monthly.index)
+    np.testing.assert_allclose(agg["monthly"]["amount"], monthly.to_numpy())
+    top = sub.groupby("product_name")["amount"].sum().nlargest(10)
+    assert list(agg["top_products"]["product_name"]) == list(top.index)
+    region = sub.groupby("region")["amount"].sum()
+    np.testing.assert_allclose(agg["region"].set_index("region")["amount"], region)
+
+    assert data.aggregates(region=("East", "North")) is agg
+    assert (data.hits, data.misses) == (1, 1)
+    fig = data.dashboard(region=["North", "East"])
+    assert len(fig.data) == 4
+    assert count_points(fig) < 100
+
+
+def test_dashboard_skips_rows_without_order_date(enriched) -> None:
+    df = enriched.copy()
+    df["order_date"] = pd.to_datetime(df["order_date"])
+    df.loc[[0, 5], "order_date"] = pd.NaT
+    agg = DashboardData(df).aggregates()
+    valid = df.dropna(subset=["order_date", "amount"])
+    monthly = valid.groupby(valid["order_date"].dt.to_period("M").astype(str))["amount"].sum()
+    assert list(agg["monthly"]["month"]) == list(monthly.index)
+    np.testing.assert_allclose(agg["monthly"]["amount"], monthly.to_numpy())
+    region = valid.groupby("region")["amount"].sum()
+    np.testing.assert_allclose(agg["region"].set_index("region")["amount"], region)
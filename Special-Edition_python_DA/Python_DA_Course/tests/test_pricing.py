@@ -0,0 +1,92 @@
+"""Tests for common/pricing.py against the nested ``np.where`` / ``np.select`` formulations."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+import common.pricing as pricing  # noqa: E402
+from common.pricing import DOUBLE11_RULES, PricingRules  # noqa: E402
+
+CATEGORIES = np.array(["Electronics", "Books", "Home", "Sports", "Clothing"], dtype=object)
+
+FLASH_RULES = pd.DataFrame([
+    {"category": "Electronics", "stock_min": 200, "discount": 0.6},
+    {"stock_min": 100, "discount": 0.7},
+    {"category": "Books", "price_max": 300, "discount": 0.85},
+    {"stock_min": 20, "stock_max": 100, "price_min": 1000, "discount": 0.88},
+    {"stock_min": 20, "stock_max": 100, "discount": 0.9},
+])
+
+
+def _red_double11_prices(prices, stocks):
+    return np.where(
+        stocks >= 100, prices * 0.7,
+        np.where(stocks >= 20, prices * 0.9, prices),
+    )
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    rng = np.random.default_rng(42)
+    n = 200_000
+    prices = rng.integers(80, 2500, n).astype(float)
+    stocks = rng.integers(0, 300, n).astype(float)
+    stocks[:6] = [19, 20, 99, 100, np.nan, -1]
+    codes = rng.integers(0, len(CATEGORIES), n)
+    return prices, stocks, codes
+
+
+def _flash_reference(prices, stocks, categories):
+    return np.select(
+        [(categories == "Electronics") & (stocks >= 200),
+         stocks >= 100,
+         (categories == "Books") & (prices < 300),
+         (stocks >= 20) & (stocks < 100) & (prices >= 1000),
+         (stocks >= 20) & (stocks < 100)],
+        [prices * 0.6, prices * 0.7, prices * 0.85, prices * 0.88, prices * 0.9],
+        prices,
+    )
+
+
+def test_double11_rules_match_nested_where(catalog) -> None:
+    prices, stocks, _ = catalog
+    expected = _red_double11_prices(prices, stocks)
+    rules = PricingRules(DOUBLE11_RULES)
+    assert np.array_equal(rules.apply(prices, stocks, chunk_size=4096), expected)
+    assert np.array_equal(rules.apply_select(prices, stocks), expected)
+
+
+@pytest.mark.parametrize("compare_edges", [16, 0])
+def test_category_and_price_rules_match_select(catalog, monkeypatch, compare_edges) -> None:
+    monkeypatch.setattr(pricing, "_COMPARE_EDGES", compare_edges)  # 0 → 走 searchsorted
+    prices, stocks, codes = catalog
+    names = CATEGORIES[codes]
+    expected = _flash_reference(prices, stocks, names)
+    rules = PricingRules(FLASH_RULES)
+    assert np.array_equal(rules.apply(prices, stocks, names), expected)
+    assert np.array_equal(rules.apply(prices, stocks, codes, labels=list(CATEGORIES)), expected)
+    assert np.array_equal(rules.apply_select(prices, stocks, names), expected)
+
+
+def test_memmapped_files_and_csv_rules(catalog, tmp_path: Path) -> None:
+    prices, stocks, codes = catalog
+    for name, values in (("prices", prices), ("stocks", stocks), ("codes", codes)):
+        np.save(tmp_path / f"{name}.npy", values)
+    FLASH_RULES.to_csv(tmp_path / "rules.csv", index=False)
+    rules = PricingRules.from_csv(tmp_path / "rules.csv")
+    out = rules.apply_files(tmp_path / "prices.npy", tmp_path / "stocks.npy", tmp_path / "sale.npy",
+                            categories_path=tmp_path / "codes.npy", labels=list(CATEGORIES), chunk_size=10_000)
+    assert np.array_equal(np.load(out), _flash_reference(prices, stocks, CATEGORIES[codes]))
+
+
+def test_rule_without_discount_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        PricingRules([{"stock_min": 10}])
@@ -0,0 +1,88 @@
+"""Tests for common/quantile_sketch.py against exact ``groupby().quantile()`` results."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+from common.datasets import load_dataset  # noqa: E402
+from common.quantile_sketch import GroupedQuantiles, QuantileSketch, grouped_quantiles  # noqa: E402
+
+QS = np.array([0.01, 0.25, 0.5, 0.95, 0.99])
+
+
+def _true_rank(sorted_values, estimates):
+    return np.searchsorted(sorted_values, estimates, side="right") / len(sorted_values)
+
+
+def test_small_groups_match_pandas():
+    df = load_dataset("ecommerce/orders_enriched")
+    result = grouped_quantiles(df, by="category", column="amount", q=(0.5, 0.95))
+    expected = df.groupby("category")["amount"].quantile([0.5, 0.95]).unstack()
+    np.testing.assert_allclose(result[["p50", "p95"]].to_numpy(), expected.to_numpy())
+    assert (result["rank_error"] == 0).all()
+    pd.testing.assert_series_equal(result["count"], df.groupby("category")["amount"].count(),
+                                   check_names=False)
+
+
+def test_rank_error_within_bound():
+    rng = np.random.default_rng(3)
+    values = rng.lognormal(7, 1, 2_000_000)
+    sketch = QuantileSketch(k=256)
+    for chunk in np.array_split(values, 7):
+        sketch.update(chunk)
+    assert sketch.n == len(values)
+    assert sketch.retained < 256 * 20
+
+    bound = sketch.rank_error()
+    assert 0 < bound < 0.02
+    ranks = _true_rank(np.sort(values), sketch.quantile(QS))
+    assert np.all(np.abs(ranks - QS) <= bound)
+    assert sketch.quantile(0) == values.min() and sketch.quantile(1) == values.max()
+    assert np.all(np.abs(sketch.rank(np.quantile(values, QS)) - QS) <= bound)
+
+
+def test_merge_of_partial_sketches():
+    rng = np.random.default_rng(4)
+    values = np.concatenate([rng.normal(0, 1, 600_000), rng.normal(5, 2, 400_000), [np.nan] * 10])
+    rng.shuffle(values)
+    parts = [QuantileSketch(k=256, seed=i).update(chunk) for i, chunk in enumerate(np.array_split(values, 50))]
+    merged = QuantileSketch(k=256)
+    for part in parts:
+        merged.merge(part)
+    assert merged.n == 1_000_000
+
+    clean = np.sort(values[~np.isnan(values)])
+    bound = merged.rank_error()
+    assert np.all(np.abs(_true_rank(clean, merged.quantile(QS)) - QS) <= bound)
+
+
+def test_grouped_chunks_and_merge():
+    rng = np.random.default_rng(5)
+    n = 600_000
+    df = pd.DataFrame({
+        "category": np.array(["Electronics", "Books", "Home", None], dtype=object)[rng.integers(0, 4, n)],
+        "amount": rng.gamma(2.0, 800.0, n),
+    })
+    chunks = [df.iloc[i:i + 50_000] for i in range(0, n, 50_000)]
+    streamed = grouped_quantiles(iter(chunks), q=(0.5, 0.95), k=512)
+
+    left, right = GroupedQuantiles(k=512), GroupedQuantiles(k=512)
+    for i, chunk in enumerate(chunks):
+        (left if i % 2 else right).update_frame(chunk)
+    merged = left.merge(right).result(q=(0.5, 0.95))
+    assert list(merged.index) == list(streamed.index) == ["Books", "Electronics", "Home"]
+    pd.testing.assert_series_equal(merged["count"], streamed["count"], check_names=False)
+
+    for key, group in df.dropna(subset=["category"]).groupby("category"):
+        clean = np.sort(group["amount"].to_numpy())
+        for table in (streamed, merged):
+            ranks = _true_rank(clean, table.loc[key, ["p50", "p95"]].to_numpy(dtype=float))
+            assert np.all(np.abs(ranks - [0.5, 0.95]) <= table.loc[key, "rank_error"])
@@ -0,0 +1,80 @@
+"""Tests for common/rfm.py against the pandas groupby / qcut formulations."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+from common.datasets import load_dataset  # noqa: E402
+from common.rfm import RFMPartial, quantile_scores, rfm_table, top_customers  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def orders() -> pd.DataFrame:
+    df = load_dataset("ecommerce/orders_raw")
+    df.columns = df.columns.str.strip().str.lower()
+    df["amount"] = df["amount"].astype(str).str.replace("$", "", regex=False).str.replace(",", "", regex=False).astype(float)
+    df["order_date"] = pd.to_datetime(df["order_date"], errors="coerce")
+    return df.dropna(subset=["order_date"]).drop_duplicates()
+
+
+def test_top_customers_matches_red_rfm_top5(orders) -> None:
+    customers = load_dataset("ecommerce/customers")
+    df = orders.merge(customers[["customer_id", "customer_name"]], on="customer_id")
+    expected = (
+        df.groupby(["customer_id", "customer_name"])
+        .agg(R=("order_date", "max"), F=("order_id", "count"), M=("amount", "sum"))
+        .reset_index()
+        .sort_values("M", ascending=False)
+        .head(5)
+        .reset_index(drop=True)
+    )
+    got = top_customers(RFMPartial.from_frame(df), 5, customers)
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+
+
+def test_merged_partials_equal_single_pass(orders) -> None:
+    whole = RFMPartial.from_frame(orders)
+    shuffled = orders.sample(frac=1, random_state=0)
+    parts = [RFMPartial.from_frame(shuffled.iloc[i::4]) for i in range(4)]
+    merged = RFMPartial.concat(parts)
+    pd.testing.assert_frame_equal(
+        rfm_table(merged).sort_values("customer_id").reset_index(drop=True),
+        rfm_table(whole),
+    )
+
+
+def test_sparse_and_string_keys_use_same_aggregation() -> None:
+    dates = pd.to_datetime(["2025-01-01", "2025-03-01", "2025-02-01", "2025-01-15"])
+    amount = [10.0, 20.0, 5.0, 1.0]
+    dense = RFMPartial.from_orders([1, 2, 1, 2], dates, amount)
+    sparse = RFMPartial.from_orders([1, 10**15, 1, 10**15], dates, amount)
+    text = RFMPartial.from_orders(["a", "b", "a", "b"], dates, amount)
+    for p in (dense, sparse, text):
+        assert list(p.frequency) == [2, 2]
+        assert list(p.monetary) == [15.0, 21.0]
+        assert list(p.last_order) == list(pd.to_datetime(["2025-02-01", "2025-03-01"]).values)
+
+
+def test_quantile_scores_match_qcut_on_first_rank() -> None:
+    values = np.random.default_rng(1).integers(0, 20, 1003)
+    expected = pd.qcut(pd.Series(values).rank(method="first"), 5, labels=False) + 1
+    assert (quantile_scores(values) == expected.to_numpy()).all()
+
+
+def test_recent_frequent_customers_are_champions() -> None:
+    n = 100
+    dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(n), unit="D")
+    # 顧客 i 下 i+1 單，最後一單在第 i 天 → 編號越大越近期、越頻繁
+    ids = np.repeat(np.arange(n), np.arange(1, n + 1))
+    table = rfm_table(RFMPartial.from_orders(ids, dates.values[ids], np.ones(len(ids))))
+    assert table["segment"].iloc[-1] == "Champions"
+    assert table["segment"].iloc[0] == "Hibernating"
+    assert table["recency_days"].iloc[-1] == 1
@@ -0,0 +1,101 @@
+"""Tests for common/rolling_stream.py against pandas ``resample().sum().rolling()``."""
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(COURSE_ROOT))
+
+from common.datasets import load_dataset  # noqa: E402
+from common.rolling_stream import (  # noqa: E402
+    STATS, DailyRollingEngine, IndexableSkiplist, quantile_name, rolling_frame,
+)
+
+WINDOWS = (3, 7)
+QUANTILES = (0.5, 0.9)
+
+
+@pytest.fixture(scope="module")
+def orders() -> pd.DataFrame:
+    df = load_dataset("ecommerce/orders_enriched")
+    return df.sort_values("order_date", kind="stable").reset_index(drop=True)
+
+
+def _pandas_rolling(series: pd.Series) -> pd.DataFrame:
+    columns = {}
+    for w in WINDOWS:
+        r = series.rolling(w)
+        for name in STATS:
+            columns[f"{name}_{w}"] = getattr(r, name)()
+        for q in QUANTILES:
+            columns[f"{quantile_name(q)}_{w}"] = r.quantile(q)
+    return pd.DataFrame(columns)
+
+
+def test_skiplist_matches_sorted_list() -> None:
+    rng = random.Random(0)
+    skiplist, reference = IndexableSkiplist(64), []
+    for _ in range(5_000):
+        if reference and rng.random() < 0.45:
+            value = rng.choice(reference)
+            reference.remove(value)
+            skiplist.remove(value)
+        else:
+            value = float(rng.randint(0, 50))
+            reference.append(value)
+            skiplist.insert(value)
+        reference.sort()
+        assert len(skiplist) == len(reference)
+        if reference:
+            i = rng.randrange(len(reference))
+            assert skiplist[i] == reference[i]
+    assert list(skiplist) == reference
+
+
+def test_per_category_daily_matches_pandas(orders) -> None:
+    daily = orders.set_index("order_date").groupby("category")["amount"].resample("D").sum()
+    expected = pd.concat({k: _pandas_rolling(g.droplevel(0)) for k, g in daily.groupby(level=0)},
+                         names=["category", "date"])
+    got = rolling_frame(orders, key="category", windows=WINDOWS, quantiles=QUANTILES)
+    pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=1e-9, atol=1e-6, check_freq=False)
+
+
+def test_chunked_file_pass_matches_pandas(orders, tmp_path: Path) -> None:
+    path = tmp_path / "sorted.csv"
+    orders.to_csv(path, index=False)
+    got = rolling_frame(pd.read_csv(path, parse_dates=["order_date"], chunksize=37),
+                        windows=WINDOWS, quantiles=QUANTILES)
+    expected = _pandas_rolling(orders.set_index("order_date")["amount"].resample("D").sum())
+    expected.index.name = "date"
+    pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=1e-9, atol=1e-6, check_freq=False)
+
+
+def test_live_feed_equals_batch_pass(orders) -> None:
+    engine = DailyRollingEngine(WINDOWS, QUANTILES)
+    rows = []
+    for date, amount, category in zip(orders["order_date"], orders["amount"], orders["category"]):
+        rows.extend(engine.push(date, amount, key=category))
+    rows.extend(engine.flush())
+    live = pd.DataFrame(rows).set_index(["key", "date"]).sort_index()
+    batch = rolling_frame(orders, key="category", windows=WINDOWS, quantiles=QUANTILES)
+    batch.index.names = ["key", "date"]
+    pd.testing.assert_frame_equal(live, batch)
+    assert engine.latest("Books") == rows[max(i for i, r in enumerate(rows) if r["key"] == "Books")]
+
+    with pytest.raises(ValueError):
+        engine.push(orders["order_date"].iloc[0], 1.0, key="Books")
+
+
+def test_monthly_mode_matches_yellow_rolling_avg(orders) -> None:
+    monthly = orders.set_index("order_date").resample("ME")["amount"].sum()
+    got = rolling_frame(orders, windows=(3,), quantiles=(), freq="M")
+    expected = monthly.rolling(window=3).mean()
+    assert list(got.index) == list(expected.index)
+    np.testing.assert_allclose(got["mean_3"], expected, rtol=1e-12)
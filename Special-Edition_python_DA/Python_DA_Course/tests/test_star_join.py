@@ -0,0 +1,82 @@
+"""Tests for common/star_join.py against chained ``pd.merge(how='left')``."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+COURSE_ROOT = Path(__file__).resolve().parent.parent
+DATASETS_DIR = COURSE_ROOT / "datasets" / "ecommerce"
+sys.path.insert(0, str(COURSE_ROOT))
+
+from common.datasets import load_dataset  # noqa: E402
+from common.star_join import Dimension, StarSchema, build_star, load_star  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def tables() -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    return (
+        load_dataset("ecommerce/orders_clean"),
+        load_dataset("ecommerce/customers"),
+        load_dataset("ecommerce/products"),
+    )
+
+
+def _merge(orders, customers, products) -> pd.DataFrame:
+    return (orders.merge(customers, on="customer_id", how="left")
+            .merge(products, on="product_id", how="left"))
+
+
+def test_enrich_matches_double_merge(tables) -> None:
+    orders, customers, products = tables
+    got = build_star(customers, products).enrich(orders)
+    pd.testing.assert_frame_equal(got, _merge(orders, customers, products))
+
+
+def test_missing_keys_behave_like_left_join(tables) -> None:
+    orders, customers, products = tables
+    orders = orders.copy()
+    orders.loc[0, "customer_id"] = 9999
+    orders.loc[1, "product_id"] = np.nan
+    customers = customers.copy()
+    customers.loc[2, "region"] = np.nan
+    got = build_star(customers, products).enrich(orders)
+    pd.testing.assert_frame_equal(got, _merge(orders, customers, products))
+
+
+def test_sparse_keys_fall_back_to_index(tables) -> None:
+    orders, customers, products = tables
+    orders = orders.assign(customer_id=orders["customer_id"] * 10**9)
+    customers = customers.assign(customer_id=customers["customer_id"] * 10**9)
+    star = build_star(customers, products)
+    assert star.dimensions[0]._index is not None
+    pd.testing.assert_frame_equal(star.enrich(orders), _merge(orders, customers, products))
+
+
+def test_chunks_and_categorical_output(tables) -> None:
+    orders, customers, products = tables
+    star = build_star(customers, products)
+    chunks = star.enrich_chunks(pd.read_csv(DATASETS_DIR / "orders_clean.csv", parse_dates=["order_date"], chunksize=50))
+    pd.testing.assert_frame_equal(pd.concat(chunks), star.enrich(orders))
+
+    compact = build_star(customers, products, categorical=True).enrich(orders)
+    assert isinstance(compact["region"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(compact.astype({c: object for c in compact.select_dtypes("category")}),
+                                  star.enrich(orders))
+
+
+def test_duplicate_keys_and_columns_rejected(tables) -> None:
+    _, customers, products = tables
+    with pytest.raises(ValueError):
+        Dimension(pd.concat([customers, customers.head(1)]), "customer_id")
+    with pytest.raises(ValueError):
+        StarSchema([Dimension(customers, "customer_id"),
+                    Dimension(customers.rename(columns={"customer_id": "id2"}), "id2")])
+
+
+def test_load_star_is_cached() -> None:
+    assert load_star(DATASETS_DIR) is load_star(DATASETS_DIR)
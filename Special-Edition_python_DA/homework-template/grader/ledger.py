@@ -0,0 +1,232 @@
+"""
+成績帳本（Grade ledger）
+========================
+generate_report 只產生 Markdown、GITHUB_OUTPUT 只有總分，
+之後要做全班分析只能用 regex 去抓 PR comment。
+
+這裡把每次批改的每一題都寫成一筆結構化紀錄，附加到 SQLite 帳本。
+對外的 records view 每列就是一題：
+
+  submission  這次批改的 id（同一次 run 的紀錄共用）
+  student     學生帳號
+  cohort      班別 / 梯次
+  module      模組名稱（MODULES 的 key）
+  test        題目名稱
+  passed      是否通過 (0/1)
+  points      實得分數
+  max_points  滿分
+  duration    執行秒數（pytest 的 setup+call+teardown；效能題為學生版本秒數）
+  category    passed / failed / timeout / memory / not_run
+  graded_at   批改時間（UTC ISO 8601，到微秒）
+
+為了讓查詢維持毫秒等級，寫入時順便維護兩張彙總表：
+- module_scores：每次繳交 × 模組的得分（分數分佈用）
+- test_stats：每個 cohort × 題目的累計通過數，分 all（所有繳交）與
+  latest（每位學生最新一次）兩種 scope；學生重交時扣掉舊的、加上新的。
+  沒有秒數的題目（例如沒跑到）不算進 durations，平均秒數只除以有秒數的次數
+
+「最新一次」以 graded_at 判斷，同時間的以寫進帳本的先後（rowid）為準，
+append() 與合併後的 rebuild_stats() 用同一個規則。
+
+查詢請用 ledger_query.py。多個 runner 產生的帳本可用 merge() 合併。
+"""
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    submission TEXT PRIMARY KEY,
+    student    TEXT NOT NULL,
+    cohort     TEXT NOT NULL,
+    graded_at  TEXT NOT NULL,
+    is_latest  INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_student
+    ON submissions (cohort, student, is_latest);
+
+CREATE TABLE IF NOT EXISTS results (
+    submission TEXT NOT NULL,
+    module     TEXT NOT NULL,
+    test       TEXT NOT NULL,
+    passed     INTEGER NOT NULL,
+    points     INTEGER NOT NULL,
+    max_points INTEGER NOT NULL,
+    duration   REAL,
+    category   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_submission ON results (submission);
+
+CREATE TABLE IF NOT EXISTS module_scores (
+    submission TEXT NOT NULL,
+    module     TEXT NOT NULL,
+    points     INTEGER NOT NULL,
+    max_points INTEGER NOT NULL,
+    PRIMARY KEY (submission, module)
+);
+
+CREATE TABLE IF NOT EXISTS test_stats (
+    cohort         TEXT NOT NULL,
+    scope          TEXT NOT NULL,
+    module         TEXT NOT NULL,
+    test           TEXT NOT NULL,
+    attempts       INTEGER NOT NULL,
+    passes         INTEGER NOT NULL,
+    timeouts       INTEGER NOT NULL,
+    memory_errors  INTEGER NOT NULL,
+    total_duration REAL NOT NULL,
+    durations      INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (cohort, scope, module, test)
+);
+
+CREATE VIEW IF NOT EXISTS records AS
+    SELECT s.submission, s.student, s.cohort, r.module, r.test, r.passed,
+           r.points, r.max_points, r.duration, r.category, s.graded_at
+    FROM results r JOIN submissions s USING (submission);
+"""
+
+RESULT_COLUMNS = ["submission", "module", "test", "passed", "points",
+                  "max_points", "duration", "category"]
+
+# 把一次繳交的 results 以 sign (+1 / -1) 加進 test_stats
+_ADD_STATS = """
+INSERT INTO test_stats (cohort, scope, module, test, attempts, passes,
+                        timeouts, memory_errors, total_duration, durations)
+SELECT :cohort, :scope, module, test, :sign, :sign * passed,
+       :sign * (category = 'timeout'), :sign * (category = 'memory'),
+       :sign * COALESCE(duration, 0), :sign * (duration IS NOT NULL)
+FROM results WHERE submission = :submission
+ON CONFLICT (cohort, scope, module, test) DO UPDATE SET
+    attempts       = attempts + excluded.attempts,
+    passes         = passes + excluded.passes,
+    timeouts       = timeouts + excluded.timeouts,
+    memory_errors  = memory_errors + excluded.memory_errors,
+    total_duration = total_duration + excluded.total_duration,
+    durations      = durations + excluded.durations
+"""
+
+# 同一位學生的繳交由新到舊：graded_at 相同時後寫入的較新（與 append 的 >= 一致）
+_NEWEST_FIRST = "ORDER BY graded_at DESC, rowid DESC"
+
+
+def connect(path) -> sqlite3.Connection:
+    """開啟（必要時建立）帳本"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(test_stats)")}
+    if "durations" not in columns:
+        # 舊版帳本沒有 durations 欄：補上後重算彙總
+        conn.execute("ALTER TABLE test_stats ADD COLUMN durations INTEGER NOT NULL DEFAULT 0")
+        rebuild_stats(conn)
+    return conn
+
+
+def _add_stats(conn, submission: str, cohort: str, scope: str, sign: int):
+    conn.execute(_ADD_STATS, {"submission": submission, "cohort": cohort,
+                              "scope": scope, "sign": sign})
+
+
+def append(path, records: list, student: str, cohort: str,
+           submission: str = None, graded_at: str = None) -> str:
+    """把一次批改的紀錄附加到帳本，回傳 submission id
+
+    records 為 dict 的 list，需含 module / test / passed / points / max_points /
+    duration / category；其餘欄位由參數補上。
+    """
+    submission = submission or uuid.uuid4().hex
+    graded_at = graded_at or datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+    module_scores = {}
+    for r in records:
+        pts, total = module_scores.get(r["module"], (0, 0))
+        module_scores[r["module"]] = (pts + int(r["points"]), total + int(r["max_points"]))
+
+    conn = connect(path)
+    with conn:
+        prev = conn.execute(
+            "SELECT submission, graded_at FROM submissions "
+            "WHERE cohort = ? AND student = ? AND is_latest = 1",
+            (cohort, student),
+        ).fetchone()
+        is_latest = prev is None or graded_at >= prev["graded_at"]
+
+        conn.execute("INSERT INTO submissions VALUES (?, ?, ?, ?, ?)",
+                     (submission, student, cohort, graded_at, int(is_latest)))
+        conn.executemany(
+            f"INSERT INTO results ({', '.join(RESULT_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in RESULT_COLUMNS)})",
+            [(submission, r["module"], r["test"], int(r["passed"]), int(r["points"]),
+              int(r["max_points"]), r.get("duration"), r["category"]) for r in records],
+        )
+        conn.executemany("INSERT INTO module_scores VALUES (?, ?, ?, ?)",
+                         [(submission, m, p, t) for m, (p, t) in module_scores.items()])
+
+        _add_stats(conn, submission, cohort, "all", +1)
+        if is_latest:
+            if prev is not None:
+                _add_stats(conn, prev["submission"], cohort, "latest", -1)
+                conn.execute("UPDATE submissions SET is_latest = 0 WHERE submission = ?",
+                             (prev["submission"],))
+            _add_stats(conn, submission, cohort, "latest", +1)
+    conn.close()
+    return submission
+
+
+def rebuild_stats(conn):
+    """從 results 重新計算 is_latest 與 test_stats（合併帳本後使用）"""
+    with conn:
+        conn.execute(f"""
+            UPDATE submissions SET is_latest = (
+                submission = (SELECT s2.submission FROM submissions s2
+                              WHERE s2.cohort = submissions.cohort
+                                AND s2.student = submissions.student
+                              {_NEWEST_FIRST}
+                              LIMIT 1)
+            )
+        """)
+        conn.execute("DELETE FROM test_stats")
+        conn.execute("""
+            INSERT INTO test_stats (cohort, scope, module, test, attempts, passes,
+                                    timeouts, memory_errors, total_duration, durations)
+            SELECT s.cohort, scope.name, r.module, r.test, COUNT(*), SUM(r.passed),
+                   SUM(r.category = 'timeout'), SUM(r.category = 'memory'),
+                   COALESCE(SUM(r.duration), 0), COUNT(r.duration)
+            FROM results r
+            JOIN submissions s USING (submission)
+            JOIN (SELECT 'all' AS name UNION ALL SELECT 'latest') AS scope
+              ON scope.name = 'all' OR s.is_latest = 1
+            GROUP BY s.cohort, scope.name, r.module, r.test
+        """)
+
+
+def merge(target, sources: list) -> int:
+    """把多個帳本（例如各 PR 的 artifact）合併進 target，回傳新增的繳交數
+
+    以 submission 判斷是否已合併過，重複執行不會產生重複紀錄。
+    """
+    added = 0
+    conn = connect(target)
+    for src in sources:
+        conn.execute("ATTACH DATABASE ? AS src", (str(src),))
+        with conn:
+            new = "submission NOT IN (SELECT submission FROM main.submissions)"
+            # 依來源的寫入順序併入，同時間的繳交仍是後寫入的較新
+            cur = conn.execute(
+                f"INSERT INTO submissions SELECT * FROM src.submissions WHERE {new} ORDER BY rowid")
+            added += cur.rowcount
+            # 剛併入的 submission = 已在 submissions、但還沒有 module_scores 的
+            conn.execute(
+                "INSERT INTO results SELECT * FROM src.results "
+                "WHERE submission IN (SELECT submission FROM main.submissions "
+                "EXCEPT SELECT submission FROM main.module_scores)")
+            conn.execute(
+                "INSERT INTO module_scores SELECT * FROM src.module_scores WHERE "
+                "submission NOT IN (SELECT submission FROM main.module_scores)")
+        conn.execute("DETACH DATABASE src")
+    rebuild_stats(conn)
+    conn.close()
+    return added
@@ -0,0 +1,157 @@
+"""
+成績帳本查詢
+============
+對 ledger.py 產生的 SQLite 帳本做全班層級的分析。
+查詢只讀寫入時維護好的彙總表（test_stats / module_scores），
+上千份繳交也是毫秒等級；逐題明細請直接查 records view。
+
+預設只看「每位學生最新一次繳交」，避免重交多次的學生被重複計算；
+傳 latest=False 則納入所有繳交紀錄。
+
+用法：
+  python grader/ledger_query.py pass-rate --ledger grades/ledger.sqlite
+  python grader/ledger_query.py hardest --limit 5 --cohort 2025-fall
+  python grader/ledger_query.py distribution --module "M1 NumPy"
+  python grader/ledger_query.py merge --ledger all.sqlite a.sqlite b.sqlite
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import ledger
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_LEDGER = ROOT / "grades" / "ledger.sqlite"
+
+
+def _scope(latest: bool) -> str:
+    return "latest" if latest else "all"
+
+
+def pass_rate_by_test(conn, cohort: str = None, latest: bool = True) -> list[dict]:
+    """每個 cohort × 題目的通過率"""
+    sql = """
+        SELECT cohort, module, test, attempts,
+               1.0 * passes / attempts AS pass_rate,
+               total_duration / NULLIF(durations, 0) AS avg_duration
+        FROM test_stats
+        WHERE scope = ? AND attempts > 0
+    """
+    params = [_scope(latest)]
+    if cohort is not None:
+        sql += " AND cohort = ?"
+        params.append(cohort)
+    rows = conn.execute(sql + " ORDER BY cohort, module, test", params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def hardest_tests(conn, limit: int = 10, cohort: str = None,
+                  latest: bool = True) -> list[dict]:
+    """通過率最低的題目；同通過率時逾時 / 爆記憶體多的排前面"""
+    sql = """
+        SELECT module, test,
+               SUM(attempts) AS attempts,
+               1.0 * SUM(passes) / SUM(attempts) AS pass_rate,
+               SUM(timeouts) AS timeouts,
+               SUM(memory_errors) AS memory_errors
+        FROM test_stats
+        WHERE scope = ? AND attempts > 0
+    """
+    params = [_scope(latest)]
+    if cohort is not None:
+        sql += " AND cohort = ?"
+        params.append(cohort)
+    sql += """
+        GROUP BY module, test
+        ORDER BY pass_rate ASC, timeouts + memory_errors DESC, attempts DESC
+        LIMIT ?
+    """
+    rows = conn.execute(sql, params + [limit]).fetchall()
+    return [dict(row) for row in rows]
+
+
+def score_distribution(conn, module: str = None, cohort: str = None,
+                       latest: bool = True, bins: int = 10) -> list[dict]:
+    """每個模組的得分率分佈（以 100/bins % 為一格）與平均"""
+    where, params = [], [bins, bins]
+    if latest:
+        where.append("s.is_latest = 1")
+    if cohort is not None:
+        where.append("s.cohort = ?")
+        params.append(cohort)
+    if module is not None:
+        where.append("m.module = ?")
+        params.append(module)
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    rows = conn.execute(f"""
+        SELECT module,
+               MIN(CAST(pct * ? AS INTEGER), ? - 1) AS bucket,
+               COUNT(*) AS submissions,
+               AVG(pct) AS avg_pct
+        FROM (
+            SELECT m.module, 1.0 * m.points / MAX(m.max_points, 1) AS pct
+            FROM module_scores m JOIN submissions s USING (submission)
+            {where_sql}
+        )
+        GROUP BY module, bucket
+        ORDER BY module, bucket
+    """, params).fetchall()
+    width = 100 // bins
+    return [
+        {"module": row["module"],
+         "range": f"{row['bucket'] * width}-{(row['bucket'] + 1) * width}%",
+         "submissions": row["submissions"],
+         "avg_pct": row["avg_pct"] * 100}
+        for row in rows
+    ]
+
+
+def to_markdown(rows: list[dict]) -> str:
+    """查詢結果 → Markdown 表格"""
+    if not rows:
+        return "（沒有資料）"
+    cols = list(rows[0])
+    lines = ["| " + " | ".join(cols) + " |",
+             "|" + "|".join(":---" for _ in cols) + "|"]
+    for row in rows:
+        cells = [f"{v:.2f}" if isinstance(v, float) else str(v) for v in row.values()]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="成績帳本查詢")
+    parser.add_argument("query", choices=["pass-rate", "hardest", "distribution", "merge"])
+    parser.add_argument("sources", nargs="*", help="merge 時要併入的帳本檔")
+    parser.add_argument("--ledger", default=str(DEFAULT_LEDGER), help="帳本路徑")
+    parser.add_argument("--cohort", default=None, help="只看某個 cohort")
+    parser.add_argument("--module", default=None, help="distribution 只看某個模組")
+    parser.add_argument("--limit", type=int, default=10, help="hardest 顯示幾題")
+    parser.add_argument("--all-submissions", action="store_true",
+                        help="納入所有繳交（預設只看每位學生最新一次）")
+    args = parser.parse_args()
+
+    if args.query == "merge":
+        added = ledger.merge(args.ledger, args.sources)
+        print(f"已合併 {len(args.sources)} 個帳本，新增 {added} 筆紀錄 → {args.ledger}")
+        return 0
+
+    if not Path(args.ledger).exists():
+        print(f"找不到帳本：{args.ledger}")
+        return 1
+
+    conn = ledger.connect(args.ledger)
+    latest = not args.all_submissions
+    if args.query == "pass-rate":
+        rows = pass_rate_by_test(conn, cohort=args.cohort, latest=latest)
+    elif args.query == "hardest":
+        rows = hardest_tests(conn, limit=args.limit, cohort=args.cohort, latest=latest)
+    else:
+        rows = score_distribution(conn, module=args.module, cohort=args.cohort, latest=latest)
+    conn.close()
+    print(to_markdown(rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
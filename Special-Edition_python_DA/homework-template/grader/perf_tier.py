@@ -0,0 +1,359 @@
+"""
+效能評測層（Performance tier）
+==============================
+test_red_no_forloop 只檢查 AST 裡有沒有 for/while，
+改用 apply / iterrows / list comprehension 一樣能過關。
+這裡把挑選過的作業函式丟到 10^5 ~ 10^7 列的合成資料上，
+量測 wall time 與峰值記憶體 (peak RSS)，跟參考解比倍數給分。
+
+- 每個 case 在獨立子行程執行，記憶體量測不受 grader 本身干擾
+- 只有對應的正確性測試通過才會跑效能（空函式跑得再快也不算）
+- 學生版本在沙箱中執行（見 sandbox.py），逾時上限 = 參考解時間 × 最大倍數
+
+單獨執行（除錯用）：
+  python grader/perf_tier.py               # 參考解 vs 學生，印出計時表
+  python grader/perf_tier.py --scale 0.1   # 資料量縮小 10 倍
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import sandbox
+
+try:
+    import resource
+except ImportError:  # Windows 沒有 resource
+    resource = None
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# (倍數上限, 得分比例)：時間 / 記憶體相對參考解的倍數落在哪一級
+RATIO_TIERS = [(2.0, 1.0), (5.0, 0.6), (10.0, 0.3)]
+
+# 記憶體倍數的分母下限（KB），避免參考解只用幾 MB 時倍數失真
+RSS_FLOOR_KB = 32 * 1024
+
+# 子行程啟動（import pandas 等）的固定緩衝秒數
+STARTUP_SLACK = 20.0
+
+
+# ============================================================
+# 合成資料（同一個 seed → 參考解與學生吃到完全相同的輸入）
+# ============================================================
+
+def _rng():
+    return np.random.default_rng(42)
+
+
+def _build_double11(rows: int, workdir: Path) -> tuple:
+    rng = _rng()
+    prices = rng.integers(80, 2500, rows).astype(float)
+    stocks = rng.integers(0, 300, rows).astype(float)
+    return (prices, stocks)
+
+
+def _build_clean_amount(rows: int, workdir: Path) -> tuple:
+    rng = _rng()
+    amount = rng.integers(80, 12500, rows)
+    text = pd.Series(amount).astype(str)
+    dirty = rng.random(rows) < 0.15
+    text[dirty] = "$" + pd.Series(amount[dirty]).map("{:,}".format).to_numpy()
+    df = pd.DataFrame({
+        "order_id": np.arange(rows) + 5001,
+        "customer_id": rng.integers(2001, 2027, rows),
+        "amount": text.astype(object),
+    })
+    return (df,)
+
+
+def _orders_frame(rows: int) -> pd.DataFrame:
+    rng = _rng()
+    n_customers = max(rows // 100, 26)
+    customer_id = rng.integers(0, n_customers, rows) + 2001
+    days = rng.integers(0, 365 * 3, rows)
+    return pd.DataFrame({
+        "order_id": np.arange(rows) + 5001,
+        "customer_id": customer_id,
+        "customer_name": pd.Series(customer_id).map("Customer {}".format),
+        "order_date": pd.Timestamp("2023-01-01") + pd.to_timedelta(days, unit="D"),
+        "amount": rng.integers(80, 12500, rows).astype(float),
+    })
+
+
+def _build_rfm(rows: int, workdir: Path) -> tuple:
+    return (_orders_frame(rows),)
+
+
+def _build_monthly_report(rows: int, workdir: Path) -> tuple:
+    # red_monthly_report() 自己讀 datasets/ecommerce/orders_enriched.csv，
+    # 所以把合成資料寫到工作目錄下同樣的相對路徑
+    out = workdir / "datasets" / "ecommerce"
+    out.mkdir(parents=True, exist_ok=True)
+    _orders_frame(rows).to_csv(out / "orders_enriched.csv", index=False)
+    return ()
+
+
+# ============================================================
+# 參考解（與 solutions/ 中的解答寫法一致）
+# ============================================================
+
+def _ref_double11(prices, stocks):
+    return np.where(
+        stocks >= 100, prices * 0.7,
+        np.where(stocks >= 20, prices * 0.9, prices),
+    )
+
+
+def _ref_clean_amount(df):
+    result = df.copy()
+    result["amount"] = (result["amount"].astype(str)
+                        .str.replace("$", "", regex=False)
+                        .str.replace(",", "", regex=False)
+                        .astype(float))
+    return result
+
+
+def _ref_rfm_top5(df):
+    rfm = df.groupby(["customer_id", "customer_name"]).agg(
+        R=("order_date", "max"),
+        F=("order_id", "count"),
+        M=("amount", "sum"),
+    ).reset_index()
+    return rfm.sort_values("M", ascending=False).head(5)
+
+
+def _ref_monthly_report():
+    df = pd.read_csv("datasets/ecommerce/orders_enriched.csv",
+                     parse_dates=["order_date"])
+    monthly = df.set_index("order_date").resample("ME").agg(
+        order_count=("amount", "count"),
+        revenue=("amount", "sum"),
+        active_customers=("customer_id", "nunique"),
+    )
+    monthly["avg_order_value"] = monthly["revenue"] / monthly["order_count"]
+    monthly["revenue_growth"] = monthly["revenue"].pct_change()
+    return monthly
+
+
+# ============================================================
+# 評測題目：name 需與 run_grader.MODULES 的效能模組 scores 對應
+# ============================================================
+
+PERF_CASES = {
+    "perf_red_double11_prices": {
+        "module": "homework.m1_numpy",
+        "func": "red_double11_prices",
+        "requires": "test_red_double11_prices",
+        "rows": 10_000_000,
+        "build": _build_double11,
+        "reference": _ref_double11,
+    },
+    "perf_yellow_clean_amount": {
+        "module": "homework.m2_pandas_cleaning",
+        "func": "yellow_clean_amount",
+        "requires": "test_yellow_clean_amount",
+        "rows": 1_000_000,
+        "build": _build_clean_amount,
+        "reference": _ref_clean_amount,
+    },
+    "perf_red_rfm_top5": {
+        "module": "homework.m3_pandas_advanced",
+        "func": "red_rfm_top5",
+        "requires": "test_red_rfm_top5_sorted_by_m",
+        "rows": 1_000_000,
+        "build": _build_rfm,
+        "reference": _ref_rfm_top5,
+    },
+    "perf_red_monthly_report": {
+        "module": "homework.m4_timeseries",
+        "func": "red_monthly_report",
+        "requires": "test_red_monthly_report_values",
+        "rows": 100_000,
+        "build": _build_monthly_report,
+        "reference": _ref_monthly_report,
+    },
+}
+
+
+# ============================================================
+# 子行程：實際量測
+# ============================================================
+
+def _reset_peak_rss() -> bool:
+    """Linux 可透過 clear_refs 重設 VmHWM，讓峰值只反映之後的配置"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _rss_kb(field: str) -> int:
+    """讀取 /proc/self/status 的 VmRSS / VmHWM（KB）"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return 0
+
+
+def _measure(name: str, impl: str, rows: int, repeat: int) -> dict:
+    """在目前行程中跑一個 case，回傳 {seconds, peak_rss_kb}"""
+    case = PERF_CASES[name]
+    if impl == "reference":
+        func = case["reference"]
+    else:
+        sys.path.insert(0, str(ROOT))
+        func = getattr(importlib.import_module(case["module"]), case["func"])
+
+    best = float("inf")
+    peak = 0
+    with tempfile.TemporaryDirectory(prefix="perf_") as tmp:
+        args = case["build"](rows, Path(tmp))
+        os.chdir(tmp)
+        for _ in range(repeat):
+            base = _rss_kb("VmRSS") if _reset_peak_rss() else _rss_kb("VmHWM")
+            start = time.perf_counter()
+            result = func(*args)
+            best = min(best, time.perf_counter() - start)
+            peak = max(peak, _rss_kb("VmHWM") - base)
+            del result
+        os.chdir(ROOT)
+    return {"seconds": best, "peak_rss_kb": max(peak, 0)}
+
+
+def _run_worker(name: str, impl: str, rows: int, repeat: int,
+                timeout: float) -> dict:
+    """在沙箱子行程跑 _measure，逾時、爆記憶體或崩潰時回傳 {"error": ...}"""
+    cmd = [sys.executable, str(Path(__file__).resolve()),
+           "--worker", name, impl, str(rows), str(repeat)]
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    limits = dict(sandbox.PERF_LIMITS, wall_seconds=timeout, cpu_seconds=int(timeout) + 1)
+    run = sandbox.run_sandboxed(cmd, cwd=str(ROOT), limits=limits, env=env)
+    if run["outcome"] != "ok":
+        return {"error": sandbox.describe(run["outcome"], limits), "outcome": run["outcome"]}
+    if run["returncode"] != 0:
+        tail = (run["stderr"].strip().splitlines() or ["子行程異常結束"])[-1]
+        return {"error": tail}
+    return json.loads(run["stdout"].strip().splitlines()[-1])
+
+
+# ============================================================
+# 計分與報告
+# ============================================================
+
+def _tier(ratio: float) -> float:
+    for limit, factor in RATIO_TIERS:
+        if ratio <= limit:
+            return factor
+    return 0.0
+
+
+def score_timing(ref: dict, student: dict) -> tuple[float, float, float]:
+    """回傳 (時間倍數, 記憶體倍數, 得分比例 0~1)"""
+    time_ratio = student["seconds"] / max(ref["seconds"], 1e-6)
+    mem_ratio = (max(student["peak_rss_kb"], RSS_FLOOR_KB)
+                 / max(ref["peak_rss_kb"], RSS_FLOOR_KB))
+    return time_ratio, mem_ratio, min(_tier(time_ratio), _tier(mem_ratio))
+
+
+def run_perf_tier(results: dict, scale: float = 1.0, repeat: int = 3) -> dict:
+    """跑全部效能 case，回傳與 run_pytest() 相同格式、另帶 ratio / perf 欄位"""
+    perf_results = {}
+    worst = RATIO_TIERS[-1][0]
+    for name, case in PERF_CASES.items():
+        rows = max(int(case["rows"] * scale), 1_000)
+        timing = {"rows": rows}
+        perf_results[name] = {"passed": False, "ratio": 0.0, "message": "",
+                              "nodeid": f"perf::{name}", "perf": timing}
+
+        if not results.get(case["requires"], {}).get("passed", False):
+            perf_results[name]["message"] = f"先通過 {case['requires']} 才會進行效能評測"
+            continue
+
+        ref = _run_worker(name, "reference", rows, repeat, timeout=600)
+        if "error" in ref:
+            perf_results[name]["message"] = f"參考解執行失敗：{ref['error']}"
+            continue
+        timing["reference"] = ref
+
+        limit = ref["seconds"] * worst * repeat + STARTUP_SLACK
+        student = _run_worker(name, "student", rows, repeat, timeout=limit)
+        if "error" in student:
+            perf_results[name]["message"] = student["error"]
+            if "outcome" in student:
+                perf_results[name]["outcome"] = student["outcome"]
+            continue
+        timing["student"] = student
+
+        time_ratio, mem_ratio, factor = score_timing(ref, student)
+        timing.update(time_ratio=time_ratio, mem_ratio=mem_ratio)
+        perf_results[name].update(passed=factor > 0, ratio=factor)
+        if factor < 1:
+            perf_results[name]["message"] = (
+                f"時間 {time_ratio:.1f}× / 記憶體 {mem_ratio:.1f}× 參考解，"
+                "試著改用向量化寫法（避免 apply / iterrows / 迴圈）"
+            )
+    return perf_results
+
+
+def format_perf_table(results: dict) -> str:
+    """產生計時表 markdown"""
+    lines = [
+        "### ⏱️ 計時表\n",
+        "| 函式 | 資料列數 | 參考解 (s) | 你的 (s) | 時間倍數 | 參考解記憶體 (MB) | 你的記憶體 (MB) |",
+        "|:-----|-----:|-----:|-----:|-----:|-----:|-----:|",
+    ]
+    for name, case in PERF_CASES.items():
+        timing = results.get(name, {}).get("perf", {})
+        ref = timing.get("reference")
+        student = timing.get("student")
+        rows = f"{timing['rows']:,}" if "rows" in timing else "-"
+        ref_s = f"{ref['seconds']:.3f}" if ref else "-"
+        ref_mb = f"{ref['peak_rss_kb'] / 1024:.1f}" if ref else "-"
+        stu_s = f"{student['seconds']:.3f}" if student else "-"
+        stu_mb = f"{student['peak_rss_kb'] / 1024:.1f}" if student else "-"
+        ratio = f"{timing['time_ratio']:.1f}×" if "time_ratio" in timing else "-"
+        lines.append(f"| `{case['func']}` | {rows} | {ref_s} | {stu_s} | {ratio} | {ref_mb} | {stu_mb} |")
+    tiers = "、".join(f"≤{limit:g}× 得 {factor:.0%}" for limit, factor in RATIO_TIERS)
+    lines.append(f"\n> 給分：時間與記憶體倍數取較差者，{tiers}，超過則 0 分。\n")
+    return "\n".join(lines)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        name, impl, rows, repeat = sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5])
+        print(json.dumps(_measure(name, impl, rows, repeat)))
+        return 0
+
+    parser = argparse.ArgumentParser(description="效能評測層（單獨執行）")
+    parser.add_argument("--scale", type=float, default=1.0, help="資料量倍率")
+    parser.add_argument("--repeat", type=int, default=3, help="每個 case 重複次數（取最快）")
+    args = parser.parse_args()
+
+    # 單獨執行時不檢查正確性測試
+    assume_passed = {case["requires"]: {"passed": True} for case in PERF_CASES.values()}
+    results = run_perf_tier(assume_passed, scale=args.scale, repeat=args.repeat)
+    print(format_perf_table(results))
+    for name, info in results.items():
+        if info["message"]:
+            print(f"- {name}: {info['message']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,32 @@
 """
 自動評分引擎（多模組版）
 ========================
-1. 跑 pytest，收集每個 test 的 pass/fail
+1. 每個測試模組在沙箱 worker 中跑 pytest（資源上限見 sandbox.py），收集每個 test 的結果
 2. 按模組分組計分
-3. 產生 Markdown 報告
-4. 輸出到 GitHub Actions Job Summary / PR comment
+3. 效能評測：挑選的函式在大資料上跟參考解比速度（見 perf_tier.py）
+4. 向量化靜態檢查：列出 for 迴圈、iterrows 等寫法（不計分，見 vector_lint.py）
+5. 產生 Markdown 報告
+6. 輸出到 GitHub Actions Job Summary / PR comment
+7. 每題結果附加到成績帳本（SQLite，查詢見 ledger_query.py）
 
 用法：
   python grader/run_grader.py                  # 含解答（學生 fork 端）
   python grader/run_grader.py --no-solutions   # 不含解答（老師 PR 端）
+  python grader/run_grader.py --no-perf        # 略過效能評測（本機快速檢查）
 """
 import argparse
 import importlib
 import json
 import os
-import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import ledger
+import perf_tier
+import sandbox
+import vector_lint
+
 ROOT = Path(__file__).resolve().parent.parent
 
 # ============================================================
@@ -114,33 +123,59 @@ MODULES = {
             "test_red_dashboard_has_traces": 12,
         },
     },
+    "⚡ 效能評測": {
+        "test_file": None,
+        "solution_module": None,
+        "perf": True,
+        "scores": {
+            "perf_red_double11_prices": 10,
+            "perf_yellow_clean_amount": 10,
+            "perf_red_rfm_top5": 10,
+            "perf_red_monthly_report": 10,
+        },
+    },
 }
 
-# 全部 test name → 分數的平面 map（向後相容）
+# 全部 pytest test name → 分數的平面 map（向後相容，不含效能評測）
 ALL_SCORES = {}
 for mod in MODULES.values():
-    ALL_SCORES.update(mod["scores"])
+    if mod["test_file"]:
+        ALL_SCORES.update(mod["scores"])
 
 
-def run_pytest() -> dict:
-    """執行 pytest，回傳 {test_name: {"passed": bool, "message": str, "nodeid": str}}"""
-    result_file = ROOT / ".pytest_results.json"
-    cmd = [
+def run_pytest(jobs: int = None) -> dict:
+    """每個測試模組各開一個沙箱 worker 平行執行
+
+    回傳 {test_name: {"passed": bool, "outcome": str, "message": str, "nodeid": str}}
+    outcome 為 passed / failed / timeout / memory
+    """
+    test_mods = [cfg for cfg in MODULES.values() if cfg["test_file"]]
+    jobs = jobs or min(len(test_mods), os.cpu_count() or 1)
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for part in pool.map(_run_test_module, test_mods):
+            results.update(part)
+    return results
+
+
+def _pytest_cmd(test_file: str, result_file: Path, test: str = None) -> list:
+    """test 有給時只跑這一題（以 node id 指定，test_a 不會連帶選到 test_a_big）"""
+    target = str(ROOT / "tests" / f"{test_file}.py")
+    return [
         sys.executable, "-m", "pytest",
-        str(ROOT / "tests"),
+        f"{target}::{test}" if test else target,
         "--tb=short",
         "--json-report",
         f"--json-report-file={result_file}",
         "-v",
+        "-p", "no:cacheprovider",
     ]
 
-    subprocess.run(cmd, cwd=str(ROOT), capture_output=True, text=True)
-
-    if not result_file.exists():
-        return _run_pytest_fallback()
 
+def _read_json_report(result_file: Path) -> dict:
     with open(result_file) as f:
         data = json.load(f)
+    result_file.unlink(missing_ok=True)
 
     results = {}
     for test in data.get("tests", []):
@@ -151,49 +186,117 @@ def run_pytest() -> dict:
         if not passed:
             call = test.get("call", {})
             msg = call.get("longrepr", call.get("crash", {}).get("message", ""))
-        results[name] = {"passed": passed, "message": msg, "nodeid": nodeid}
+        duration = sum(test.get(phase, {}).get("duration", 0.0)
+                       for phase in ("setup", "call", "teardown"))
+        outcome = "passed" if passed else sandbox.classify_failure(msg)
+        if outcome == "memory":
+            msg = sandbox.describe("memory", sandbox.TEST_LIMITS) + "\n" + msg
+        results[name] = {"passed": passed, "outcome": outcome, "message": msg,
+                         "nodeid": nodeid, "duration": duration}
+    return results
 
-    result_file.unlink(missing_ok=True)
+
+def _run_test_module(mod_cfg: dict) -> dict:
+    """在沙箱中跑一個 test_mX.py；worker 逾時或爆記憶體時改為逐題重跑"""
+    test_file = mod_cfg["test_file"]
+    result_file = ROOT / f".pytest_results_{test_file}.json"
+    run = sandbox.run_sandboxed(_pytest_cmd(test_file, result_file),
+                                cwd=str(ROOT), limits=sandbox.TEST_LIMITS)
+
+    if run["outcome"] != "ok":
+        result_file.unlink(missing_ok=True)
+        return _run_tests_individually(mod_cfg)
+    if not result_file.exists():
+        return _run_pytest_fallback(mod_cfg)
+    return _read_json_report(result_file)
+
+
+def _run_tests_individually(mod_cfg: dict) -> dict:
+    """逐題各開一個沙箱，讓一題的無窮迴圈不會連累同模組其他題"""
+    test_file = mod_cfg["test_file"]
+    limits = sandbox.SINGLE_TEST_LIMITS
+    results = {}
+    for name in mod_cfg["scores"]:
+        result_file = ROOT / f".pytest_results_{test_file}_{name}.json"
+        run = sandbox.run_sandboxed(_pytest_cmd(test_file, result_file, test=name),
+                                    cwd=str(ROOT), limits=limits)
+        if run["outcome"] == "ok" and result_file.exists():
+            report = _read_json_report(result_file)
+            if name in report:
+                results[name] = report[name]
+                continue
+        result_file.unlink(missing_ok=True)
+        outcome = run["outcome"] if run["outcome"] != "ok" else "failed"
+        results[name] = {
+            "passed": False, "outcome": outcome, "nodeid": f"{test_file}::{name}",
+            "message": sandbox.describe(outcome, limits) or "測試未執行（可能 import 失敗）",
+        }
     return results
 
 
-def _run_pytest_fallback() -> dict:
+def _run_pytest_fallback(mod_cfg: dict) -> dict:
     """如果 pytest-json-report 沒裝，用純文字解析"""
     cmd = [
         sys.executable, "-m", "pytest",
-        str(ROOT / "tests"), "--tb=line", "-v",
+        str(ROOT / "tests" / f"{mod_cfg['test_file']}.py"), "--tb=line", "-v",
     ]
-    proc = subprocess.run(cmd, cwd=str(ROOT), capture_output=True, text=True)
-    output = proc.stdout + proc.stderr
+    run = sandbox.run_sandboxed(cmd, cwd=str(ROOT), limits=sandbox.TEST_LIMITS)
+    output = run["stdout"] + run["stderr"]
 
     results = {}
-    for name in ALL_SCORES:
+    for name in mod_cfg["scores"]:
         if f"::{name} PASSED" in output:
-            results[name] = {"passed": True, "message": ""}
+            results[name] = {"passed": True, "outcome": "passed", "message": ""}
         elif f"::{name}" in output:
             msg = next(
                 (line for line in output.splitlines()
                  if name in line and "FAILED" in line), "")
-            results[name] = {"passed": False, "message": msg}
+            results[name] = {"passed": False, "outcome": sandbox.classify_failure(msg),
+                             "message": msg}
+        elif run["outcome"] != "ok":
+            results[name] = {"passed": False, "outcome": run["outcome"],
+                             "message": sandbox.describe(run["outcome"], sandbox.TEST_LIMITS)}
         else:
-            results[name] = {"passed": False, "message": "測試未執行（可能 import 失敗）"}
+            results[name] = {"passed": False, "outcome": "failed",
+                             "message": "測試未執行（可能 import 失敗）"}
     return results
 
 
-def generate_report(results: dict, show_solutions: bool = True) -> tuple[str, int, int]:
-    """產生完整多模組報告，回傳 (report_md, total_earned, total_possible)"""
+# 沙箱判定的特殊結果，報告中與一般失敗分開顯示
+OUTCOME_ICONS = {"timeout": "⏱️ 逾時", "memory": "💥 記憶體"}
+
+
+def _earned(pts: int, info: dict) -> int:
+    """單題得分：pytest 題全拿或零分，效能題依 ratio 給部分分數"""
+    if "ratio" in info:
+        return round(pts * info["ratio"])
+    return pts if info.get("passed", False) else 0
+
+
+def active_modules(perf: bool = True) -> dict:
+    """本次計分的模組；略過效能評測時效能模組不列入（總分也不含它）"""
+    return {name: cfg for name, cfg in MODULES.items() if perf or not cfg.get("perf")}
+
+
+def generate_report(results: dict, show_solutions: bool = True,
+                    lint: dict = None, modules: dict = None) -> tuple[str, int, int]:
+    """產生完整多模組報告，回傳 (report_md, total_earned, total_possible)
+
+    lint 為 vector_lint.lint_paths 的結果，有傳才附上向量化檢查區塊。
+    modules 預設為全部 MODULES，見 active_modules()。
+    """
     sys.path.insert(0, str(ROOT))
+    modules = MODULES if modules is None else modules
 
     grand_earned = 0
     grand_total = 0
     sections = []
 
-    for mod_name, mod_cfg in MODULES.items():
+    for mod_name, mod_cfg in modules.items():
         scores = mod_cfg["scores"]
         mod_total = sum(scores.values())
         mod_earned = sum(
-            pts for name, pts in scores.items()
-            if results.get(name, {}).get("passed", False)
+            _earned(pts, results.get(name, {})) for name, pts in scores.items()
         )
         grand_earned += mod_earned
         grand_total += mod_total
@@ -207,14 +310,18 @@ def generate_report(results: dict, show_solutions: bool = True) -> tuple[str, in
         ]
         for name, pts in scores.items():
             info = results.get(name, {"passed": False, "message": ""})
-            status = "✅" if info["passed"] else "❌"
-            got = pts if info["passed"] else 0
+            got = _earned(pts, info)
+            status = "✅" if got == pts else ("⚠️" if got > 0 else "❌")
+            status = OUTCOME_ICONS.get(info.get("outcome"), status)
             lines.append(f"| `{name}` | {got}/{pts} | {status} |")
         lines.append("")
 
+        if mod_cfg.get("perf"):
+            lines.append(perf_tier.format_perf_table(results))
+
         # 錯誤提示
         failed = {k: v for k, v in results.items()
-                  if k in scores and not v.get("passed", False)}
+                  if k in scores and _earned(scores[k], v) < scores[k]}
         if failed:
             lines.append("<details><summary>❌ 錯誤提示（點擊展開）</summary>\n")
             for name, info in failed.items():
@@ -225,7 +332,7 @@ def generate_report(results: dict, show_solutions: bool = True) -> tuple[str, in
             lines.append("</details>\n")
 
         # 解答
-        if show_solutions:
+        if show_solutions and mod_cfg["solution_module"]:
             try:
                 sol_mod = importlib.import_module(mod_cfg["solution_module"])
                 passed_map = {n: results.get(n, {}).get("passed", False)
@@ -236,6 +343,9 @@ def generate_report(results: dict, show_solutions: bool = True) -> tuple[str, in
 
         sections.append("\n".join(lines))
 
+    if lint is not None:
+        sections.append(vector_lint.format_lint_report(lint))
+
     # 總報告
     grand_pct = grand_earned / grand_total * 100 if grand_total > 0 else 0
     if grand_pct >= 90:
@@ -255,6 +365,10 @@ def generate_report(results: dict, show_solutions: bool = True) -> tuple[str, in
         "---\n",
     ]
 
+    skipped = [name for name in MODULES if name not in modules]
+    if skipped:
+        header.append(f"> ⏭️ 本次略過：{'、'.join(skipped)}（不計入總分）\n")
+
     if not show_solutions:
         header.append("> 💡 完整解答請到你自己 fork 的 repo → **Actions** 頁籤查看。\n\n")
 
@@ -262,7 +376,32 @@ def generate_report(results: dict, show_solutions: bool = True) -> tuple[str, in
     return report, grand_earned, grand_total
 
 
-def write_outputs(report: str, earned: int, total: int):
+def build_ledger_records(results: dict, modules: dict = None) -> list:
+    """每一題一筆結構化紀錄（欄位見 ledger.py）；略過的模組不寫入"""
+    records = []
+    for mod_name, mod_cfg in (MODULES if modules is None else modules).items():
+        for name, pts in mod_cfg["scores"].items():
+            info = results.get(name)
+            if info is None:
+                category, duration = "not_run", None
+            else:
+                category = info.get("outcome") or ("passed" if info.get("passed") else "failed")
+                duration = info.get("duration")
+                if duration is None and "student" in info.get("perf", {}):
+                    duration = info["perf"]["student"]["seconds"]
+            records.append({
+                "module": mod_name,
+                "test": name,
+                "passed": bool(info and info.get("passed")),
+                "points": _earned(pts, info or {}),
+                "max_points": pts,
+                "duration": duration,
+                "category": category,
+            })
+    return records
+
+
+def write_outputs(report: str, earned: int, total: int, submission: str = None):
     """輸出報告到各個目標"""
     summary_path = os.environ.get("GITHUB_STEP_SUMMARY")
     if summary_path:
@@ -279,6 +418,8 @@ def write_outputs(report: str, earned: int, total: int):
             f.write(f"score={earned}\n")
             f.write(f"total={total}\n")
             f.write(f"percent={pct:.0f}\n")
+            if submission:
+                f.write(f"submission={submission}\n")
 
     if not summary_path:
         print(report)
@@ -290,16 +431,58 @@ def main():
         "--no-solutions", action="store_true",
         help="不在報告中顯示解答（用於老師 repo 的 PR comment）",
     )
+    parser.add_argument(
+        "--no-perf", action="store_true",
+        help="略過效能評測（效能題不計入總分）",
+    )
+    parser.add_argument(
+        "--perf-scale", type=float, default=1.0,
+        help="效能評測的資料量倍率（預設 1.0 = 10^5~10^7 列）",
+    )
+    parser.add_argument(
+        "--no-lint", action="store_true",
+        help="略過向量化靜態檢查",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=None,
+        help="同時執行的測試模組 worker 數（預設 = CPU 核心數）",
+    )
+    parser.add_argument(
+        "--ledger", default=os.environ.get("GRADER_LEDGER", str(ROOT / "grades" / "ledger.sqlite")),
+        help="成績帳本 (SQLite) 路徑，每次批改附加一批紀錄",
+    )
+    parser.add_argument(
+        "--no-ledger", action="store_true",
+        help="不寫入成績帳本",
+    )
+    parser.add_argument(
+        "--student", default=os.environ.get("GRADER_STUDENT") or os.environ.get("GITHUB_ACTOR", "local"),
+        help="寫入帳本的學生帳號（預設取 GITHUB_ACTOR）",
+    )
+    parser.add_argument(
+        "--cohort", default=os.environ.get("GRADER_COHORT", "default"),
+        help="寫入帳本的班別 / 梯次",
+    )
     args = parser.parse_args()
 
     print("🔍 開始批改作業...\n")
 
-    results = run_pytest()
+    results = run_pytest(jobs=args.jobs)
+    if not args.no_perf:
+        print("⏱️ 執行效能評測...\n")
+        results.update(perf_tier.run_perf_tier(results, scale=args.perf_scale))
+    modules = active_modules(perf=not args.no_perf)
+    lint = None if args.no_lint else vector_lint.lint_paths([ROOT / "homework"], jobs=args.jobs)
     show_solutions = not args.no_solutions
-    report, earned, total = generate_report(results, show_solutions=show_solutions)
+    report, earned, total = generate_report(results, show_solutions=show_solutions, lint=lint,
+                                            modules=modules)
 
     print(f"📊 總分：{earned}/{total}\n")
-    write_outputs(report, earned, total)
+    submission = None
+    if not args.no_ledger:
+        submission = ledger.append(args.ledger, build_ledger_records(results, modules),
+                                   student=args.student, cohort=args.cohort)
+    write_outputs(report, earned, total, submission=submission)
 
     return 0
 
@@ -0,0 +1,141 @@
+"""
+學生程式碼沙箱
+==============
+學生的函式跟 pytest 跑在同一個行程、沒有任何資源上限，
+一行 np.zeros(10**12) 或 while True 就能拖垮整台批改主機。
+
+這裡把每個 worker 子行程包起來：
+- resource.setrlimit：虛擬記憶體 (RLIMIT_AS)、CPU 秒數、可開檔案數
+- wall-clock 看門狗：超時就砍掉整個 process group
+- 把結果分類成 ok / timeout / memory / crashed，報告裡可以分開顯示
+
+Windows 沒有 resource 模組，只保留看門狗。
+"""
+import os
+import signal
+import subprocess
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 測試模組 worker 的上限（一個 test_mX.py 一個 worker）
+TEST_LIMITS = {
+    "address_space_mb": 3072,
+    "cpu_seconds": 120,
+    "open_files": 256,
+    "wall_seconds": 180,
+}
+
+# 單一測試重跑時的上限（模組 worker 逾時 / 爆記憶體後逐題重跑）
+SINGLE_TEST_LIMITS = dict(TEST_LIMITS, cpu_seconds=30, wall_seconds=45)
+
+# 效能評測 worker 的上限（10^7 列的資料需要較多記憶體，時間另由 perf_tier 決定）
+PERF_LIMITS = dict(TEST_LIMITS, address_space_mb=8192, cpu_seconds=600)
+
+# 讓數值函式庫只用單執行緒：平行跑多個 worker 時吞吐量才可預期，
+# 也避免 OpenBLAS 每條執行緒預先保留的記憶體吃掉 RLIMIT_AS
+SANDBOX_ENV = {
+    "OMP_NUM_THREADS": "1",
+    "OPENBLAS_NUM_THREADS": "1",
+    "MKL_NUM_THREADS": "1",
+    "MPLBACKEND": "Agg",
+}
+
+_MEMORY_MARKERS = ("MemoryError", "Unable to allocate", "std::bad_alloc", "Cannot allocate memory")
+
+# 被這些 signal 結束代表 CPU 上限觸發（soft → SIGXCPU、hard → SIGKILL）
+_CPU_KILL_CODES = {-getattr(signal, name) for name in ("SIGXCPU", "SIGKILL")
+                   if hasattr(signal, name)}
+
+OUTCOME_MESSAGES = {
+    "timeout": "執行逾時（超過 {wall_seconds:.0f} 秒或 CPU {cpu_seconds:.0f} 秒），請檢查是否有無窮迴圈",
+    "memory": "記憶體超過上限（{address_space_mb} MB），請檢查是否建立了過大的陣列",
+    "crashed": "測試行程異常結束",
+}
+
+
+def _wrap(cmd: list, limits: dict) -> list:
+    """把 cmd 包成「先設上限再 exec」的指令。
+
+    不用 Popen(preexec_fn=...)：grader 會用多執行緒同時開 worker，
+    preexec_fn 在多執行緒下不安全，改由這支腳本在子行程內 setrlimit 後 exec。
+    """
+    if resource is None:
+        return cmd
+    return [sys.executable, os.path.abspath(__file__),
+            str(limits["address_space_mb"]), str(limits["cpu_seconds"]),
+            str(limits["open_files"]), "--", *cmd]
+
+
+def _exec_limited(argv: list):
+    """子行程入口：argv = [記憶體MB, CPU秒, 檔案數, "--", cmd...]"""
+    mem_mb, cpu, files = (int(x) for x in argv[:3])
+    cmd = argv[4:]
+    mem = mem_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (mem, mem))
+    # soft 到了送 SIGXCPU，留 5 秒緩衝後 hard 直接 SIGKILL
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 5))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (files, files))
+    os.execvp(cmd[0], cmd)
+
+
+def classify_failure(message: str) -> str:
+    """測試失敗訊息 → "memory" 或 "failed" """
+    if any(marker in message for marker in _MEMORY_MARKERS):
+        return "memory"
+    return "failed"
+
+
+def describe(outcome: str, limits: dict) -> str:
+    """outcome → 給學生看的說明文字"""
+    return OUTCOME_MESSAGES.get(outcome, "").format(**limits)
+
+
+def run_sandboxed(cmd: list, cwd: str, limits: dict, env: dict = None) -> dict:
+    """在沙箱中執行 cmd，回傳 {outcome, returncode, stdout, stderr}
+
+    outcome：
+      ok       正常結束（不論 returncode，pytest 有失敗也算 ok）
+      timeout  看門狗或 CPU 上限觸發
+      memory   輸出中出現 MemoryError 等記憶體不足訊號
+      crashed  被其他 signal 結束（segfault 等）
+    """
+    run_env = dict(os.environ if env is None else env, **SANDBOX_ENV)
+    proc = subprocess.Popen(
+        _wrap(cmd, limits), cwd=cwd, env=run_env, text=True,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    try:
+        stdout, stderr = proc.communicate(timeout=limits["wall_seconds"])
+        timed_out = False
+    except subprocess.TimeoutExpired:
+        _kill_group(proc)
+        stdout, stderr = proc.communicate()
+        timed_out = True
+
+    rc = proc.returncode
+    if timed_out or rc in _CPU_KILL_CODES:
+        outcome = "timeout"
+    elif rc < 0:
+        outcome = "memory" if classify_failure(stderr) == "memory" else "crashed"
+    elif rc != 0 and classify_failure(stderr) == "memory":
+        outcome = "memory"
+    else:
+        outcome = "ok"
+    return {"outcome": outcome, "returncode": rc, "stdout": stdout, "stderr": stderr}
+
+
+def _kill_group(proc: subprocess.Popen):
+    """砍掉整個 process group（含學生程式另外 fork 出來的子行程）"""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, AttributeError):
+        proc.kill()
+
+
+if __name__ == "__main__":
+    _exec_limited(sys.argv[1:])
@@ -0,0 +1,400 @@
+"""
+向量化靜態檢查（Vectorization lint）
+====================================
+test_red_no_forloop 只對單一函式做 ast.walk 找 for/while。
+這裡把同樣的想法擴大到 homework/ 底下每個函式，找出常見的非向量化寫法：
+
+  loop              for / while 迴圈
+  comprehension     list / dict / set comprehension、generator
+  iterrows          df.iterrows() / df.itertuples()
+  apply-axis1       df.apply(..., axis=1)
+  repeated-read     同一個檔案 pd.read_csv 不只一次
+  chained-assign    df[a][b] = ...（改到的可能是副本）
+  slice-assign      sub = df[mask] 之後 sub[col] = ...（沒有 .copy()）
+
+後兩條只在確定是 DataFrame 時才報：經過 .loc / .iloc / 布林遮罩取出來的，
+或變數是由 pd.xxx(...) / read_xxx(...) 產生的。NumPy 的 arr[i][j] = ... 不算。
+
+每個發現附嚴重度與建議的向量化寫法，列在批改報告中（不計分）。
+
+全班批改時每個檔案以內容 hash 快取結果，只有沒看過的檔案才丟進
+process pool 分析，所以重複批改幾乎不增加時間。
+
+單獨執行：
+  python grader/vector_lint.py                          # 檢查 homework/
+  python grader/vector_lint.py submissions/*/homework   # 全班
+  python grader/vector_lint.py --format json --jobs 8
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_DIR = ROOT / ".lint_cache"
+
+# 規則有改就調這個版本號，舊的快取自動失效
+LINT_VERSION = "2"
+
+SEVERITY_ICONS = {"error": "🔴", "warning": "🟡", "info": "🔵"}
+SEVERITY_ORDER = {"error": 0, "warning": 1, "info": 2}
+
+RULES = {
+    "loop": {
+        "severity": "warning",
+        "message": "Python 層級的 for/while 迴圈",
+        "suggestion": "改用陣列運算：np.where / 布林索引 / df.groupby().agg()",
+    },
+    "comprehension": {
+        "severity": "info",
+        "message": "comprehension 仍是逐元素的 Python 迴圈",
+        "suggestion": "改用 arr * k、s.str.xxx()、s.map(dict) 等整欄操作",
+    },
+    "iterrows": {
+        "severity": "error",
+        "message": "iterrows / itertuples 逐列處理，資料一大就非常慢",
+        "suggestion": "直接對整欄運算，例如 df['a'] * df['b']、np.select(條件, 值)",
+    },
+    "apply-axis1": {
+        "severity": "error",
+        "message": "apply(axis=1) 等同逐列 Python 迴圈",
+        "suggestion": "改用欄位間的向量運算，或 np.where / np.select",
+    },
+    "repeated-read": {
+        "severity": "warning",
+        "message": "同一個檔案重複 pd.read_csv",
+        "suggestion": "讀一次存成變數（或把 df 當參數傳入），需要時再 .copy()",
+    },
+    "chained-assign": {
+        "severity": "error",
+        "message": "鏈式賦值 df[a][b] = ...，可能只改到副本",
+        "suggestion": "改成 df.loc[a, b] = ...",
+    },
+    "slice-assign": {
+        "severity": "warning",
+        "message": "對切片結果賦值（SettingWithCopyWarning）",
+        "suggestion": "切片後先 .copy()，或直接 df.loc[mask, col] = ...",
+    },
+}
+
+
+# ============================================================
+# AST 分析
+# ============================================================
+
+def _call_name(node: ast.Call) -> str:
+    """呼叫的屬性名稱：df.iterrows() → "iterrows"、pd.read_csv() → "read_csv" """
+    func = node.func
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return ""
+
+
+def _keyword(node: ast.Call, name: str):
+    for kw in node.keywords:
+        if kw.arg == name:
+            return kw.value
+    return None
+
+
+def _is_axis1(value) -> bool:
+    return isinstance(value, ast.Constant) and value.value in (1, "columns")
+
+
+# 回傳布林 Series 的方法：df[df["a"].isin(...)] 也是布林遮罩
+_MASK_METHODS = {"isin", "between", "isna", "isnull", "notna", "notnull",
+                 "duplicated", "contains", "startswith", "endswith"}
+
+
+def _is_mask(key) -> bool:
+    """df[...] 的索引是布林遮罩：比較、& | ~ 組合，或 isin() 這類方法"""
+    if isinstance(key, ast.Compare):
+        return True
+    if isinstance(key, ast.BinOp) and isinstance(key.op, (ast.BitAnd, ast.BitOr)):
+        return _is_mask(key.left) or _is_mask(key.right)
+    if isinstance(key, ast.UnaryOp) and isinstance(key.op, ast.Invert):
+        return True
+    return isinstance(key, ast.Call) and _call_name(key) in _MASK_METHODS
+
+
+def _is_frame_call(value) -> bool:
+    """pd.DataFrame(...) / pd.read_csv(...) / read_parquet(...) 這類產生 DataFrame 的呼叫"""
+    if not isinstance(value, ast.Call):
+        return False
+    func = value.func
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == "pd":
+        return True
+    return _call_name(value).startswith("read_")
+
+
+def _is_frame_copy(value, frames) -> bool:
+    """已知 DataFrame 的 df.copy()"""
+    return (isinstance(value, ast.Call) and isinstance(value.func, ast.Attribute)
+            and value.func.attr == "copy" and isinstance(value.func.value, ast.Name)
+            and value.func.value.id in frames)
+
+
+def _is_slice(value, frames) -> bool:
+    """df.loc[...] / df.iloc[...] / df[mask]，或已知 DataFrame 的 df[[...]]：回傳「可能是 view」的運算式
+
+    df["col"] 只是取一欄，不算切片。
+    """
+    if not isinstance(value, ast.Subscript):
+        return False
+    base, key = value.value, value.slice
+    if isinstance(base, ast.Attribute) and base.attr in ("loc", "iloc"):
+        return True
+    if _is_mask(key):
+        return True
+    return (isinstance(base, ast.Name) and base.id in frames
+            and not (isinstance(key, ast.Constant) and isinstance(key.value, str)))
+
+
+class _FunctionLinter(ast.NodeVisitor):
+    """分析單一函式，收集 (rule, lineno, detail, severity)"""
+
+    def __init__(self):
+        self.hits = []
+        self.reads = {}      # read_csv 路徑 → 第一次出現的行號
+        self.sliced = {}     # 由切片賦值而來、還沒 .copy() 的變數名稱 → 行號
+        self.frames = set()  # 確定是 DataFrame 的變數名稱
+
+    def _hit(self, rule: str, node, detail: str = "", severity: str = None):
+        self.hits.append((rule, node.lineno, detail, severity or RULES[rule]["severity"]))
+
+    def visit_For(self, node):
+        if isinstance(node.iter, (ast.List, ast.Tuple, ast.Set)):
+            # 逐一處理幾個寫死的類別（例如畫兩條線）不是資料量級的迴圈
+            self._hit("loop", node, f"for ... in {ast.unparse(node.iter)}", severity="info")
+        else:
+            self._hit("loop", node)
+        self.generic_visit(node)
+
+    def visit_While(self, node):
+        self._hit("loop", node)
+        self.generic_visit(node)
+
+    visit_AsyncFor = visit_For
+
+    def visit_ListComp(self, node):
+        self._hit("comprehension", node)
+        self.generic_visit(node)
+
+    visit_SetComp = visit_ListComp
+    visit_DictComp = visit_ListComp
+    visit_GeneratorExp = visit_ListComp
+
+    def visit_Call(self, node):
+        name = _call_name(node)
+        if name in ("iterrows", "itertuples"):
+            self._hit("iterrows", node, f".{name}()")
+        elif name == "apply" and _is_axis1(_keyword(node, "axis")):
+            self._hit("apply-axis1", node)
+        elif name == "read_csv" and node.args:
+            key = ast.unparse(node.args[0])
+            if key in self.reads:
+                self._hit("repeated-read", node, f"{key}（第 {self.reads[key]} 行已讀過）")
+            else:
+                self.reads[key] = node.lineno
+        self.generic_visit(node)
+
+    def visit_Assign(self, node):
+        for target in node.targets:
+            if isinstance(target, ast.Subscript):
+                inner = target.value
+                if isinstance(inner, ast.Subscript):
+                    # df[a][b] = ...：內層要確定是 DataFrame，NumPy 的 arr[i][j] = ... 是正常寫法
+                    if _is_slice(inner, self.frames) or (
+                            isinstance(inner.value, ast.Name) and inner.value.id in self.frames):
+                        self._hit("chained-assign", node, ast.unparse(target))
+                elif isinstance(inner, ast.Name) and inner.id in self.sliced:
+                    self._hit("slice-assign", node,
+                              f"{inner.id}（第 {self.sliced[inner.id]} 行由切片產生）")
+            elif isinstance(target, ast.Name):
+                if _is_slice(node.value, self.frames):
+                    self.sliced[target.id] = node.lineno
+                    self.frames.add(target.id)
+                else:
+                    # 重新賦值（例如 sub = sub.copy()）就不再是切片
+                    self.sliced.pop(target.id, None)
+                    if _is_frame_call(node.value) or _is_frame_copy(node.value, self.frames):
+                        self.frames.add(target.id)
+                    else:
+                        self.frames.discard(target.id)
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        # 巢狀函式也算在外層函式裡
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+
+def lint_source(source: str, filename: str = "<string>") -> list:
+    """分析一份原始碼，回傳 finding 的 list（依行號排序）
+
+    finding = {rule, severity, function, line, message, suggestion, detail}
+    語法錯誤時回傳單一 "syntax" finding，不丟例外。
+    """
+    try:
+        tree = ast.parse(source, filename=filename)
+    except SyntaxError as e:
+        return [{"rule": "syntax", "severity": "error", "function": "",
+                 "line": e.lineno or 0, "message": f"語法錯誤：{e.msg}",
+                 "suggestion": "", "detail": ""}]
+
+    findings = []
+    # 跨函式的 read_csv：同一個檔案在不同函式各讀一次，降為 info
+    first_read = {}
+    for func in tree.body:
+        if not isinstance(func, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        linter = _FunctionLinter()
+        for stmt in func.body:
+            linter.visit(stmt)
+
+        for key, lineno in linter.reads.items():
+            if key in first_read:
+                linter.hits.append(("repeated-read", lineno,
+                                    f"{key}（{first_read[key]} 已讀過）", "info"))
+            else:
+                first_read[key] = func.name
+
+        for rule, lineno, detail, severity in linter.hits:
+            findings.append({
+                "rule": rule,
+                "severity": severity,
+                "function": func.name,
+                "line": lineno,
+                "message": RULES[rule]["message"],
+                "suggestion": RULES[rule]["suggestion"],
+                "detail": detail,
+            })
+    findings.sort(key=lambda f: (f["line"], SEVERITY_ORDER[f["severity"]]))
+    return findings
+
+
+# ============================================================
+# 快取 + 平行
+# ============================================================
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(LINT_VERSION.encode() + b"\0" + data).hexdigest()
+
+
+def _lint_bytes(data: bytes, filename: str) -> list:
+    return lint_source(data.decode("utf-8", errors="replace"), filename)
+
+
+def _collect(paths) -> list:
+    """展開參數：目錄 → 底下的 *.py（略過 __init__.py），檔案原樣保留"""
+    files = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files.extend(sorted(f for f in p.rglob("*.py") if f.name != "__init__.py"))
+        elif p.suffix == ".py":
+            files.append(p)
+    return files
+
+
+def lint_paths(paths, jobs: int = None, cache_dir=DEFAULT_CACHE_DIR) -> dict:
+    """分析多個檔案 / 目錄，回傳 {檔案路徑字串: findings}
+
+    內容 hash 相同的檔案只分析一次（快取在 cache_dir，傳 None 停用）。
+    沒命中快取的檔案夠多時才開 process pool，少量檔案直接在本行程跑。
+    """
+    files = _collect(paths)
+    cache = Path(cache_dir) if cache_dir else None
+    if cache:
+        cache.mkdir(parents=True, exist_ok=True)
+
+    results, pending = {}, {}
+    for f in files:
+        data = f.read_bytes()
+        digest = _digest(data)
+        cached = cache / f"{digest}.json" if cache else None
+        if cached and cached.exists():
+            results[str(f)] = json.loads(cached.read_text(encoding="utf-8"))
+        else:
+            # 全班常有內容完全相同的檔案（例如沒動過的作業），同 hash 只算一次
+            pending.setdefault(digest, (data, []))[1].append(str(f))
+
+    if pending:
+        items = list(pending.items())
+        jobs = jobs or os.cpu_count() or 1
+        if jobs > 1 and len(items) >= 2 * jobs:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                outputs = list(pool.map(_lint_bytes, [d for _, (d, _) in items],
+                                        [names[0] for _, (_, names) in items],
+                                        chunksize=max(1, len(items) // (4 * jobs))))
+        else:
+            outputs = [_lint_bytes(d, names[0]) for _, (d, names) in items]
+
+        for (digest, (_, names)), findings in zip(items, outputs):
+            for name in names:
+                results[name] = findings
+            if cache:
+                tmp = cache / f"{digest}.{os.getpid()}.tmp"
+                tmp.write_text(json.dumps(findings, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp, cache / f"{digest}.json")
+
+    return {str(f): results[str(f)] for f in files}
+
+
+# ============================================================
+# 報告
+# ============================================================
+
+def format_lint_report(lint: dict) -> str:
+    """lint_paths 的結果 → 批改報告中的 Markdown 區塊"""
+    total = sum(len(v) for v in lint.values())
+    counts = {s: sum(f["severity"] == s for v in lint.values() for f in v)
+              for s in SEVERITY_ORDER}
+    lines = ["## 🧹 向量化檢查（不計分）\n"]
+    if total == 0:
+        lines.append("沒有發現非向量化寫法 👍\n")
+        return "\n".join(lines)
+
+    summary = "、".join(f"{SEVERITY_ICONS[s]} {counts[s]}" for s in SEVERITY_ORDER if counts[s])
+    lines.append(f"共 {total} 處可以改寫：{summary}\n")
+    lines.append("<details><summary>點擊展開</summary>\n")
+    lines.append("| 檔案 | 函式 | 行 | 問題 | 建議寫法 |")
+    lines.append("|:-----|:-----|:--:|:-----|:---------|")
+    for path, findings in lint.items():
+        name = Path(path).name
+        for f in sorted(findings, key=lambda f: (SEVERITY_ORDER[f["severity"]], f["line"])):
+            detail = f"：`{f['detail']}`" if f["detail"] else ""
+            lines.append(
+                f"| `{name}` | `{f['function']}` | {f['line']} | "
+                f"{SEVERITY_ICONS[f['severity']]} {f['message']}{detail} | {f['suggestion']} |"
+            )
+    lines.append("\n</details>\n")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="向量化靜態檢查")
+    parser.add_argument("paths", nargs="*", default=[str(ROOT / "homework")],
+                        help="要檢查的檔案或目錄（預設 homework/）")
+    parser.add_argument("--jobs", type=int, default=None, help="process pool 大小（預設 = CPU 核心數）")
+    parser.add_argument("--format", choices=["md", "json"], default="md")
+    parser.add_argument("--no-cache", action="store_true", help="不讀寫快取")
+    args = parser.parse_args()
+
+    lint = lint_paths(args.paths, jobs=args.jobs,
+                      cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR)
+    if args.format == "json":
+        print(json.dumps(lint, ensure_ascii=False, indent=2))
+    else:
+        print(format_lint_report(lint))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+grader/ledger.py、grader/ledger_query.py 的測試
+==============================================
+不是作業題目（run_grader 只跑 MODULES 裡登記的測試模組）。
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "grader"))
+
+import ledger  # noqa: E402
+import ledger_query  # noqa: E402
+
+T0 = "2025-03-01T08:00:00+00:00"
+T1 = "2025-03-02T08:00:00+00:00"
+
+
+def _records(passed_a: bool, duration_b=None) -> list:
+    return [
+        {"module": "M1", "test": "test_a", "passed": passed_a, "points": 10 * passed_a,
+         "max_points": 10, "duration": 0.5, "category": "passed" if passed_a else "failed"},
+        {"module": "M1", "test": "test_b", "passed": False, "points": 0,
+         "max_points": 5, "duration": duration_b, "category": "not_run" if duration_b is None else "timeout"},
+    ]
+
+
+def _stats(path) -> list:
+    conn = ledger.connect(path)
+    rows = [tuple(r) for r in conn.execute("SELECT * FROM test_stats ORDER BY cohort, scope, module, test")]
+    conn.close()
+    return rows
+
+
+def _latest(path) -> dict:
+    conn = ledger.connect(path)
+    rows = dict(conn.execute("SELECT student, submission FROM submissions WHERE is_latest = 1").fetchall())
+    conn.close()
+    return rows
+
+
+def test_append_tracks_latest_submission(tmp_path):
+    path = tmp_path / "ledger.sqlite"
+    first = ledger.append(path, _records(False), "amy", "c1", graded_at=T1)
+    older = ledger.append(path, _records(True), "amy", "c1", graded_at=T0)   # 較晚寫入但時間較早
+    assert _latest(path) == {"amy": first}
+
+    same_time = ledger.append(path, _records(True), "amy", "c1", graded_at=T1)  # 同時間：後寫入的較新
+    assert _latest(path) == {"amy": same_time}
+    assert older != same_time
+
+    conn = ledger.connect(path)
+    rows = conn.execute("SELECT module, points, max_points FROM module_scores WHERE submission = ?",
+                        (same_time,)).fetchall()
+    assert [tuple(r) for r in rows] == [("M1", 10, 15)]
+    assert conn.execute("SELECT COUNT(*) FROM records").fetchone()[0] == 6
+    conn.close()
+
+
+def test_rebuild_stats_matches_incremental(tmp_path):
+    path = tmp_path / "ledger.sqlite"
+    ledger.append(path, _records(False), "amy", "c1", graded_at=T0)
+    ledger.append(path, _records(True, 3.0), "amy", "c1", graded_at=T0)
+    ledger.append(path, _records(True), "bob", "c1", graded_at=T1)
+    incremental = _stats(path)
+
+    conn = ledger.connect(path)
+    ledger.rebuild_stats(conn)
+    conn.close()
+    assert _stats(path) == incremental
+
+
+def test_merge_is_idempotent_and_keeps_latest(tmp_path):
+    a, b, target = tmp_path / "a.sqlite", tmp_path / "b.sqlite", tmp_path / "all.sqlite"
+    ledger.append(a, _records(False), "amy", "c1", graded_at=T0)
+    latest = ledger.append(a, _records(True), "amy", "c1", graded_at=T0)
+    ledger.append(b, _records(False), "bob", "c1", graded_at=T1)
+
+    assert ledger.merge(target, [a, b]) == 3
+    stats, records = _stats(target), _latest(target)
+    assert records["amy"] == latest
+    assert ledger.merge(target, [a, b]) == 0
+    assert _stats(target) == stats and _latest(target) == records
+
+    conn = ledger.connect(target)
+    assert conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 6
+    conn.close()
+
+
+def test_queries(tmp_path):
+    path = tmp_path / "ledger.sqlite"
+    ledger.append(path, _records(False), "amy", "c1", graded_at=T0)
+    ledger.append(path, _records(True, 3.0), "amy", "c1", graded_at=T1)
+    ledger.append(path, _records(False), "bob", "c1", graded_at=T1)
+    conn = ledger.connect(path)
+
+    rates = {r["test"]: r for r in ledger_query.pass_rate_by_test(conn)}
+    assert rates["test_a"]["attempts"] == 2 and rates["test_a"]["pass_rate"] == 0.5
+    # bob 的 test_b 沒有秒數，不拉低平均
+    assert rates["test_b"]["avg_duration"] == 3.0
+    every = {r["test"]: r for r in ledger_query.pass_rate_by_test(conn, latest=False)}
+    assert every["test_a"]["attempts"] == 3
+
+    hardest = ledger_query.hardest_tests(conn, limit=1)
+    assert [(r["test"], r["pass_rate"], r["timeouts"]) for r in hardest] == [("test_b", 0.0, 1)]
+
+    dist = ledger_query.score_distribution(conn, bins=4)
+    assert [(r["range"], r["submissions"]) for r in dist] == [("0-25%", 1), ("50-75%", 1)]
+    conn.close()
+
+
+def test_old_ledger_gets_duration_counts(tmp_path):
+    path = tmp_path / "ledger.sqlite"
+    ledger.append(path, _records(True, 2.0), "amy", "c1", graded_at=T0)
+    conn = ledger.connect(path)
+    conn.execute("ALTER TABLE test_stats DROP COLUMN durations")
+    conn.commit()
+    conn.close()
+
+    conn = ledger.connect(path)
+    rates = {r["test"]: r["avg_duration"] for r in ledger_query.pass_rate_by_test(conn)}
+    assert rates == {"test_a": 0.5, "test_b": 2.0}
+    conn.close()
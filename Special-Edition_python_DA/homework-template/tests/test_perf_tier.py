@@ -0,0 +1,68 @@
+"""
+grader/perf_tier.py 的計分測試
+==============================
+不是作業題目（run_grader 只跑 MODULES 裡登記的測試模組）。
+實際量測只跑一個 case、1,000 列，幾秒內完成。
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "grader"))
+
+import perf_tier  # noqa: E402
+import run_grader  # noqa: E402
+
+MB = 1024
+
+
+@pytest.mark.parametrize("seconds, factor", [(1.0, 1.0), (2.0, 1.0), (2.5, 0.6), (9.9, 0.3), (10.5, 0.0)])
+def test_time_ratio_tiers(seconds, factor):
+    ref = {"seconds": 1.0, "peak_rss_kb": 100 * MB}
+    assert perf_tier.score_timing(ref, {"seconds": seconds, "peak_rss_kb": 100 * MB})[2] == factor
+
+
+def test_memory_ratio_uses_worse_tier_and_floor():
+    ref = {"seconds": 1.0, "peak_rss_kb": 100 * MB}
+    assert perf_tier.score_timing(ref, {"seconds": 1.0, "peak_rss_kb": 300 * MB})[2] == 0.6
+    # 參考解只用 1 MB 時以 RSS_FLOOR_KB 當分母，學生用 40 MB 不算 40 倍
+    tiny = {"seconds": 1.0, "peak_rss_kb": MB}
+    _, mem_ratio, factor = perf_tier.score_timing(tiny, {"seconds": 1.0, "peak_rss_kb": 40 * MB})
+    assert mem_ratio == pytest.approx(40 * MB / perf_tier.RSS_FLOOR_KB) and factor == 1.0
+
+
+def test_correctness_gate_skips_measurement(monkeypatch):
+    def never(*args, **kwargs):
+        raise AssertionError("沒通過正確性測試不該量測")
+
+    monkeypatch.setattr(perf_tier, "_run_worker", never)
+    results = perf_tier.run_perf_tier({"test_red_double11_prices": {"passed": False}})
+    assert set(results) == set(perf_tier.PERF_CASES)
+    for name, info in results.items():
+        assert info["ratio"] == 0.0 and not info["passed"]
+        assert perf_tier.PERF_CASES[name]["requires"] in info["message"]
+
+
+def test_small_scale_run(monkeypatch):
+    case = "perf_red_double11_prices"
+    monkeypatch.setattr(perf_tier, "PERF_CASES", {case: perf_tier.PERF_CASES[case]})
+    results = perf_tier.run_perf_tier({"test_red_double11_prices": {"passed": True}}, scale=1e-6, repeat=1)
+    timing = results[case]["perf"]
+    assert timing["rows"] == 1_000
+    assert {"reference", "student", "time_ratio", "mem_ratio"} <= set(timing)
+    assert results[case]["ratio"] in {factor for _, factor in perf_tier.RATIO_TIERS} | {0.0}
+
+
+def test_skipped_perf_is_not_in_total():
+    everything = {name: {"passed": True} for name in run_grader.ALL_SCORES}
+    perf_total = sum(sum(cfg["scores"].values()) for cfg in run_grader.MODULES.values() if cfg.get("perf"))
+
+    _, earned, total = run_grader.generate_report(everything, show_solutions=False)
+    assert total - earned == perf_total
+
+    modules = run_grader.active_modules(perf=False)
+    report, earned, total = run_grader.generate_report(everything, show_solutions=False, modules=modules)
+    assert earned == total and "本次略過" in report
+    records = run_grader.build_ledger_records(everything, modules)
+    assert not any(r["test"].startswith("perf_") for r in records)
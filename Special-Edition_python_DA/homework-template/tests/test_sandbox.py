@@ -0,0 +1,93 @@
+"""
+grader/sandbox.py 與逐題重跑的測試
+==================================
+不是作業題目（run_grader 只跑 MODULES 裡登記的測試模組）。
+這些路徑只有學生程式出問題時才會走到，所以用故意出錯的小程式觸發。
+"""
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "grader"))
+
+import run_grader  # noqa: E402
+import sandbox  # noqa: E402
+
+needs_rlimit = pytest.mark.skipif(sandbox.resource is None, reason="沒有 resource 模組（Windows）")
+
+LIMITS = {"address_space_mb": 1024, "cpu_seconds": 30, "open_files": 64, "wall_seconds": 30}
+
+
+def _run(code: str, tmp_path, **limits) -> dict:
+    return sandbox.run_sandboxed([sys.executable, "-c", textwrap.dedent(code)],
+                                 cwd=str(tmp_path), limits=dict(LIMITS, **limits))
+
+
+def test_ok_even_when_command_fails(tmp_path):
+    assert _run("print('hi')", tmp_path)["outcome"] == "ok"
+    run = _run("raise SystemExit(3)", tmp_path)
+    assert (run["outcome"], run["returncode"]) == ("ok", 3)
+
+
+@needs_rlimit
+def test_memory_limit(tmp_path):
+    run = _run("x = bytearray(2 * 1024 ** 3)", tmp_path, address_space_mb=512)
+    assert run["outcome"] == "memory"
+    assert "512 MB" in sandbox.describe(run["outcome"], dict(LIMITS, address_space_mb=512))
+
+
+@needs_rlimit
+def test_cpu_limit(tmp_path):
+    start = time.monotonic()
+    run = _run("while True: pass", tmp_path, cpu_seconds=1)
+    assert run["outcome"] == "timeout"
+    assert time.monotonic() - start < 15
+
+
+def test_wall_clock_watchdog_kills_process_group(tmp_path):
+    # 孫行程也拿著 stdout；沒有整個 process group 一起砍的話 communicate() 會等滿 60 秒
+    code = """
+        import subprocess, sys, time
+        subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+        time.sleep(60)
+    """
+    start = time.monotonic()
+    run = _run(code, tmp_path, wall_seconds=2)
+    assert run["outcome"] == "timeout"
+    assert time.monotonic() - start < 15
+
+
+@needs_rlimit
+def test_crash_is_not_memory(tmp_path):
+    run = _run("import os, signal; os.kill(os.getpid(), signal.SIGSEGV)", tmp_path)
+    assert run["outcome"] == "crashed"
+
+
+FAKE_TESTS = '''
+import time
+
+def test_a():
+    assert True
+
+def test_a_big():
+    time.sleep(60)
+'''
+
+
+def test_module_timeout_reruns_each_test_by_node_id(tmp_path, monkeypatch):
+    pytest.importorskip("pytest_jsonreport")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_fake.py").write_text(FAKE_TESTS, encoding="utf-8")
+    monkeypatch.setattr(run_grader, "ROOT", tmp_path)
+    monkeypatch.setattr(sandbox, "TEST_LIMITS", dict(sandbox.TEST_LIMITS, wall_seconds=5))
+    monkeypatch.setattr(sandbox, "SINGLE_TEST_LIMITS", dict(sandbox.SINGLE_TEST_LIMITS, wall_seconds=5))
+
+    # test_a 是 test_a_big 的子字串：用 -k 選題的話 test_a 也會跟著逾時
+    results = run_grader._run_test_module({"test_file": "test_fake",
+                                           "scores": {"test_a": 1, "test_a_big": 1}})
+    assert results["test_a"]["passed"] and results["test_a"]["outcome"] == "passed"
+    assert results["test_a_big"]["outcome"] == "timeout"
+    assert "逾時" in results["test_a_big"]["message"]
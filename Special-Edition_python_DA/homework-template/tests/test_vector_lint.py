@@ -0,0 +1,52 @@
+"""
+grader/vector_lint.py 的規則測試
+================================
+不是作業題目（run_grader 只跑 MODULES 裡登記的測試模組），只確認向量化檢查不會誤報。
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "grader"))
+
+from vector_lint import lint_source  # noqa: E402
+
+
+def _rules(source: str) -> list:
+    return [(f["rule"], f["line"]) for f in lint_source(source)]
+
+
+def test_chained_assign_on_dataframe():
+    source = (
+        "def f(path, mask):\n"
+        "    df = pd.read_csv(path)\n"
+        "    df['a'][0] = 1\n"                    # 3：已知 DataFrame
+        "    df.loc[mask]['b'] = 2\n"             # 4：.loc 取出來的
+        "    other[other['x'] > 0]['b'] = 3\n"    # 5：布林遮罩取出來的
+    )
+    assert _rules(source) == [("chained-assign", 3), ("chained-assign", 4), ("chained-assign", 5)]
+
+
+def test_chained_assign_ignores_ndarray():
+    source = (
+        "def f(n):\n"
+        "    arr = np.zeros((n, n))\n"
+        "    arr[0][1] = 1\n"
+        "    grid = [[0] * n]\n"
+        "    i = j = 0\n"
+        "    grid[i][j] = 2\n"
+    )
+    assert _rules(source) == []
+
+
+def test_slice_assign_only_after_real_slice():
+    source = (
+        "def f(path):\n"
+        "    df = pd.read_csv(path)\n"
+        "    col = df['amount']\n"
+        "    col[0] = 0\n"                        # 取一欄不算切片
+        "    sub = df[df['amount'] > 100]\n"
+        "    sub['vip'] = True\n"                 # 6：切片後沒有 .copy()
+        "    sub = sub.copy()\n"
+        "    sub['vip'] = False\n"
+    )
+    assert _rules(source) == [("slice-assign", 6)]